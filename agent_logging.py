@@ -0,0 +1,175 @@
+"""Process-wide, non-blocking logging for the insurance agents.
+
+Agents log through a ``QueueHandler``: the calling thread only enqueues the
+record, and a single ``QueueListener`` thread per process formats it as JSON
+and writes it to the output stream.  The pipeline is installed once per
+process no matter how many agents are created.
+
+Every record carries the correlation id of the claim being processed (see
+``claim_context``), and INFO-level lines can be sampled to cut volume.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Optional, TextIO
+
+_claim_id: contextvars.ContextVar = contextvars.ContextVar("claim_id", default=None)
+
+_lock = threading.Lock()
+_pipeline = None
+
+
+def current_claim_id() -> Optional[str]:
+    """Return the correlation id of the claim being processed, if any."""
+    return _claim_id.get()
+
+
+@contextmanager
+def claim_context(claim_id: Optional[str] = None):
+    """
+    Tag all log records emitted inside the block with a claim correlation id.
+
+    Args:
+        claim_id: Id to use; a random one is generated if not provided
+
+    Yields:
+        str: The correlation id in effect
+    """
+    claim_id = claim_id or uuid.uuid4().hex[:12]
+    token = _claim_id.set(claim_id)
+    try:
+        yield claim_id
+    finally:
+        _claim_id.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    """Attach the current claim id to each record (runs on the caller's thread, where the claim context is set)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.claim_id = _claim_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of INFO and lower records; warnings and errors always pass."""
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "claim_id": getattr(record, "claim_id", None),
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _Pipeline:
+    def __init__(self, stream: TextIO, level: int, sample_rate: float, json_format: bool):
+        self.pid = os.getpid()
+        self.queue = queue.SimpleQueue()
+        self.queue_handler = logging.handlers.QueueHandler(self.queue)
+        self.queue_handler.addFilter(CorrelationFilter())
+        self.sampler = SamplingFilter(sample_rate)
+        self.queue_handler.addFilter(self.sampler)
+
+        stream_handler = logging.StreamHandler(stream)
+        stream_handler.setFormatter(JsonFormatter() if json_format else logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - [%(claim_id)s] %(message)s'))
+        self.listener = logging.handlers.QueueListener(self.queue, stream_handler)
+        self.listener.start()
+        self.level = level
+        self.loggers = set()
+
+    def stop(self):
+        self.listener.stop()
+
+
+def configure_logging(stream: Optional[TextIO] = None, level: int = logging.INFO,
+                      sample_rate: float = 1.0, json_format: bool = True):
+    """
+    Install (or replace) the process-wide logging pipeline.
+
+    Args:
+        stream: Output stream (default: stderr)
+        level: Level applied to agent loggers
+        sample_rate: Fraction of INFO lines to keep (0.0 - 1.0)
+        json_format: Emit JSON lines instead of plain text
+    """
+    global _pipeline
+    with _lock:
+        previous = _pipeline
+        _pipeline = _Pipeline(stream or sys.stderr, level, sample_rate, json_format)
+        if previous is not None:
+            for name in previous.loggers:
+                logger = logging.getLogger(name)
+                logger.removeHandler(previous.queue_handler)
+                _attach(logger)
+            if previous.pid == os.getpid():
+                previous.stop()
+
+
+def _attach(logger: logging.Logger):
+    logger.setLevel(_pipeline.level)
+    logger.propagate = False  # Root handlers would write each line again, synchronously
+    if _pipeline.queue_handler not in logger.handlers:
+        logger.addHandler(_pipeline.queue_handler)
+    _pipeline.loggers.add(logger.name)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a logger wired to the process-wide pipeline, creating the pipeline on first use.
+
+    Calling this repeatedly for the same name never adds duplicate handlers.
+    """
+    if _pipeline is None or _pipeline.pid != os.getpid():
+        # First use, or the listener thread did not survive a fork
+        configure_logging()
+    logger = logging.getLogger(name)
+    with _lock:
+        _attach(logger)
+    return logger
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _pipeline
+    with _lock:
+        if _pipeline is not None and _pipeline.pid == os.getpid():
+            _pipeline.stop()
+            for name in _pipeline.loggers:
+                logger = logging.getLogger(name)
+                logger.removeHandler(_pipeline.queue_handler)
+                logger.propagate = True
+        _pipeline = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,122 @@
+"""Running agents from a thread pool.
+
+Concurrency model
+-----------------
+* **Policy decisions are shared and lock-free.** A ``PolicyEnforcer``
+  evaluates against an immutable ``PolicySnapshot`` (compiled statements
+  plus that policy's decision cache).  Assigning ``enforcer.policy`` swaps
+  the snapshot atomically: running checks finish on the old policy, later
+  checks see the new one, and stale decisions cannot leak into the new
+  cache.  Only the cache's LRU bookkeeping and the optional profiler take
+  a (short) lock.  ``PolicyClient`` and ``PolicyStore`` are likewise safe
+  to share.
+* **Services are shared.** The OpenAI client, policy enforcer,
+  ``DecisionAuditLog``, ``ClaimCheckpointStore``, ``FormValueMapper`` and
+  the logging pipeline are thread-safe; create agents with a factory that
+  closes over one instance of each.
+* **Agents are not shared.** An agent owns one WebDriver and per-claim
+  buffers (``driver``, ``page_content``), and WebDriver sessions are not
+  thread-safe.  ``AgentPool`` hands each task an agent for its exclusive
+  use and takes it back, releasing per-claim state, when the task ends.
+"""
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional
+
+
+class AgentPool:
+    def __init__(self, agent_factory: Callable[[], Any], size: int = 4, start_browsers: bool = True):
+        """
+        Create a pool. Agents are created on first demand, up to ``size``.
+
+        Args:
+            agent_factory: Returns a new agent; close over shared services (client, enforcer, ...)
+            size: Maximum number of agents (browsers); tasks beyond this wait for a free agent
+            start_browsers: Start each agent's browser when it is created and keep it across tasks
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.agent_factory = agent_factory
+        self.size = size
+        self.start_browsers = start_browsers
+        self.agents: List[Any] = []
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _acquire(self, timeout: Optional[float]) -> Any:
+        try:
+            return self._ready(self._idle.get_nowait())
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Agent pool is closed")
+            create = len(self.agents) < self.size
+            if create:
+                self.agents.append(None)  # Reserve the slot; the browser starts outside the lock
+        if not create:
+            try:
+                agent = self._idle.get(timeout=timeout)
+            except queue.Empty:
+                raise TimeoutError("No agent became free in time") from None
+            return self._ready(agent)
+        try:
+            agent = self.agent_factory()
+            if self.start_browsers:
+                agent.initialize_browser()
+        except Exception:
+            with self._lock:
+                self.agents.remove(None)
+            raise
+        with self._lock:
+            self.agents[self.agents.index(None)] = agent
+        return agent
+
+    def _ready(self, agent: Any) -> Any:
+        """Restart the browser of an agent that lost it (e.g. a failed recycle) before reuse."""
+        if self.start_browsers and agent.driver is None:
+            try:
+                agent.initialize_browser()
+            except Exception:
+                self._idle.put(agent)
+                raise
+        return agent
+
+    def _release(self, agent: Any):
+        finish_claim = getattr(agent, "finish_claim", None)
+        if finish_claim is not None:
+            try:
+                finish_claim()
+            except Exception as e:
+                agent.logger.error(f"Failed to release agent: {e}")
+        self._idle.put(agent)
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Borrow an agent for exclusive use in a ``with`` block."""
+        agent = self._acquire(timeout)
+        try:
+            yield agent
+        finally:
+            self._release(agent)
+
+    def run(self, task: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``task(agent, *args, **kwargs)`` on a borrowed agent; suits ``executor.submit``."""
+        with self.session() as agent:
+            return task(agent, *args, **kwargs)
+
+    def close(self):
+        """Close every agent's browser. Call once no tasks are running."""
+        with self._lock:
+            self._closed = True
+            agents = [a for a in self.agents if a is not None]
+        for agent in agents:
+            agent.close_browser()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
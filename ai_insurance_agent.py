@@ -1,12 +1,15 @@
 import os
 from typing import Dict, Any, Optional, List
-from openai import OpenAI
-from selenium.webdriver.common.by import By
 from insurance_agent import InsuranceClaimAgent
-from dotenv import load_dotenv
+from agent_logging import claim_context
+from claim_checkpoint import ClaimCheckpointStore, ClaimStage
+from claim_validation import default_validator
+from form_value_mapper import FormValueMapper
+from page_content import PageContentExtractor
+from prompt_redaction import REDACTED_PREFIX, PiiVault, PromptRedactor, redact_pii
+from resource_governor import ResourceGovernor
 import json
 import time
-import requests
 from datetime import datetime
 from policy.policy_types import Action
 from policy.policy_enforcer import PolicyEnforcer
@@ -14,47 +17,140 @@ from policy.policy_enforcer import PolicyEnforcer
 class AIInsuranceAgent(InsuranceClaimAgent):
     """An AI-enhanced insurance claim agent that can analyze web pages and perform tasks autonomously."""
     
-    def __init__(self, api_key: Optional[str] = None, policy_file: str = None):
+    def __init__(self, api_key: Optional[str] = None, policy_file: str = None, policy_enforcer=None,
+                 checkpoint_store: Optional[ClaimCheckpointStore] = None,
+                 resource_governor: Optional[ResourceGovernor] = None,
+                 value_mapper: Optional[FormValueMapper] = None):
         """
         Initialize the AI Insurance Agent.
         
         Args:
-            api_key: OpenAI API key. If not provided, will look for OPENAI_API_KEY in environment.
+            api_key: OpenAI API key. If not provided, will look for OPENAI_API_KEY in environment
+                (call dotenv.load_dotenv() first to pick it up from a .env file).
             policy_file: Path to policy file. If not provided, policy enforcement will be disabled.
+            policy_enforcer: Object with a check_permission method to use instead of loading
+                policy_file, e.g. a shared PolicyEnforcer or a PolicyClient for the policy server.
+            checkpoint_store: Store for per-claim stage checkpoints. If provided, a retried claim
+                resumes after its last completed stage instead of repeating LLM calls.
+            resource_governor: Limits (memory, browser age, claims per browser) that trigger
+                recycling the browser between claims, plus a per-stage memory report.
+            value_mapper: Maps structured claim data onto the form without the LLM; share one
+                between agents to get an overall fallback rate. Defaults to FormValueMapper().
         """
         super().__init__()
-        load_dotenv()  # Load environment variables
         
         # Check for API key
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key must be provided either directly or through OPENAI_API_KEY environment variable")
             
-        self.client = OpenAI(api_key=self.api_key)
+        self._client = None  # Created on first use
         
         # Initialize policy enforcer
-        if policy_file:
+        if policy_enforcer is not None:
+            self.policy_enforcer = policy_enforcer
+        elif policy_file:
             self.policy_enforcer = PolicyEnforcer(policy_file)
         else:
             self.policy_enforcer = None
 
-    def get_page_content(self) -> str:
-        """Extract the visible text content from the current page."""
+        self.checkpoint_store = checkpoint_store
+        self.page_content = PageContentExtractor()
+        self.prompt_redactor = PromptRedactor(self.policy_enforcer)
+        self.resource_governor = resource_governor
+        self.value_mapper = value_mapper or FormValueMapper()
+
+    def initialize_browser(self):
+        """Initialize the web browser, starting the governor's clock for it."""
+        super().initialize_browser()
+        if self.resource_governor:
+            self.resource_governor.driver_started()
+
+    def _measure(self, stage: str):
+        """Record memory after a stage if a resource governor is configured."""
+        if self.resource_governor:
+            self.resource_governor.measure(stage, self.driver)
+
+    def release_claim_buffers(self):
+        """Drop per-claim state (memoized page content) so it does not outlive the claim."""
+        self.page_content.reset()
+
+    def recycle_browser_if_needed(self) -> Optional[str]:
+        """
+        Restart the browser if it exceeds the governor's limits. Call between claims.
+        
+        Returns:
+            Optional[str]: The reason the browser was recycled, or None
+            
+        Raises:
+            Exception: If the browser could not be restarted; the agent is left without a browser
+        """
+        if not self.resource_governor:
+            return None
+        reason = self.resource_governor.should_recycle(self.driver)
+        if reason:
+            self.logger.info(f"Recycling browser: {reason}")
+            self.close_browser()
+            for attempt in range(3):
+                try:
+                    self.initialize_browser()
+                    break
+                except Exception:
+                    if attempt == 2:  # Last attempt
+                        raise
+                    time.sleep(1)  # Wait before retrying
+            self.resource_governor.recycles += 1
+        return reason
+
+    def finish_claim(self) -> Optional[str]:
+        """
+        Release per-claim buffers and recycle the browser if needed, for agents that keep
+        their browser across claims.
+        
+        Returns:
+            Optional[str]: The reason the browser was recycled, or None
+        """
+        self.release_claim_buffers()
+        if self.resource_governor:
+            self.resource_governor.claim_finished()
+            self._measure("claim_finished")
+        return self.recycle_browser_if_needed()
+
+    @property
+    def client(self):
+        """OpenAI client, created on first use so importing and constructing the agent stays cheap."""
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
+    @client.setter
+    def client(self, client):
+        self._client = client
+
+    def _check_read_permission(self, *actions: Action):
+        """Raise PermissionError unless every action is allowed on the current page."""
         if not self.driver:
             raise RuntimeError("Browser not initialized. Call initialize_browser() first.")
-        
-        # Check permission
         if self.policy_enforcer:
             context = {
                 "browser.url": self.driver.current_url,
                 "time": datetime.now().isoformat()
             }
-            if not self.policy_enforcer.check_permission(Action.READ_PAGE, "*", context):
-                raise PermissionError("Not authorized to read page content")
-        
-        # Get text from body
-        body = self.driver.find_element(By.TAG_NAME, "body")
-        return body.text.strip()
+            for action in actions:
+                if not self.policy_enforcer.check_permission(action, "*", context):
+                    verb = "read page content" if action == Action.READ_PAGE else "analyze content"
+                    raise PermissionError(f"Not authorized to {verb}")
+
+    def get_page_content(self) -> str:
+        """Extract the visible text content from the current page (capped, memoized per navigation)."""
+        self._check_read_permission(Action.READ_PAGE)
+        return self.page_content.text(self.driver)
+
+    def get_form_outline(self) -> Dict[str, Any]:
+        """Extract a compact outline of the form fields on the current page."""
+        self._check_read_permission(Action.READ_PAGE)
+        return self.page_content.outline(self.driver)
 
     def analyze_page(self) -> Dict[str, Any]:
         """Analyze the current page content using AI."""
@@ -63,21 +159,19 @@ class AIInsuranceAgent(InsuranceClaimAgent):
         
         try:
             # Check permissions
-            if self.policy_enforcer:
-                context = {
-                    "browser.url": self.driver.current_url,
-                    "time": datetime.now().isoformat()
-                }
-                if not self.policy_enforcer.check_permission(Action.READ_PAGE, "*", context):
-                    raise PermissionError("Not authorized to read page content")
-                if not self.policy_enforcer.check_permission(Action.ANALYZE_CONTENT, "*", context):
-                    raise PermissionError("Not authorized to analyze content")
+            self._check_read_permission(Action.READ_PAGE, Action.ANALYZE_CONTENT)
                 
-            # Get page content
-            content = self.get_page_content()
+            # Get the form region as a compact outline, keeping only fields the policy lets us
+            # fill; fall back to capped page text. PII is redacted either way.
+            outline = self.page_content.outline(self.driver)
+            if outline.get("fields"):
+                pruned = self.prompt_redactor.prune_outline(outline, self.driver.current_url)
+                content = self.page_content.render(pruned)
+            else:
+                content = redact_pii(self.page_content.text(self.driver))
             
             # Prepare prompt for OpenAI
-            prompt = f"Analyze this insurance form content and identify the required fields and their types: {content}"
+            prompt = f"Analyze this insurance form content and identify the required fields and their types:\n{content}"
             
             # Call OpenAI API
             response = self.client.chat.completions.create(
@@ -88,8 +182,13 @@ class AIInsuranceAgent(InsuranceClaimAgent):
                 ]
             )
             
-            # Return analysis
-            return MOCK_OPENAI_RESPONSE  # For testing purposes
+            # Return analysis (free-form answers are wrapped so callers always get a dict)
+            content = response.choices[0].message.content
+            try:
+                analysis = json.loads(content)
+            except (TypeError, json.JSONDecodeError):
+                analysis = None
+            return analysis if isinstance(analysis, dict) else {"analysis": content}
             
         except Exception as e:
             self.logger.error(f"Error in analyze_page: {str(e)}")
@@ -108,70 +207,244 @@ class AIInsuranceAgent(InsuranceClaimAgent):
             
         return super().fill_form_field(field_id, value)
 
-    def execute_task(self, task_description: str) -> bool:
-        """Execute a task based on AI analysis."""
+    def _checkpoint(self, claim_id: Optional[str], stage: ClaimStage, payload: Any = None):
+        """Record a completed stage if checkpointing is enabled for this claim."""
+        if self.checkpoint_store and claim_id:
+            self.checkpoint_store.save(claim_id, stage, payload)
+
+    def _output_schema(self) -> Optional[Dict[str, str]]:
+        """Fields the model should generate values for: fillable fields of the current form."""
         try:
-            # Get AI analysis of the page
+            outline = self.page_content.outline(self.driver)
+        except Exception:
+            return None
+        if not outline.get("fields"):
+            return None
+        return self.prompt_redactor.output_schema(
+            self.prompt_redactor.prune_outline(outline, self.driver.current_url)
+        )
+
+    @staticmethod
+    def _valid_field_values(values: Any) -> bool:
+        """Whether model output is a field id to scalar value mapping."""
+        return isinstance(values, dict) and all(
+            isinstance(k, str) and isinstance(v, (str, int, float, bool)) for k, v in values.items()
+        )
+
+    def generate_field_values(self, analysis: Dict[str, Any], task_description: str) -> Optional[Dict[str, Any]]:
+        """
+        Ask the model for form field values, retrying on network and parse errors.
+        
+        The prompt is redacted of PII and asks only for fields the policy allows filling.
+        Placeholders the model puts in a value are mapped back to the redacted PII; a value
+        still holding an unknown placeholder counts as a parse failure.
+        
+        Returns:
+            Optional[Dict[str, Any]]: Field id to value mapping, or None if generation failed
+        """
+        import requests
+
+        vault = PiiVault()
+        prompt = (f"Based on this form analysis: {vault.redact(json.dumps(analysis))}\n"
+                  f"Generate appropriate values for a claim with this description: {vault.redact(task_description)}")
+        schema = self._output_schema()
+        if schema:
+            prompt += "\n" + self.prompt_redactor.schema_instruction(schema)
+
+        for attempt in range(3):
+            try:
+                response = self.client.chat.completions.create(
+                    model="gpt-4",
+                    messages=[{
+                        "role": "system",
+                        "content": "You are an AI assistant helping to fill out insurance claim forms."
+                    }, {
+                        "role": "user",
+                        "content": prompt
+                    }],
+                    temperature=0.7,
+                    max_tokens=1000
+                )
+                
+                field_values = json.loads(response.choices[0].message.content)
+                if not self._valid_field_values(field_values):
+                    raise ValueError(f"Expected an object of field values, got: {type(field_values).__name__}")
+                field_values = {k: vault.restore(v) for k, v in field_values.items()}
+                redacted = [k for k, v in field_values.items() if isinstance(v, str) and REDACTED_PREFIX in v]
+                if redacted:
+                    raise ValueError(f"Redaction placeholders in values for: {redacted}")
+                return field_values
+                
+            except (requests.exceptions.RequestException, ValueError) as e:  # JSONDecodeError is a ValueError
+                if attempt == 2:  # Last attempt
+                    self.logger.error(f"Failed to generate field values: {str(e)}")
+                    return None
+                time.sleep(1)  # Wait before retrying
+
+    def map_claim_values(self, claim_data: Dict[str, Any],
+                         task_description: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Map structured claim data onto the fillable fields of the current form, without the LLM.
+        
+        Returns:
+            Optional[Dict[str, Any]]: Field id to value mapping, or None if the claim data is
+                invalid or the mapping is not confident enough
+        """
+        values = None
+        errors = default_validator.validate(claim_data)
+        if errors:
+            self.logger.warning("Invalid claim data; falling back to the LLM: " + "; ".join(e.message for e in errors))
+        else:
+            outline = self.get_form_outline()
+            pruned = self.prompt_redactor.prune_outline(outline, self.driver.current_url)
+            mapping = self.value_mapper.map(claim_data, pruned, task_description)
+            if self.value_mapper.is_confident(mapping):
+                values = mapping.values
+            else:
+                self.logger.info(f"Low mapping confidence ({mapping.confidence:.2f}, "
+                                 f"missing: {mapping.missing}); falling back to the LLM")
+        self.value_mapper.record(used_fallback=values is None)
+        return values
+
+    def prepare_claim(self, task_description: str, claim_id: Optional[str] = None,
+                      claim_data: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Analyze the current page and generate field values, without touching the form.
+        
+        Stages already checkpointed for ``claim_id`` are reused instead of calling the model.
+        
+        Args:
+            task_description: Description of the claim to file
+            claim_id: If set and a checkpoint store is configured, reuse and record stage checkpoints
+            claim_data: Structured claim input; if it maps confidently onto the form, the
+                values are used directly and the LLM is not called
+            
+        Returns:
+            Optional[Dict[str, Any]]: Field id to value mapping, or None if analysis or generation failed
+        """
+        checkpoints = {}
+        if self.checkpoint_store and claim_id:
+            checkpoints = self.checkpoint_store.completed_stages(claim_id)
+            if checkpoints:
+                self.logger.info(f"Resuming claim after stages: {[s.value for s in checkpoints]}")
+
+        # Values already generated (by the LLM or the mapper) need no page analysis
+        field_values = checkpoints.get(ClaimStage.VALUES_GENERATED)
+        if self._valid_field_values(field_values):
+            return field_values
+
+        # Routine claims: map structured data straight onto the form
+        if claim_data is not None:
+            field_values = self.map_claim_values(claim_data, task_description)
+            if field_values is not None:
+                self._checkpoint(claim_id, ClaimStage.VALUES_GENERATED, field_values)
+                self._measure(ClaimStage.VALUES_GENERATED.value)
+                return field_values
+
+        # Get AI analysis of the page
+        analysis = checkpoints.get(ClaimStage.PAGE_ANALYZED)
+        if not analysis:
             analysis = self.analyze_page()
             if not analysis:
                 self.logger.error("Failed to analyze page")
-                return False
+                return None
+            self._checkpoint(claim_id, ClaimStage.PAGE_ANALYZED, analysis)
+            self._measure(ClaimStage.PAGE_ANALYZED.value)
 
-            # Generate field values based on task
-            for attempt in range(3):
-                try:
-                    response = self.client.chat.completions.create(
-                        model="gpt-4",
-                        messages=[{
-                            "role": "system",
-                            "content": "You are an AI assistant helping to fill out insurance claim forms."
-                        }, {
-                            "role": "user",
-                            "content": f"Based on this form analysis: {json.dumps(analysis)}\nGenerate appropriate values for a claim with this description: {task_description}"
-                        }],
-                        temperature=0.7,
-                        max_tokens=1000
-                    )
-                    
-                    field_values = json.loads(response.choices[0].message.content)
-                    
-                    # Fill out the form
-                    success = True
-                    for field_id, value in field_values.items():
-                        if not self.fill_form_field(field_id, str(value)):
-                            self.logger.error(f"Failed to fill field: {field_id}")
-                            success = False
-                            
-                    return success
-                    
-                except (requests.exceptions.RequestException, json.JSONDecodeError) as e:
-                    if attempt == 2:  # Last attempt
-                        self.logger.error(f"Network error in execute_task: {str(e)}")
-                        return False
-                    time.sleep(1)  # Wait before retrying
+        # Generate field values based on task
+        field_values = self.generate_field_values(analysis, task_description)
+        if field_values is None:
+            return None
+        self._checkpoint(claim_id, ClaimStage.VALUES_GENERATED, field_values)
+        self._measure(ClaimStage.VALUES_GENERATED.value)
+        return field_values
+
+    def fill_claim(self, field_values: Dict[str, Any], claim_id: Optional[str] = None) -> bool:
+        """
+        Fill the form with generated values.
+        
+        Always redone on resume: a resumed claim runs in a fresh browser session.
+        
+        Returns:
+            bool: True if every field was filled
+        """
+        success = True
+        for field_id, value in field_values.items():
+            if not self.fill_form_field(field_id, str(value)):
+                self.logger.error(f"Failed to fill field: {field_id}")
+                success = False
+        if success:
+            self._checkpoint(claim_id, ClaimStage.FIELDS_FILLED, sorted(field_values))
+        self._measure(ClaimStage.FIELDS_FILLED.value)
+        return success
+
+    def submit_claim(self, submit_selector: str, claim_id: Optional[str] = None) -> bool:
+        """Click the submit button and record the submission."""
+        success = self.click_element(submit_selector)
+        if success:
+            self._checkpoint(claim_id, ClaimStage.SUBMITTED)
+        return success
+
+    def is_submitted(self, claim_id: str) -> bool:
+        """Whether the checkpoint store records this claim as already submitted."""
+        return bool(self.checkpoint_store) and self.checkpoint_store.last_stage(claim_id) == ClaimStage.SUBMITTED
+
+    def execute_task(self, task_description: str, claim_id: Optional[str] = None,
+                     claim_data: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Execute a task based on AI analysis.
+        
+        Args:
+            task_description: Description of the claim to file
+            claim_id: If set and a checkpoint store is configured, reuse and record stage checkpoints
+            claim_data: Structured claim input to fill without the LLM when it maps confidently
+            
+        Returns:
+            bool: True if all fields were filled, False otherwise
+        """
+        try:
+            field_values = self.prepare_claim(task_description, claim_id, claim_data)
+            if field_values is None:
+                return False
+            return self.fill_claim(field_values, claim_id)
                     
         except Exception as e:
             self.logger.error(f"Error in execute_task: {str(e)}")
             return False
 
-    def process_claim_with_ai(self, url: str, task_description: str) -> bool:
+    def process_claim_with_ai(self, url: str, task_description: str, claim_id: Optional[str] = None,
+                              submit_selector: Optional[str] = None,
+                              claim_data: Optional[Dict[str, Any]] = None) -> bool:
         """
         Process an insurance claim using AI assistance.
         
         Args:
             url: The URL of the insurance claim form
             task_description: Description of what needs to be accomplished
+            claim_id: Caller-supplied id that identifies this claim across retries; enables resuming
+                from checkpoints and skipping an already submitted claim. Without it, every call is
+                a new claim and only a random id is used for log correlation
+            submit_selector: CSS selector of the submit button; if given, the form is submitted after filling
+            claim_data: Structured claim input (policy_number, claim_amount, ...); routine claims are
+                filled from it directly and only fall back to the LLM when the mapping is uncertain
             
         Returns:
             bool: True if claim was processed successfully, False otherwise
         """
-        try:
-            self.initialize_browser()
-            self.driver.get(url)
-            success = self.execute_task(task_description)
-            return success
-        except Exception as e:
-            self.logger.error(f"Error processing claim with AI: {str(e)}")
-            return False
-        finally:
-            self.close_browser()
+        with claim_context(claim_id):
+            if claim_id and self.is_submitted(claim_id):
+                self.logger.info("Claim already submitted; skipping")
+                return True
+            try:
+                self.initialize_browser()
+                self.driver.get(url)
+                success = self.execute_task(task_description, claim_id=claim_id, claim_data=claim_data)
+                if success and submit_selector:
+                    success = self.submit_claim(submit_selector, claim_id)
+                return success
+            except Exception as e:
+                self.logger.error(f"Error processing claim with AI: {str(e)}")
+                return False
+            finally:
+                self.release_claim_buffers()
+                self.close_browser()
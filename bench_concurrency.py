@@ -0,0 +1,89 @@
+"""Throughput of policy checks and form fills versus thread count.
+
+Policy checks are pure Python and hold the GIL, so they are expected to
+stay flat as threads are added; fills wait on the (simulated) browser, so
+they scale with the number of pooled agents.  One JSON line per thread
+count:
+
+    python bench_concurrency.py [--threads 1 2 4 8 16] [--checks 20000] [--fills 400] [--latency 0.002]
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import Mock
+
+from agent_pool import AgentPool
+from ai_insurance_agent import AIInsuranceAgent
+from policy.policy_enforcer import PolicyEnforcer
+from policy.policy_types import Action
+
+POLICY_FILE = "policies/insurance_agent_policy.json"
+URL = "http://localhost:8000/*"
+FIELDS = ["policy-number", "incident-date", "claim-type", "claim-amount", "description"]
+
+
+class _SimulatedDriver:
+    """Answers find_element after a fixed delay, like a remote browser round trip"""
+
+    def __init__(self, latency: float):
+        self.current_url = URL
+        self.latency = latency
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def find_element(self, by, selector):
+        time.sleep(self.latency)
+        return Mock(tag_name="input", get_attribute=Mock(return_value="text"))
+
+    def quit(self):
+        pass
+
+
+def _timed(threads: int, task, items) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for _ in executor.map(task, items):
+            pass
+    return time.perf_counter() - start
+
+
+def measure(threads: int, checks: int, fills: int, latency: float, cache_size: int) -> dict:
+    """Checks/s and fills/s with ``threads`` workers (and as many pooled agents)."""
+    enforcer = PolicyEnforcer(POLICY_FILE, cache_size=cache_size)
+    context = {"browser.url": URL, "time": datetime.now().isoformat()}
+    check_args = [f"form_field:{FIELDS[i % len(FIELDS)]}-{i % 512}" for i in range(checks)]
+    check_seconds = _timed(threads, lambda r: enforcer.check_permission(Action.FILL_FORM, r, context), check_args)
+
+    def factory():
+        agent = AIInsuranceAgent(api_key="bench", policy_enforcer=enforcer)
+        agent.driver_factory = lambda: _SimulatedDriver(latency)
+        return agent
+
+    with AgentPool(factory, size=threads) as pool:
+        fill_seconds = _timed(threads, lambda f: pool.run(lambda a: a.fill_form_field(f, "value")),
+                              [FIELDS[i % len(FIELDS)] for i in range(fills)])
+    return {
+        "threads": threads,
+        "checks_per_s": round(checks / check_seconds),
+        "fills_per_s": round(fills / fill_seconds),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark concurrent policy checks and form fills")
+    parser.add_argument("--threads", type=int, nargs="*", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--checks", type=int, default=20000)
+    parser.add_argument("--fills", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated browser round trip (s)")
+    parser.add_argument("--cache-size", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for threads in args.threads:
+        print(json.dumps(measure(threads, args.checks, args.fills, args.latency, args.cache_size)))
+
+
+if __name__ == "__main__":
+    main()
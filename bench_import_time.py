@@ -0,0 +1,67 @@
+"""Measure cold-start import cost of the project's entry points.
+
+Each module is imported in a fresh interpreter several times; the script
+reports the median wall time of the import and which heavy third-party
+packages ended up loaded.
+
+    python bench_import_time.py [--runs 10] [module ...]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = [
+    "policy.policy_enforcer",
+    "claim_validation",
+    "insurance_agent",
+    "ai_insurance_agent",
+]
+
+HEAVY_MODULES = ["selenium", "openai", "requests", "dotenv", "numpy"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(module: str, runs: int = 10) -> dict:
+    """Import a module in ``runs`` fresh interpreters and summarize the timings."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    samples = []
+    heavy = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=root, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output)
+        samples.append(result["seconds"])
+        heavy = result["heavy"]
+    return {
+        "module": module,
+        "median_ms": round(statistics.median(samples) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2),
+        "heavy_modules_loaded": heavy
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark import time of project modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    for module in args.modules:
+        print(json.dumps(measure(module, args.runs)))
+
+
+if __name__ == "__main__":
+    main()
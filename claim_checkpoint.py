@@ -0,0 +1,91 @@
+"""Durable per-claim stage checkpoints.
+
+``process_claim_with_ai`` records each completed stage of a claim (page
+analysis, generated field values, filled fields, submission) together with
+its output in a local SQLite database in WAL mode.  A retry of the same claim
+resumes after the last completed stage and reuses the cached LLM outputs
+instead of repeating the model calls.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from enum import Enum
+from typing import Any, Dict, Optional
+
+
+class ClaimStage(Enum):
+    PAGE_ANALYZED = "page_analyzed"
+    VALUES_GENERATED = "values_generated"
+    FIELDS_FILLED = "fields_filled"
+    SUBMITTED = "submitted"
+
+
+STAGE_ORDER = list(ClaimStage)
+
+
+def claim_key(url: str, task_description: str) -> str:
+    """
+    Deterministic claim id from the form url and task.
+
+    Only use it as ``claim_id`` when the url and task identify a single claim: distinct
+    claims with the same url and task would share checkpoints and be skipped as submitted.
+    """
+    return hashlib.sha256(f"{url}\n{task_description}".encode()).hexdigest()[:16]
+
+
+class ClaimCheckpointStore:
+    def __init__(self, path: str = "claim_checkpoints.db"):
+        """
+        Open (or create) a checkpoint database.
+
+        Args:
+            path: SQLite database file; ":memory:" keeps checkpoints for this process only
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoints ("
+            " claim_id TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " payload TEXT,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (claim_id, stage))"
+        )
+
+    def save(self, claim_id: str, stage: ClaimStage, payload: Any = None):
+        """Record that a stage completed, with its (JSON-serializable) output."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (claim_id, stage, payload, updated_at) VALUES (?, ?, ?, ?)",
+                (claim_id, stage.value, json.dumps(payload), time.time())
+            )
+
+    def completed_stages(self, claim_id: str) -> Dict[ClaimStage, Any]:
+        """Return the completed stages of a claim and their outputs."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, payload FROM checkpoints WHERE claim_id = ?", (claim_id,)
+            ).fetchall()
+        return {ClaimStage(stage): json.loads(payload) for stage, payload in rows}
+
+    def last_stage(self, claim_id: str) -> Optional[ClaimStage]:
+        """Return the furthest stage a claim has completed, if any."""
+        stages = self.completed_stages(claim_id)
+        for stage in reversed(STAGE_ORDER):
+            if stage in stages:
+                return stage
+        return None
+
+    def clear(self, claim_id: str):
+        """Forget all checkpoints of a claim (e.g. to force a full re-run)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM checkpoints WHERE claim_id = ?", (claim_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,269 @@
+"""Pipelined claim processing with speculative prefetch.
+
+A claim has a slow, mostly-waiting *prepare* phase (navigate, analyze the
+page, generate field values with the LLM) and a short *complete* phase
+(fill the form, submit).  ``ClaimScheduler`` keeps several agent "lanes",
+each with its own browser, and starts preparing the next queued claim on a
+free lane while the current claim is still being filled and submitted, so
+the phases of consecutive claims overlap.
+
+Claims are taken in priority order (higher first, FIFO within a priority)
+and can be cancelled until their form filling starts.
+"""
+import heapq
+import itertools
+import logging
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from agent_logging import claim_context
+
+logger = logging.getLogger(__name__)
+
+_ALREADY_SUBMITTED = object()
+
+
+@dataclass(order=True)
+class ClaimJob:
+    """A queued claim; ordered by (-priority, submission order)"""
+    sort_key: tuple
+    claim_id: str = field(compare=False)
+    url: str = field(compare=False)
+    task_description: str = field(compare=False)
+    submit_selector: Optional[str] = field(compare=False, default=None)
+    claim_data: Optional[Dict[str, Any]] = field(compare=False, default=None)
+    future: Future = field(compare=False, default_factory=Future)
+    cancelled: bool = field(compare=False, default=False)
+    filling: bool = field(compare=False, default=False)
+    resumable: bool = field(compare=False, default=True)
+
+    @property
+    def checkpoint_id(self) -> Optional[str]:
+        """Id for checkpoints and dedup; only a caller-supplied claim id identifies a claim"""
+        return self.claim_id if self.resumable else None
+
+
+class ClaimScheduler:
+    def __init__(self, agent_factory: Callable[[], Any], lanes: int = 2):
+        """
+        Create a scheduler.
+
+        Args:
+            agent_factory: Returns a new AIInsuranceAgent; share the OpenAI client and
+                policy enforcer between agents by closing over them
+            lanes: Number of agents/browsers; 2 lets one claim prepare while another completes
+        """
+        if lanes < 1:
+            raise ValueError("lanes must be at least 1")
+        self.agent_factory = agent_factory
+        self.lanes = lanes
+        self.agents: List[Any] = []
+        self._queue: List[ClaimJob] = []
+        self._jobs: Dict[str, ClaimJob] = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._prefetch = ThreadPoolExecutor(max_workers=lanes, thread_name_prefix="ClaimPrefetch")
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"completed": 0, "failed": 0, "cancelled": 0}
+
+    def start(self) -> "ClaimScheduler":
+        """Start browsers for every lane and begin processing queued claims."""
+        for _ in range(self.lanes):
+            agent = self.agent_factory()
+            agent.initialize_browser()
+            self.agents.append(agent)
+        self._thread = threading.Thread(target=self._run, name="ClaimScheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, url: str, task_description: str, claim_id: Optional[str] = None,
+               priority: int = 0, submit_selector: Optional[str] = None,
+               claim_data: Optional[Dict[str, Any]] = None) -> Future:
+        """
+        Queue a claim.
+
+        ``claim_data`` is structured claim input filled without the LLM when it maps confidently.
+        Pass ``claim_id`` to resume the claim from checkpoints and to cancel it; without one the
+        claim gets a random id and is always processed from the start.
+
+        Returns:
+            Future: Resolves to True/False like process_claim_with_ai, or is cancelled
+
+        Raises:
+            ValueError: If a claim with the same id is already queued or running
+        """
+        resumable = claim_id is not None
+        claim_id = claim_id if resumable else uuid.uuid4().hex[:12]
+        job = ClaimJob(sort_key=(-priority, next(self._counter)), claim_id=claim_id, url=url,
+                       task_description=task_description, submit_selector=submit_selector,
+                       claim_data=claim_data, resumable=resumable)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Scheduler is shutting down")
+            if claim_id in self._jobs:
+                raise ValueError(f"Claim {claim_id} is already queued")
+            self._jobs[claim_id] = job
+            heapq.heappush(self._queue, job)
+            self._cond.notify()
+        return job.future
+
+    def cancel(self, claim_id: str) -> bool:
+        """
+        Cancel a claim that has not started filling the form.
+
+        Returns:
+            bool: True if the claim will not be filled; False once filling has started
+        """
+        with self._cond:
+            job = self._jobs.get(claim_id)
+            if job is None or job.future.done() or job.filling:
+                return False
+            job.cancelled = True
+            if not job.future.running():
+                job.future.cancel()
+            return True
+
+    def _next_job(self) -> Optional[ClaimJob]:
+        """Pop the next claim that was not cancelled (call with ``_cond`` held)."""
+        while self._queue:
+            job = heapq.heappop(self._queue)
+            if job.cancelled or not job.future.set_running_or_notify_cancel():
+                self._finish(job, cancelled=True)
+                continue
+            return job
+        return None
+
+    def _notify(self, _prepared: Future):
+        """Wake the scheduler thread when a prepare finishes."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def _finish(self, job: ClaimJob, result: Optional[bool] = None, cancelled: bool = False,
+                error: Optional[BaseException] = None):
+        with self._cond:  # Re-entrant: _next_job already holds it
+            self._jobs.pop(job.claim_id, None)
+            if cancelled or (job.cancelled and not job.filling):
+                self.stats["cancelled"] += 1
+                if job.future.running():
+                    # Cancelled while preparing: the form is never filled
+                    job.future.set_result(False)
+                else:
+                    job.future.cancel()
+            elif error is not None:
+                self.stats["failed"] += 1
+                job.future.set_exception(error)
+            else:
+                self.stats["completed" if result else "failed"] += 1
+                job.future.set_result(result)
+
+    def _prepare(self, lane: int, job: ClaimJob):
+        """Navigate and generate field values (runs on a prefetch thread)."""
+        agent = self.agents[lane]
+        with claim_context(job.claim_id):
+            if job.resumable and agent.is_submitted(job.claim_id):
+                return _ALREADY_SUBMITTED
+            agent.driver.get(job.url)
+            return agent.prepare_claim(job.task_description, job.checkpoint_id, job.claim_data)
+
+    def _complete(self, lane: int, job: ClaimJob, field_values: Dict[str, Any]) -> bool:
+        """Fill and submit the form (runs on the scheduler thread)."""
+        agent = self.agents[lane]
+        with claim_context(job.claim_id):
+            success = agent.fill_claim(field_values, job.checkpoint_id)
+            if success and job.submit_selector:
+                success = agent.submit_claim(job.submit_selector, job.checkpoint_id)
+            return success
+
+    def _release_lane(self, lane: int) -> bool:
+        """
+        Free the lane's per-claim buffers and recycle its browser if over its limits.
+
+        Returns:
+            bool: False if the lane lost its browser and must be taken out of rotation
+        """
+        try:
+            self.agents[lane].finish_claim()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to recycle browser for lane {lane}; removing it from rotation: {e}")
+            return False
+
+    def _fail_queued(self, error: BaseException):
+        """Stop accepting claims and fail every queued one."""
+        with self._cond:
+            self._stopping = True
+            while self._queue:
+                self._finish(heapq.heappop(self._queue), error=error)
+
+    def _run(self):
+        free_lanes = deque(range(self.lanes))
+        in_flight = deque()  # (job, lane, prepare future), in start order
+        while True:
+            with self._cond:
+                # Sleep until the oldest prepare is done, starting newly queued claims on free
+                # lanes meanwhile (submit() and prepare completions both notify _cond)
+                while True:
+                    while free_lanes:
+                        job = self._next_job()
+                        if job is None:
+                            break
+                        lane = free_lanes.popleft()
+                        prepared = self._prefetch.submit(self._prepare, lane, job)
+                        prepared.add_done_callback(self._notify)
+                        in_flight.append((job, lane, prepared))
+                    if in_flight:
+                        if in_flight[0][2].done():
+                            break
+                    elif not free_lanes:
+                        logger.error("No healthy lanes left")
+                        self._fail_queued(RuntimeError("No healthy lanes left"))
+                        return
+                    elif self._stopping:
+                        return  # Stopping and nothing left to do
+                    self._cond.wait()
+
+            job, lane, prepared = in_flight.popleft()
+            try:
+                field_values = prepared.result()
+                with self._cond:
+                    # Past this point cancel() returns False and the claim is filled
+                    cancelled = job.cancelled
+                    job.filling = not cancelled
+                if cancelled:
+                    self._finish(job, cancelled=True)
+                elif field_values is _ALREADY_SUBMITTED:
+                    self._finish(job, result=True)
+                elif field_values is None:
+                    self._finish(job, result=False)
+                else:
+                    self._finish(job, result=self._complete(lane, job, field_values))
+            except Exception as e:
+                logger.error(f"Claim {job.claim_id} failed: {e}")
+                self._finish(job, error=e)
+            if self._release_lane(lane):
+                free_lanes.append(lane)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting claims, finish queued ones (if ``wait``) and close the browsers."""
+        with self._cond:
+            self._stopping = True
+            if not wait:
+                for job in self._queue:
+                    job.cancelled = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self._prefetch.shutdown(wait=True)
+        for agent in self.agents:
+            agent.close_browser()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -0,0 +1,225 @@
+"""Declarative, compiled validation of claim input.
+
+A ``ClaimSchema`` describes the expected fields; ``ClaimValidator`` compiles
+it once (regexes, parsers and range bounds are resolved up front) and then
+validates whole batches of claims column by column, returning structured
+per-field errors instead of logging each failure.
+"""
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# Common currency formats (e.g., $1,234.56 or 1234.56)
+CURRENCY_PATTERN = re.compile(r'^\$?[0-9]{1,3}(?:,?[0-9]{3})*(?:\.[0-9]{2})?$')
+
+FIELD_TYPES = ("string", "number", "currency", "date", "pattern", "choice")
+
+
+@dataclass
+class FieldSpec:
+    """Validation rules for a single claim field"""
+    name: str
+    type: str = "string"  # one of FIELD_TYPES
+    required: bool = False
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    pattern: Optional[str] = None
+    choices: Optional[List[str]] = None
+
+
+@dataclass
+class ClaimSchema:
+    """A set of field specs describing valid claim input"""
+    fields: List[FieldSpec]
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Dict[str, Any]]) -> "ClaimSchema":
+        """
+        Build a schema from a mapping of field name to rules, e.g.
+        ``{"claim_amount": {"type": "currency", "required": True, "min": 0}}``.
+        """
+        return cls(fields=[
+            FieldSpec(
+                name=name,
+                type=rules.get("type", "string"),
+                required=rules.get("required", False),
+                min_value=rules.get("min"),
+                max_value=rules.get("max"),
+                pattern=rules.get("pattern"),
+                choices=rules.get("choices")
+            )
+            for name, rules in spec.items()
+        ])
+
+
+@dataclass
+class FieldError:
+    """A single validation failure"""
+    field: str
+    code: str  # missing, invalid_format, below_min, above_max, invalid_choice
+    message: str
+
+
+@dataclass
+class BatchValidationResult:
+    """Validation outcome for a batch of claims"""
+    total: int
+    errors: Dict[int, List[FieldError]] = field(default_factory=dict)  # claim index -> errors
+
+    @property
+    def valid_count(self) -> int:
+        return self.total - len(self.errors)
+
+    def is_valid(self, index: int) -> bool:
+        return index not in self.errors
+
+    def error_counts(self) -> Dict[str, int]:
+        """Number of failures per field, across the batch."""
+        counts: Dict[str, int] = {}
+        for claim_errors in self.errors.values():
+            for error in claim_errors:
+                counts[error.field] = counts.get(error.field, 0) + 1
+        return counts
+
+
+def _parse_number(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError("bool is not a number")
+    number = float(value)
+    if not math.isfinite(number):  # NaN passes every min/max comparison
+        raise ValueError(value)
+    return number
+
+
+def _parse_currency(value: Any) -> float:
+    text = str(value).strip()
+    if not CURRENCY_PATTERN.match(text):
+        raise ValueError(text)
+    return float(text.lstrip("$").replace(",", ""))
+
+
+def _parse_date(value: Any) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value).strip())
+
+
+class _CompiledField:
+    """A FieldSpec reduced to a single check function."""
+
+    def __init__(self, spec: FieldSpec):
+        if spec.type not in FIELD_TYPES:
+            raise ValueError(f"Unknown field type for {spec.name}: {spec.type}")
+        self.name = spec.name
+        self.required = spec.required
+        self.check = self._compile(spec)
+
+    def _compile(self, spec: FieldSpec) -> Callable[[Any], Optional[FieldError]]:
+        name = spec.name
+
+        if spec.type in ("number", "currency"):
+            parse = _parse_currency if spec.type == "currency" else _parse_number
+            low, high = spec.min_value, spec.max_value
+
+            def check(value):
+                try:
+                    number = parse(value)
+                except (TypeError, ValueError):
+                    return FieldError(name, "invalid_format", f"Invalid {spec.type} format: {value}")
+                if low is not None and number < low:
+                    return FieldError(name, "below_min", f"Value {number} is below minimum {low}")
+                if high is not None and number > high:
+                    return FieldError(name, "above_max", f"Value {number} is above maximum {high}")
+                return None
+            return check
+
+        if spec.type == "date":
+            def check(value):
+                try:
+                    _parse_date(value)
+                except (TypeError, ValueError):
+                    return FieldError(name, "invalid_format", f"Invalid date: {value}")
+                return None
+            return check
+
+        if spec.type == "pattern":
+            match = re.compile(spec.pattern).fullmatch
+
+            def check(value):
+                if not match(str(value)):
+                    return FieldError(name, "invalid_format", f"Value does not match {spec.pattern}: {value}")
+                return None
+            return check
+
+        if spec.type == "choice":
+            choices = frozenset(spec.choices or ())
+
+            def check(value):
+                try:
+                    valid = value in choices
+                except TypeError:  # Unhashable, e.g. a list
+                    valid = False
+                if not valid:
+                    return FieldError(name, "invalid_choice", f"Invalid choice: {value}")
+                return None
+            return check
+
+        return lambda value: None
+
+
+class ClaimValidator:
+    def __init__(self, schema: ClaimSchema):
+        """Compile the schema once; the validator can then be reused for any number of claims."""
+        self.schema = schema
+        self._fields = [_CompiledField(spec) for spec in schema.fields]
+
+    def validate(self, claim: Dict[str, Any]) -> List[FieldError]:
+        """
+        Validate a single claim.
+
+        Returns:
+            List[FieldError]: Empty if the claim is valid
+        """
+        return self.validate_batch([claim]).errors.get(0, [])
+
+    def validate_batch(self, claims: Sequence[Dict[str, Any]]) -> BatchValidationResult:
+        """
+        Validate a batch of claims.
+
+        Fields are checked column by column, so each compiled check runs in a
+        tight loop over the batch.
+
+        Args:
+            claims: Claim dictionaries to validate
+
+        Returns:
+            BatchValidationResult: Per-claim errors for the invalid claims
+        """
+        result = BatchValidationResult(total=len(claims))
+        errors = result.errors
+        for compiled in self._fields:
+            name, check, required = compiled.name, compiled.check, compiled.required
+            for index, claim in enumerate(claims):
+                value = claim.get(name)
+                if value is None or value == "":
+                    if required and name not in claim:
+                        error = FieldError(name, "missing", f"Missing required field: {name}")
+                    elif required:
+                        error = FieldError(name, "invalid_format", f"Empty required field: {name}")
+                    else:
+                        continue
+                else:
+                    error = check(value)
+                if error is not None:
+                    errors.setdefault(index, []).append(error)
+        return result
+
+
+DEFAULT_CLAIM_SCHEMA = ClaimSchema.from_dict({
+    "policy_number": {"type": "string", "required": True},
+    "claim_amount": {"type": "currency", "required": True},
+    "incident_date": {"type": "date"},
+    "claim_type": {"type": "choice", "choices": ["auto", "home", "life"]}
+})
+
+default_validator = ClaimValidator(DEFAULT_CLAIM_SCHEMA)
@@ -0,0 +1,219 @@
+"""Rule/template-based form filling from structured claim input.
+
+Routine claims arrive as structured data (policy number, amount, date,
+type) that the model would only copy into the form.  ``FormValueMapper``
+maps such data onto the fillable fields of a form outline directly:
+
+* each field is matched to a claim key by its id/name (exact), a known
+  alias, or words of its label, with a score per match kind;
+* values are converted to what the field accepts (ISO dates, plain numbers,
+  one of the select options);
+* fields with no claim data can be produced from a per-claim-type template
+  over the claim data and the task description (e.g. the description); a
+  template whose inputs are missing leaves its field to the LLM.
+
+The mapping's confidence is the lowest score among the fields it fills, or
+0 if a required field is left empty.  Below ``min_confidence`` the agent
+falls back to the LLM; the mapper counts how often that happens.
+"""
+import re
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from claim_validation import CURRENCY_PATTERN
+
+# Score of each way a field can be matched to claim data
+EXACT_SCORE = 1.0
+ALIAS_SCORE = 0.9
+TEMPLATE_SCORE = 0.8
+LABEL_SCORE = 0.6
+
+# Normalized field name -> claim key
+DEFAULT_ALIASES = {
+    "policy": "policy_number",
+    "policy_no": "policy_number",
+    "policy_id": "policy_number",
+    "amount": "claim_amount",
+    "claim_total": "claim_amount",
+    "date": "incident_date",
+    "date_of_loss": "incident_date",
+    "loss_date": "incident_date",
+    "type": "claim_type",
+    "coverage": "claim_type",
+    "details": "description",
+    "claim_description": "description",
+}
+
+# Claim type -> field -> template over the claim data and {task_description} ("*" applies to every type)
+DEFAULT_TEMPLATES = {
+    "auto": {"description": "Auto claim for a vehicle incident on {incident_date}, amount {claim_amount}: "
+                            "{task_description}"},
+    "home": {"description": "Home claim for property damage on {incident_date}, amount {claim_amount}: "
+                          "{task_description}"},
+    "life": {"description": "Life claim under policy {policy_number}, amount {claim_amount}: {task_description}"},
+}
+
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%d.%m.%Y", "%B %d, %Y", "%b %d, %Y")
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(name: str) -> str:
+    """Lower-case a field or claim key, joining words with underscores."""
+    return _NON_WORD.sub("_", str(name).lower()).strip("_")
+
+
+def _to_date(value: Any) -> Optional[str]:
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    text = str(value).strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+
+def _to_number(value: Any) -> Optional[str]:
+    if isinstance(value, (int, float)):
+        return str(value) if isinstance(value, int) else f"{value:.2f}"
+    text = str(value).strip()
+    if not CURRENCY_PATTERN.match(text):
+        return None
+    return text.lstrip("$").replace(",", "")
+
+
+def _to_option(value: Any, options: List[str]) -> Optional[str]:
+    wanted = normalize(value)
+    for option in options:
+        if normalize(option) == wanted:
+            return option
+    return None
+
+
+@dataclass
+class FieldMapping:
+    """Values for one form, with how they were derived"""
+    values: Dict[str, str] = field(default_factory=dict)
+    scores: Dict[str, float] = field(default_factory=dict)
+    missing: List[str] = field(default_factory=list)  # required fields left empty
+
+    @property
+    def confidence(self) -> float:
+        if self.missing or not self.values:
+            return 0.0
+        return min(self.scores.values())
+
+
+class FormValueMapper:
+    def __init__(self, min_confidence: float = 0.75, aliases: Optional[Dict[str, str]] = None,
+                 templates: Optional[Dict[str, Dict[str, str]]] = None):
+        """
+        Initialize the mapper.
+
+        Args:
+            min_confidence: Mappings scoring below this fall back to the LLM
+            aliases: Normalized field name to claim key (default: DEFAULT_ALIASES)
+            templates: Claim type to field to format string (default: DEFAULT_TEMPLATES)
+        """
+        self.min_confidence = min_confidence
+        self.aliases = DEFAULT_ALIASES if aliases is None else aliases
+        self.templates = DEFAULT_TEMPLATES if templates is None else templates
+        self.mapped = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    @property
+    def fallback_rate(self) -> float:
+        """Fraction of claims that needed the LLM."""
+        total = self.mapped + self.fallbacks
+        return self.fallbacks / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mapped": self.mapped, "fallbacks": self.fallbacks, "fallback_rate": self.fallback_rate}
+
+    def record(self, used_fallback: bool):
+        """Count a claim as mapped locally or sent to the LLM."""
+        with self._lock:
+            if used_fallback:
+                self.fallbacks += 1
+            else:
+                self.mapped += 1
+
+    def _find_key(self, form_field: Dict[str, Any], claim: Dict[str, Any]) -> Optional[tuple]:
+        """Return (claim key, score) for the claim entry that best matches a form field."""
+        for name in (form_field.get("id"), form_field.get("name")):
+            if not name:
+                continue
+            key = normalize(name)
+            if key in claim:
+                return key, EXACT_SCORE
+            alias = self.aliases.get(key)
+            if alias in claim:
+                return alias, ALIAS_SCORE
+        label = normalize(form_field.get("label") or "")
+        if label:
+            if label in claim:
+                return label, ALIAS_SCORE
+            words = set(label.split("_"))
+            # Longest keys first, so "claim_amount" wins over "amount"
+            for key in sorted(claim, key=len, reverse=True):
+                if set(key.split("_")) <= words:
+                    return key, LABEL_SCORE
+        return None
+
+    def _convert(self, form_field: Dict[str, Any], value: Any) -> Optional[str]:
+        field_type = form_field.get("type")
+        if field_type == "date":
+            return _to_date(value)
+        if field_type == "number":
+            return _to_number(value)
+        if field_type in ("select-one", "radio") and form_field.get("options"):
+            return _to_option(value, form_field["options"])
+        text = str(value).strip()
+        return text or None
+
+    def _template(self, field_id: str, claim: Dict[str, Any]) -> Optional[str]:
+        claim_type = normalize(claim.get("claim_type", ""))
+        templates = dict(self.templates.get("*", {}), **self.templates.get(claim_type, {}))
+        template = templates.get(normalize(field_id))
+        if template is None:
+            return None
+        try:
+            return template.format(**claim)
+        except (KeyError, IndexError, ValueError):
+            return None
+
+    def map(self, claim_data: Dict[str, Any], outline: Dict[str, Any],
+            task_description: Optional[str] = None) -> FieldMapping:
+        """
+        Map claim data onto the fields of an outline.
+
+        Pass an outline already pruned to the fields the agent may fill.  ``task_description``
+        is available to templates; without it, fields templated from it are left missing.
+        """
+        claim = {normalize(k): v for k, v in claim_data.items() if v not in (None, "")}
+        template_data = dict(claim, task_description=task_description) if task_description else claim
+        mapping = FieldMapping()
+        for form_field in outline.get("fields", []):
+            field_id = form_field.get("id")
+            if not field_id:
+                continue
+            value, score = None, 0.0
+            match = self._find_key(form_field, claim)
+            if match:
+                value, score = self._convert(form_field, claim[match[0]]), match[1]
+            if value is None:
+                value, score = self._template(field_id, template_data), TEMPLATE_SCORE
+            if value is None:
+                if form_field.get("required"):
+                    mapping.missing.append(field_id)
+                continue
+            mapping.values[field_id] = value
+            mapping.scores[field_id] = score
+        return mapping
+
+    def is_confident(self, mapping: FieldMapping) -> bool:
+        return mapping.confidence >= self.min_confidence
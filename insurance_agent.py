@@ -1,33 +1,30 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.support.select import Select
-from typing import Union, Dict, Any
-import re
+# Selenium is imported inside the methods that use it, so importing this
+# module (e.g. for claim validation) does not pay for loading the browser stack.
+from typing import Union, Dict, Any, List
 import logging
+from agent_logging import get_logger
+from claim_validation import CURRENCY_PATTERN, ClaimValidator, BatchValidationResult, default_validator
+
+def chrome_driver():
+    """Start a local Chrome session (the default driver factory)."""
+    from selenium import webdriver
+    return webdriver.Chrome()
 
 class InsuranceClaimAgent:
     def __init__(self):
         """Initialize the Insurance Claim Agent with basic configuration."""
         self.driver = None
+        self.driver_factory = chrome_driver  # Returns a new WebDriver; replaced when recording or replaying
         self.logger = self._setup_logger()
         
     def _setup_logger(self) -> logging.Logger:
-        """Set up logging configuration."""
-        logger = logging.getLogger('InsuranceClaimAgent')
-        logger.setLevel(logging.INFO)
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        return logger
+        """Set up logging configuration (the non-blocking pipeline is shared by all agents)."""
+        return get_logger('InsuranceClaimAgent')
 
     def initialize_browser(self):
         """Initialize the web browser for UI interactions."""
         try:
-            self.driver = webdriver.Chrome()
+            self.driver = self.driver_factory()
             self.driver.implicitly_wait(10)
             self.logger.info("Browser initialized successfully")
         except Exception as e:
@@ -38,20 +35,25 @@ class InsuranceClaimAgent:
         """Close the browser session."""
         if self.driver:
             self.driver.quit()
+            self.driver = None
             self.logger.info("Browser session closed")
 
-    def click_element(self, selector: str, by: "By" = By.CSS_SELECTOR, timeout: int = 10) -> bool:
+    def click_element(self, selector: str, by: str = "css selector", timeout: int = 10) -> bool:
         """
         Click an element on the page.
         
         Args:
             selector: The selector to find the element
-            by: The method to locate the element (default: CSS_SELECTOR)
+            by: The method to locate the element (default: By.CSS_SELECTOR)
             timeout: Maximum time to wait for element
             
         Returns:
             bool: True if click was successful, False otherwise
         """
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import TimeoutException, NoSuchElementException
+
         try:
             # Use WebDriverWait to wait for the element to be clickable
             element = WebDriverWait(self.driver, timeout).until(
@@ -104,9 +106,7 @@ class InsuranceClaimAgent:
         Returns:
             bool: True if valid currency format, False otherwise
         """
-        # Regular expression for common currency formats (e.g., $1,234.56 or 1234.56)
-        currency_pattern = r'^\$?[0-9]{1,3}(?:,?[0-9]{3})*(?:\.[0-9]{2})?$'
-        is_valid = bool(re.match(currency_pattern, value.strip()))
+        is_valid = bool(CURRENCY_PATTERN.match(value.strip()))
         
         if not is_valid:
             self.logger.warning(f"Invalid currency format: {value}")
@@ -124,6 +124,9 @@ class InsuranceClaimAgent:
         Returns:
             bool: True if successful, False otherwise
         """
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.select import Select
+
         try:
             element = self.driver.find_element(By.CSS_SELECTOR, f"#{field_id}")
             
@@ -147,7 +150,8 @@ class InsuranceClaimAgent:
                 element.clear()
                 element.send_keys(value)
                 
-            self.logger.info(f"Successfully filled field #{field_id} with value {value}")
+            # Never log the value itself: fields may hold card numbers or other PII
+            self.logger.info(f"Successfully filled field #{field_id} ({len(value)} chars)")
             return True
             
         except Exception as e:
@@ -183,3 +187,20 @@ class InsuranceClaimAgent:
         except Exception as e:
             self.logger.error(f"Error processing claim input: {str(e)}")
             return False
+
+    def process_claim_inputs(self, claims: List[Dict[str, Any]],
+                             validator: ClaimValidator = None) -> BatchValidationResult:
+        """
+        Validate a batch of claim inputs in one pass.
+        
+        Args:
+            claims: Claim dictionaries to validate
+            validator: Compiled validator to use (default: the standard claim schema)
+            
+        Returns:
+            BatchValidationResult: Structured per-field errors for invalid claims
+        """
+        result = (validator or default_validator).validate_batch(claims)
+        self.logger.info(f"Validated {result.total} claims: {result.valid_count} valid, "
+                         f"errors by field: {result.error_counts()}")
+        return result
@@ -0,0 +1,136 @@
+"""Compact, memoized extraction of page content for the AI agent.
+
+Instead of serializing ``body.text`` (which makes the browser lay out and
+ship the text of the whole page), the agent asks for an outline of the form
+region: field ids, types, labels and select options, computed by a single
+script in the page.  Results are memoized per navigation: the script is
+given the key of the cached result and answers ``unchanged`` when the
+document is the same, so a repeated request costs one tiny round trip.
+Payloads are capped so huge portal pages cannot blow up prompts.
+"""
+from typing import Any, Dict, Optional
+
+_OUTLINE_SCRIPT = """
+var known = arguments[0], maxFields = arguments[1], maxOptions = arguments[2];
+var key = location.href + '|' + performance.timeOrigin;
+if (known === key) { return {key: key, unchanged: true}; }
+function clip(s, n) {
+    s = (s || '').replace(/\\s+/g, ' ').trim();
+    return s.length > n ? s.slice(0, n) : s;
+}
+function labelFor(el) {
+    if (el.id) {
+        var l = document.querySelector('label[for="' + CSS.escape(el.id) + '"]');
+        if (l) { return clip(l.textContent, 120); }
+    }
+    var wrapping = el.closest('label');
+    if (wrapping) { return clip(wrapping.textContent, 120); }
+    return clip(el.getAttribute('aria-label') || el.placeholder || '', 120);
+}
+var skip = {hidden: 1, submit: 1, button: 1, reset: 1, image: 1};
+var els = document.querySelectorAll('input, select, textarea');
+var fields = [], i;
+for (i = 0; i < els.length && fields.length < maxFields; i++) {
+    var el = els[i], type = (el.type || el.tagName).toLowerCase();
+    if (skip[type]) { continue; }
+    var field = {id: el.id || null, name: el.name || null, type: type,
+                 label: labelFor(el), required: !!el.required};
+    if (el.placeholder) { field.placeholder = clip(el.placeholder, 80); }
+    if (el.tagName === 'SELECT') {
+        field.options = [];
+        for (var j = 0; j < el.options.length && field.options.length < maxOptions; j++) {
+            if (el.options[j].value) { field.options.push(el.options[j].value); }
+        }
+    }
+    fields.push(field);
+}
+var headings = [];
+var hs = document.querySelectorAll('h1, h2, legend');
+for (var k = 0; k < hs.length && headings.length < 10; k++) { headings.push(clip(hs[k].textContent, 120)); }
+return {key: key, title: clip(document.title, 200), headings: headings,
+        fields: fields, truncated: i < els.length};
+"""
+
+_TEXT_SCRIPT = """
+var known = arguments[0], maxChars = arguments[1];
+var key = location.href + '|' + performance.timeOrigin;
+if (known === key) { return {key: key, unchanged: true}; }
+var text = document.body ? document.body.innerText : '';
+return {key: key, text: text.slice(0, maxChars).trim(), truncated: text.length > maxChars};
+"""
+
+
+class PageContentExtractor:
+    def __init__(self, max_chars: int = 8000, max_fields: int = 200, max_options: int = 25):
+        """
+        Initialize the extractor.
+
+        Args:
+            max_chars: Maximum characters of page text or rendered outline
+            max_fields: Maximum number of form fields in an outline
+            max_options: Maximum number of options listed per select field
+        """
+        self.max_chars = max_chars
+        self.max_fields = max_fields
+        self.max_options = max_options
+        self._outline: Optional[Dict[str, Any]] = None
+        self._text: Optional[Dict[str, Any]] = None
+
+    def _fetch(self, driver, cached: Optional[Dict[str, Any]], script: str, *args) -> Optional[Dict[str, Any]]:
+        """Run an extraction script, or return None if it gave no result (e.g. the page is still loading)."""
+        known = cached["key"] if cached else None
+        result = driver.execute_script(script, known, *args)
+        if not isinstance(result, dict):
+            return None
+        if result.get("unchanged") and cached is not None:
+            return cached
+        return result
+
+    def outline(self, driver) -> Dict[str, Any]:
+        """
+        Return the form outline of the current page.
+
+        Returns:
+            Dict[str, Any]: ``title``, ``headings`` and ``fields`` (id, name, type, label,
+            required, placeholder, options), plus ``truncated`` if fields were capped
+        """
+        self._outline = self._fetch(driver, self._outline, _OUTLINE_SCRIPT, self.max_fields, self.max_options)
+        if self._outline is None:
+            return {"title": "", "headings": [], "fields": []}  # Not memoized; form_content falls back to text
+        return self._outline
+
+    def text(self, driver) -> str:
+        """Return the visible text of the current page, capped at ``max_chars``."""
+        self._text = self._fetch(driver, self._text, _TEXT_SCRIPT, self.max_chars)
+        if self._text is None:
+            # Uncached full-page path
+            return driver.find_element("tag name", "body").text[:self.max_chars]
+        return self._text["text"]
+
+    def render(self, outline: Dict[str, Any]) -> str:
+        """Render an outline as compact text for a prompt, capped at ``max_chars``."""
+        lines = [f"Page: {outline.get('title', '')}"]
+        if outline.get("headings"):
+            lines.append("Headings: " + " | ".join(outline["headings"]))
+        lines.append("Fields:")
+        for field in outline.get("fields", []):
+            attrs = field["type"] + (", required" if field.get("required") else "")
+            line = f"- {field.get('id') or field.get('name')} ({attrs}): {field.get('label', '')}"
+            if field.get("options"):
+                line += f" [{', '.join(field['options'])}]"
+            lines.append(line)
+        if outline.get("truncated"):
+            lines.append("(more fields omitted)")
+        return "\n".join(lines)[:self.max_chars]
+
+    def form_content(self, driver) -> str:
+        """Rendered form outline, or capped page text if the page has no form fields."""
+        outline = self.outline(driver)
+        if outline.get("fields"):
+            return self.render(outline)
+        return self.text(driver)
+
+    def reset(self):
+        """Drop memoized content (e.g. between claims)."""
+        self._outline = None
+        self._text = None
@@ -0,0 +1,182 @@
+"""Precompiled lookup structures for fast policy evaluation.
+
+``CompiledPolicy`` indexes statements by action (preserving policy order, so
+deny precedence is unchanged) and pre-splits resource patterns, so a check
+only visits the statements that can possibly apply.  ``DecisionCache`` is a
+small LRU of decisions keyed on the action, resource and the values of the
+context keys that the policy's conditions actually read.  Keys read only by
+date comparisons (e.g. the current ``time``) contribute each comparison's
+outcome instead of their ever-changing raw value.
+
+A ``PolicySnapshot`` bundles a compiled policy with its cache.  Snapshots
+are never modified after construction, so any number of threads can
+evaluate against one without locking; the enforcer replaces its snapshot
+with a single attribute assignment when the policy changes.
+"""
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from types import MappingProxyType
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Mapping, Optional, Sequence, Tuple
+
+from .policy_types import Action, Condition, Effect, Policy, Statement
+
+
+class _Missing:
+    def __repr__(self):
+        return "<missing>"
+
+
+MISSING = _Missing()
+
+DATE_CONDITIONS = {"DateGreaterThan": lambda a, b: a > b, "DateLessThan": lambda a, b: a < b}
+
+_DATE_ERROR = object()
+
+
+def _date_outcome(condition: Condition, value: Any) -> Any:
+    """A date condition's result for a context value, or the value itself (marked) if it cannot be compared."""
+    try:
+        return DATE_CONDITIONS[condition.type](datetime.fromisoformat(value), datetime.fromisoformat(condition.value))
+    except (TypeError, ValueError):
+        return _DATE_ERROR, value
+
+
+def compile_pattern(pattern: str) -> Tuple[str, ...]:
+    """Split a resource pattern into the literal parts that must all appear in the resource."""
+    return tuple(part for part in pattern.split("*") if part)
+
+
+@dataclass(frozen=True)
+class CompiledStatement:
+    """A statement with its resource patterns pre-split"""
+    sid: str
+    effect: Effect
+    actions: frozenset
+    resource_parts: Tuple[Tuple[str, ...], ...]
+    conditions: Optional[Tuple[Condition, ...]]
+
+    @classmethod
+    def from_statement(cls, statement: Statement) -> "CompiledStatement":
+        return cls(
+            sid=statement.sid,
+            effect=statement.effect,
+            actions=frozenset(statement.actions),
+            resource_parts=tuple(compile_pattern(r) for r in statement.resources),
+            conditions=tuple(statement.conditions) if statement.conditions else None
+        )
+
+    def matches_resource(self, resource: str) -> bool:
+        for parts in self.resource_parts:
+            for part in parts:
+                if part not in resource:
+                    break
+            else:
+                return True
+        return False
+
+
+class CompiledPolicy:
+    """Per-action index of compiled statements for one Policy"""
+
+    def __init__(self, policy: Policy, statements: Optional[Sequence[CompiledStatement]] = None):
+        """
+        Args:
+            policy: The policy to index
+            statements: Already compiled ``policy.statements`` (e.g. fragments shared between
+                policies by a PolicyStore); compiled here if not given
+        """
+        self.policy = policy
+        if statements is None:
+            statements = [CompiledStatement.from_statement(s) for s in policy.statements]
+        self.statements: Tuple[CompiledStatement, ...] = tuple(statements)
+        by_action: Dict[Action, List[CompiledStatement]] = {}
+        for statement in self.statements:
+            for action in Action:
+                if action in statement.actions:
+                    by_action.setdefault(action, []).append(statement)
+        self.by_action: Mapping[Action, Tuple[CompiledStatement, ...]] = MappingProxyType({
+            action: tuple(statements) for action, statements in by_action.items()
+        })
+        conditions_by_key: Dict[str, List[Condition]] = {}
+        for statement in self.statements:
+            for condition in statement.conditions or ():
+                conditions_by_key.setdefault(condition.key, []).append(condition)
+        self.condition_keys: Tuple[str, ...] = tuple(sorted(conditions_by_key))
+        # Keys read only by date comparisons: the decision depends on the outcomes, not the value
+        self.date_conditions: Mapping[str, Tuple[Condition, ...]] = MappingProxyType({
+            key: tuple(conditions)
+            for key, conditions in conditions_by_key.items()
+            if all(c.type in DATE_CONDITIONS for c in conditions)
+        })
+
+    def statements_for(self, action: Action) -> Tuple[CompiledStatement, ...]:
+        return self.by_action.get(action, ())
+
+    def cache_key(self, action: Action, resource: str, context: Dict[str, Any]) -> Optional[Hashable]:
+        """Key identifying every input the decision depends on, or None if not hashable."""
+        values = []
+        for k in self.condition_keys:
+            value = context.get(k, MISSING)
+            date_conditions = self.date_conditions.get(k)
+            if date_conditions and value is not MISSING:
+                value = tuple(_date_outcome(c, value) for c in date_conditions)
+            values.append(value)
+        key = (action, resource, tuple(values))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+
+class DecisionCache:
+    """Thread-safe LRU cache of (decision, matched sids) results"""
+
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[bool, Tuple[str, ...]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[bool, Tuple[str, ...]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: Hashable, value: Tuple[bool, Tuple[str, ...]]):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+@dataclass(frozen=True)
+class PolicySnapshot:
+    """A compiled policy and the cache of decisions made under it.
+
+    A check reads the enforcer's snapshot once, so it finishes against one
+    policy even if the policy is replaced meanwhile, and can only populate
+    that policy's cache.
+    """
+    compiled: CompiledPolicy
+    cache: Optional[DecisionCache] = None
+
+    @property
+    def policy(self) -> Policy:
+        return self.compiled.policy
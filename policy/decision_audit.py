@@ -0,0 +1,177 @@
+"""Structured, buffered audit trail of policy decisions.
+
+``DecisionAuditLog.record`` is called on the ``check_permission`` hot path and
+only appends a tuple to an in-memory ring buffer (a bounded ``deque``, whose
+``append``/``popleft`` are atomic, so producers never take a lock).  A
+background thread drains the buffer in batches, serializes the records and
+writes them to size-rotated JSONL files, optionally gzip-compressed.
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+def context_hash(context: Optional[Dict[str, Any]]) -> str:
+    """Stable short hash of a decision context."""
+    payload = json.dumps(context or {}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class _RotatingJsonlWriter:
+    """Append JSON lines to a file, rotating it once it exceeds ``max_bytes``."""
+
+    def __init__(self, path: str, max_bytes: int, backup_count: int, compress: bool):
+        self.path = path + ".gz" if compress and not path.endswith(".gz") else path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.compress = compress
+        self._file = None
+        self._size = 0
+
+    def _open(self):
+        if self.compress:
+            self._file = gzip.open(self.path, 'ab')
+            # Rotation is based on uncompressed bytes written to this file
+            self._size = 0
+        else:
+            self._file = open(self.path, 'ab')
+            self._size = self._file.tell()
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                src, dst = f"{self.path}.{i}", f"{self.path}.{i + 1}"
+                if os.path.exists(src):
+                    os.replace(src, dst)
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def write(self, lines: List[str]):
+        if self._file is None:
+            self._open()
+        data = "".join(lines).encode()
+        if self._size and self._size + len(data) > self.max_bytes:
+            self._rotate()
+            self._open()
+        self._file.write(data)
+        self._file.flush()
+        self._size += len(data)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class DecisionAuditLog:
+    def __init__(self, path: str, capacity: int = 65536, batch_size: int = 1024,
+                 flush_interval: float = 1.0, max_bytes: int = 64 * 1024 * 1024,
+                 backup_count: int = 5, compress: bool = False):
+        """
+        Initialize the audit log and start its background writer.
+
+        Args:
+            path: JSONL file to write (``.gz`` is appended when compressing)
+            capacity: Ring buffer size; the oldest records are dropped when full
+            batch_size: Records per write, and the backlog that wakes the writer early
+            flush_interval: Maximum seconds a record waits in the buffer
+            max_bytes: Rotate the file once it grows past this many (uncompressed) bytes
+            backup_count: Number of rotated files to keep
+            compress: Write gzip-compressed JSONL
+        """
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=capacity)
+        self._writer = _RotatingJsonlWriter(path, max_bytes, backup_count, compress)
+        self._wakeup = threading.Event()
+        self._write_lock = threading.Lock()
+        self._closed = False
+
+        # Counters are updated without locks and are approximate under contention
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+
+        self._thread = threading.Thread(target=self._run, name="DecisionAuditLog", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def path(self) -> str:
+        return self._writer.path
+
+    def record(self, action: Any, resource: str, effect: str, matched_sids: Sequence[str],
+               latency_ns: int, context: Optional[Dict[str, Any]]):
+        """Buffer one decision. Called on the hot path, so it does no I/O or serialization."""
+        buffered = len(self._buffer)
+        if buffered >= self.capacity:
+            self.dropped += 1
+        self._buffer.append((time.time(), action, resource, effect, tuple(matched_sids),
+                             latency_ns, dict(context) if context else None))
+        self.recorded += 1
+        if buffered + 1 == self.batch_size:
+            self._wakeup.set()
+
+    def _format(self, entry) -> str:
+        ts, action, resource, effect, sids, latency_ns, context = entry
+        return json.dumps({
+            "ts": datetime.fromtimestamp(ts, timezone.utc).isoformat(),
+            "action": getattr(action, "value", action),
+            "resource": resource,
+            "effect": effect,
+            "matched_sids": list(sids),
+            "latency_us": round(latency_ns / 1000, 3),
+            "context_hash": context_hash(context)
+        }) + "\n"
+
+    def flush(self):
+        """Write everything currently buffered."""
+        with self._write_lock:
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._format(self._buffer.popleft()))
+                    except Exception as e:  # e.g. a context with keys json cannot sort
+                        self.dropped += 1
+                        logger.error(f"Failed to serialize audit record: {e}")
+                try:
+                    self._writer.write(batch)
+                    self.written += len(batch)
+                except OSError as e:
+                    logger.error(f"Failed to write {len(batch)} audit records: {e}")
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                # Keep the writer alive: a dead thread would silently drop every later decision
+                logger.error(f"Audit log flush failed: {e}")
+
+    def close(self):
+        """Stop the background writer after flushing remaining records."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        with self._write_lock:
+            self._writer.close()
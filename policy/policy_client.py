@@ -0,0 +1,240 @@
+"""Thin client for the local policy decision service (see ``policy_server``).
+
+``PolicyClient.check_permission`` has the same signature as
+``PolicyEnforcer.check_permission``, so an agent can be pointed at the
+sidecar instead of an in-process enforcer.  Concurrent calls are coalesced:
+checks issued by different threads within the same short window are sent
+as one batch over a pooled, persistent connection.  Each check is
+serialized on its caller's thread, so a context that is not JSON
+serializable fails only that call, not the batch it would have joined.
+"""
+import http.client
+import itertools
+import json
+import queue
+import socket
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from .policy_types import Action
+
+
+class PolicyServerError(RuntimeError):
+    """Raised when the server could not evaluate a check"""
+
+
+def _request_body(checks: List[str], request_id: Optional[int] = None) -> str:
+    """Request JSON from checks already serialized by their callers."""
+    head = "" if request_id is None else f'"id": {request_id}, '
+    return "{" + head + '"checks": [' + ", ".join(checks) + "]}"
+
+
+class _UnixConnection:
+    def __init__(self, path: str, timeout: float):
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(path)
+        self._reader = self._sock.makefile("rb")
+        self._ids = itertools.count()
+
+    def request(self, batches: List[List[str]]) -> List[List[Dict[str, Any]]]:
+        """Pipeline several batches: write them all, then read the replies in order."""
+        ids = [next(self._ids) for _ in batches]
+        payload = b"".join(_request_body(checks, i).encode() + b"\n" for i, checks in zip(ids, batches))
+        self._sock.sendall(payload)
+        replies = []
+        for expected in ids:
+            line = self._reader.readline()
+            if not line:
+                raise ConnectionError("Policy server closed the connection")
+            reply = json.loads(line)
+            if "error" in reply or reply.get("id") != expected:
+                raise PolicyServerError(reply.get("error", "Out-of-order reply"))
+            replies.append(reply["results"])
+        return replies
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+
+class _HttpConnection:
+    def __init__(self, host: str, port: int, timeout: float):
+        self._conn = http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def request(self, batches: List[List[str]]) -> List[List[Dict[str, Any]]]:
+        replies = []
+        for checks in batches:
+            self._conn.request("POST", "/v1/check", body=_request_body(checks),
+                               headers={"Content-Type": "application/json"})
+            response = self._conn.getresponse()
+            body = json.loads(response.read())
+            if response.status != 200:
+                raise PolicyServerError(body.get("error", f"HTTP {response.status}"))
+            replies.append(body["results"])
+        return replies
+
+    def close(self):
+        self._conn.close()
+
+
+class PolicyClient:
+    def __init__(self, address: str, pool_size: int = 4, batch_window: float = 0.0005,
+                 max_batch: int = 256, timeout: float = 5.0):
+        """
+        Connect to a policy server.
+
+        Args:
+            address: ``unix:///path/to.sock`` or ``http://127.0.0.1:8181``
+            pool_size: Maximum number of open connections (and batches in flight)
+            batch_window: Seconds to wait for more concurrent checks before sending a batch
+            max_batch: Maximum checks per batch
+            timeout: Socket timeout, and how long check_permission waits for a decision, in seconds
+        """
+        parsed = urlparse(address)
+        if parsed.scheme == "unix":
+            self._connect = lambda: _UnixConnection(parsed.path, timeout)
+        elif parsed.scheme == "http":
+            self._connect = lambda: _HttpConnection(parsed.hostname, parsed.port or 80, timeout)
+        else:
+            raise ValueError(f"Unsupported policy server address: {address}")
+        self.address = address
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._pool: "queue.LifoQueue" = queue.LifoQueue()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="PolicyClient")
+        self._pending: "queue.SimpleQueue[Tuple[str, Future]]" = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._batcher = threading.Thread(target=self._run_batcher, name="PolicyClientBatcher", daemon=True)
+        self._batcher.start()
+
+    def _send(self, batches: List[List[str]]) -> List[List[Dict[str, Any]]]:
+        """Send batches over a pooled connection, reconnecting once on a stale connection."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        try:
+            replies = conn.request(batches)
+        except (ConnectionError, http.client.HTTPException, OSError):
+            conn.close()
+            conn = self._connect()
+            try:
+                replies = conn.request(batches)
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            conn.close()
+            raise
+        self._pool.put(conn)
+        return replies
+
+    @staticmethod
+    def _encode(action: Action, resource: str, context: Dict[str, Any]) -> str:
+        """Serialize one check; raises TypeError if the context is not JSON serializable."""
+        return json.dumps({"action": getattr(action, "value", action), "resource": resource,
+                           "context": context or {}})
+
+    @staticmethod
+    def _decode(result: Dict[str, Any]) -> bool:
+        if "error" in result:
+            raise PolicyServerError(result["error"])
+        return result["allowed"]
+
+    def check_many(self, checks: Sequence[Tuple[Action, str, Dict[str, Any]]]) -> List[bool]:
+        """
+        Evaluate many checks in one round trip (pipelined in chunks of ``max_batch``).
+
+        Returns:
+            List[bool]: One decision per check, in order
+        """
+        encoded = [self._encode(*check) for check in checks]
+        chunks = [encoded[i:i + self.max_batch] for i in range(0, len(encoded), self.max_batch)]
+        results = [r for chunk in self._send(chunks) for r in chunk]
+        return [self._decode(r) for r in results]
+
+    def check_permission(self, action: Action, resource: str, context: Dict[str, Any]) -> bool:
+        """
+        Check if the requested action is allowed (same contract as PolicyEnforcer.check_permission).
+
+        Calls from concurrent threads are batched together.
+
+        Raises:
+            TypeError: If the context is not JSON serializable
+            TimeoutError: If no decision arrives within the client's timeout
+        """
+        check = self._encode(action, resource, context)
+        future: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("PolicyClient is closed")
+            self._pending.put((check, future))
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise TimeoutError(f"No policy decision within {self.timeout}s") from None
+        return self._decode(result)
+
+    def _run_batcher(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            batch = [item]
+            wait = self.batch_window
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._pending.get(timeout=wait) if wait else self._pending.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                batch.append(item)
+                wait = 0  # Only wait once; then drain what is already queued
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch: List[Tuple[str, Future]]):
+        try:
+            results = self._send([[check for check, _ in batch]])[0]
+            if len(results) != len(batch):
+                raise PolicyServerError(f"Expected {len(batch)} results, got {len(results)}")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def close(self):
+        """Stop batching, fail checks that were not sent, and close pooled connections."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending.put(None)
+        self._batcher.join()
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("PolicyClient is closed"))
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
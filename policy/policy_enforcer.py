@@ -1,44 +1,104 @@
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import json
+import time
 from .policy_types import Policy, Statement, Effect, Action, Condition
+from .compiled_policy import CompiledPolicy, DecisionCache, PolicySnapshot
+from .policy_profiler import ConditionTrace, DecisionTrace, PolicyProfiler, StatementTrace, context_value
+
+def load_policy(policy_file: str) -> Policy:
+    """Load and parse policy from a JSON file"""
+    with open(policy_file, 'r') as f:
+        policy_data = json.load(f)
+        
+    statements = []
+    for stmt_data in policy_data['statements']:
+        conditions = []
+        if 'conditions' in stmt_data:
+            for cond in stmt_data['conditions']:
+                conditions.append(Condition(
+                    type=cond['type'],
+                    key=cond['key'],
+                    value=cond['value']
+                ))
+        
+        statements.append(Statement(
+            sid=stmt_data['sid'],
+            effect=Effect(stmt_data['effect']),
+            actions=[Action(a) for a in stmt_data['actions']],
+            resources=stmt_data['resources'],
+            conditions=conditions if conditions else None
+        ))
+        
+    return Policy(
+        version=policy_data['version'],
+        statements=statements
+    )
 
 class PolicyEnforcer:
-    def __init__(self, policy_file: str = None):
-        """Initialize the policy enforcer with a policy file"""
+    def __init__(self, policy_file: str = None, audit_log=None, cache_size: int = 0, profile: bool = False):
+        """
+        Initialize the policy enforcer with a policy file
+
+        Args:
+            policy_file: Path to a policy JSON file, or a Policy object
+            audit_log: Optional DecisionAuditLog that receives every decision
+            cache_size: Number of decisions to keep in an LRU cache (0 disables caching)
+            profile: Aggregate per-statement counters in ``self.profiler`` (cached decisions
+                are not re-evaluated, so they are not counted)
+        """
+        self.cache_size = cache_size
+        self.profiler = PolicyProfiler() if profile else None
+        self._snapshot: Optional[PolicySnapshot] = None
         if isinstance(policy_file, str):
             self.policy = self._load_policy(policy_file)
         else:
             self.policy = policy_file  # Allow passing Policy object directly
+        self.audit_log = audit_log
+
+    @classmethod
+    def from_compiled(cls, compiled: CompiledPolicy, audit_log=None, cache_size: int = 0,
+                      profile: bool = False) -> "PolicyEnforcer":
+        """Create an enforcer for an already compiled policy, e.g. a tenant's policy in a PolicyStore"""
+        enforcer = cls(None, audit_log=audit_log, cache_size=cache_size, profile=profile)
+        enforcer._publish(compiled)
+        return enforcer
+
+    @property
+    def snapshot(self) -> Optional[PolicySnapshot]:
+        """The immutable compiled policy and decision cache that checks currently use"""
+        return self._snapshot
+
+    @property
+    def policy(self) -> Policy:
+        return self._snapshot.policy if self._snapshot is not None else None
+
+    @policy.setter
+    def policy(self, policy: Policy):
+        """
+        Replace the policy with a freshly compiled snapshot and an empty decision cache.
+
+        Safe while other threads are checking: checks already running finish against the
+        old snapshot, and checks starting after the assignment see the new one.
+        """
+        self._publish(CompiledPolicy(policy) if policy is not None else None)
+
+    @property
+    def cache(self) -> Optional[DecisionCache]:
+        return self._snapshot.cache if self._snapshot is not None else None
+
+    def _publish(self, compiled: Optional[CompiledPolicy]):
+        if self.profiler is not None:
+            self.profiler.reset([s.sid for s in compiled.statements] if compiled is not None else ())
+        if compiled is None:
+            self._snapshot = None
+            return
+        cache = DecisionCache(self.cache_size) if self.cache_size > 0 else None
+        self._snapshot = PolicySnapshot(compiled, cache)
         
     def _load_policy(self, policy_file: str) -> Policy:
         """Load and parse policy from a JSON file"""
-        with open(policy_file, 'r') as f:
-            policy_data = json.load(f)
-            
-        statements = []
-        for stmt_data in policy_data['statements']:
-            conditions = []
-            if 'conditions' in stmt_data:
-                for cond in stmt_data['conditions']:
-                    conditions.append(Condition(
-                        type=cond['type'],
-                        key=cond['key'],
-                        value=cond['value']
-                    ))
-            
-            statements.append(Statement(
-                sid=stmt_data['sid'],
-                effect=Effect(stmt_data['effect']),
-                actions=[Action(a) for a in stmt_data['actions']],
-                resources=stmt_data['resources'],
-                conditions=conditions if conditions else None
-            ))
-            
-        return Policy(
-            version=policy_data['version'],
-            statements=statements
-        )
+        return load_policy(policy_file)
     
     def evaluate_conditions(self, conditions: List[Condition], context: Dict[str, Any]) -> bool:
         """Evaluate conditions against the current context"""
@@ -70,26 +130,114 @@ class PolicyEnforcer:
         Returns:
             bool: True if action is allowed, False otherwise
         """
+        if self.audit_log is None:
+            return self._evaluate(action, resource, context)[0]
+
+        start = time.perf_counter_ns()
+        try:
+            decision, matched_sids = self._evaluate(action, resource, context)
+        except Exception:
+            self.audit_log.record(action, resource, "Error", (), time.perf_counter_ns() - start, context)
+            raise
+        effect = Effect.ALLOW.value if decision else Effect.DENY.value
+        self.audit_log.record(action, resource, effect, matched_sids, time.perf_counter_ns() - start, context)
+        return decision
+
+    def _evaluate(self, action: Action, resource: str, context: Dict[str, Any]) -> Tuple[bool, Tuple[str, ...]]:
+        """Evaluate statements (using the decision cache if enabled), returning the decision and applied sids"""
+        snapshot = self._snapshot  # Read once: the whole check uses one policy
+        compiled, cache = snapshot.compiled, snapshot.cache
+        if cache is None:
+            return self._evaluate_statements(compiled, action, resource, context)
+
+        key = compiled.cache_key(action, resource, context)
+        if key is None:
+            return self._evaluate_statements(compiled, action, resource, context)
+        result = cache.get(key)
+        if result is None:
+            result = self._evaluate_statements(compiled, action, resource, context)
+            cache.put(key, result)
+        return result
+
+    def explain(self, action: Action, resource: str, context: Dict[str, Any]) -> DecisionTrace:
+        """
+        Evaluate a check (bypassing the decision cache) and return the full trace: each statement
+        visited, whether its resource matched, each condition with the context value it saw,
+        and the time spent. Condition errors are reported in the trace instead of raised.
+        """
+        return self._trace(self._snapshot.compiled, action, resource, context)[0]
+
+    def _trace(self, compiled: CompiledPolicy, action: Action, resource: str,
+               context: Dict[str, Any]) -> Tuple[DecisionTrace, Optional[Exception]]:
+        """Evaluate statements like _evaluate_statements, recording every step"""
+        start = time.perf_counter_ns()
+        candidates = compiled.statements_for(action)
+        decision, matched_sids, traces, not_evaluated, error = False, [], [], [], None
+        for index, statement in enumerate(candidates):
+            statement_start = time.perf_counter_ns()
+            trace = StatementTrace(statement.sid, statement.effect.value, statement.matches_resource(resource))
+            if trace.resource_matched:
+                for condition in statement.conditions or ():
+                    condition_trace = ConditionTrace(condition.type, condition.key, condition.value,
+                                                     context_value(context, condition.key), passed=False)
+                    try:
+                        condition_trace.passed = self.evaluate_conditions([condition], context)
+                    except Exception as e:
+                        condition_trace.error = f"{type(e).__name__}: {e}"
+                        error = e
+                    trace.conditions.append(condition_trace)
+                    if not condition_trace.passed:
+                        break
+                trace.applied = trace.failed_condition is None
+            trace.elapsed_ns = time.perf_counter_ns() - statement_start
+            traces.append(trace)
+
+            if error is not None:
+                decision = None
+            elif trace.applied:
+                matched_sids.append(statement.sid)
+                decision = statement.effect == Effect.ALLOW
+            if error is not None or (trace.applied and statement.effect == Effect.DENY):
+                not_evaluated = [s.sid for s in candidates[index + 1:]]
+                break
+
+        result = DecisionTrace(action.value, resource, decision, matched_sids, traces, not_evaluated,
+                               time.perf_counter_ns() - start,
+                               error=traces[-1].failed_condition.error if error is not None else None)
+        return result, error
+
+    def _evaluate_statements(self, compiled: CompiledPolicy, action: Action, resource: str,
+                             context: Dict[str, Any]) -> Tuple[bool, Tuple[str, ...]]:
+        """Evaluate statements in order, returning the decision and the sids that applied"""
+        if self.profiler is not None:
+            trace, error = self._trace(compiled, action, resource, context)
+            self.profiler.record(trace)
+            if error is not None:
+                raise error
+            return trace.decision, tuple(trace.matched_sids)
+
         # Default to deny if no matching statements
         final_decision = False
+        matched_sids = []
         
-        for statement in self.policy.statements:
-            # Check if action and resource match
-            if (action in statement.actions and 
-                any(self._match_resource(resource, r) for r in statement.resources)):
+        # Only statements listing this action are visited, in policy order
+        for statement in compiled.statements_for(action):
+            # Check if resource matches
+            if statement.matches_resource(resource):
                 
                 # Evaluate conditions
                 if statement.conditions:
                     if not self.evaluate_conditions(statement.conditions, context):
                         continue
                 
+                matched_sids.append(statement.sid)
                 # Apply effect
                 if statement.effect == Effect.ALLOW:
                     final_decision = True
                 else:  # DENY
-                    return False  # Explicit deny takes precedence
+                    return False, tuple(matched_sids)  # Explicit deny takes precedence
         
-        return final_decision
+        return final_decision, tuple(matched_sids)
     
     def _match_resource(self, resource: str, pattern: str) -> bool:
         """Check if resource matches the pattern (supports wildcards)"""
@@ -0,0 +1,170 @@
+"""Decision traces and per-statement evaluation profiling.
+
+``PolicyEnforcer.explain()`` returns a ``DecisionTrace``: every statement
+visited for the action, whether its resource matched, each condition with
+the context value it saw and whether it passed, and the time spent.
+
+With profiling enabled (``PolicyEnforcer(profile=True)``) every evaluated
+check also feeds a ``PolicyProfiler``, which aggregates per-sid counters.
+Export them to find hot statements worth moving earlier or narrowing, and
+dead statements (never matched) worth pruning.
+"""
+import csv
+import json
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional
+
+from .compiled_policy import MISSING
+
+
+@dataclass
+class ConditionTrace:
+    """One condition check within a statement"""
+    type: str
+    key: str
+    expected: Any
+    actual: Any
+    passed: bool
+    error: Optional[str] = None
+
+
+@dataclass
+class StatementTrace:
+    """How one statement was evaluated"""
+    sid: str
+    effect: str
+    resource_matched: bool
+    conditions: List[ConditionTrace] = field(default_factory=list)
+    applied: bool = False
+    elapsed_ns: int = 0
+
+    @property
+    def failed_condition(self) -> Optional[ConditionTrace]:
+        for condition in self.conditions:
+            if not condition.passed:
+                return condition
+        return None
+
+
+@dataclass
+class DecisionTrace:
+    """Full evaluation of one check, in policy order"""
+    action: str
+    resource: str
+    decision: Optional[bool]  # None if a condition raised
+    matched_sids: List[str]
+    statements: List[StatementTrace]
+    not_evaluated: List[str]  # statements for the action skipped after an explicit deny
+    elapsed_ns: int = 0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def summary(self) -> str:
+        """One line per statement, e.g. for logging an unexpected deny."""
+        if self.error:
+            outcome = f"error ({self.error})"
+        else:
+            outcome = "Allow" if self.decision else "Deny"
+        lines = [f"{self.action} on {self.resource}: {outcome}"]
+        for statement in self.statements:
+            if not statement.resource_matched:
+                detail = "resource did not match"
+            elif statement.failed_condition:
+                c = statement.failed_condition
+                detail = f"condition {c.type} {c.key}={c.actual!r} vs {c.expected!r} failed"
+                if c.error:
+                    detail += f": {c.error}"
+            else:
+                detail = f"applied ({statement.effect})"
+            lines.append(f"  {statement.sid}: {detail} [{statement.elapsed_ns} ns]")
+        if not self.statements:
+            lines.append("  no statement lists this action (default deny)")
+        for sid in self.not_evaluated:
+            lines.append(f"  {sid}: not evaluated (explicit deny above)")
+        return "\n".join(lines)
+
+
+def context_value(context: Dict[str, Any], key: str) -> Any:
+    value = context.get(key, MISSING)
+    return repr(value) if value is MISSING else value
+
+
+@dataclass
+class StatementProfile:
+    """Aggregated counters for one sid"""
+    sid: str
+    evaluations: int = 0
+    resource_matches: int = 0
+    matches: int = 0
+    condition_failures: int = 0
+    errors: int = 0
+    time_ns: int = 0
+
+    @property
+    def mean_ns(self) -> float:
+        return self.time_ns / self.evaluations if self.evaluations else 0.0
+
+
+class PolicyProfiler:
+    """Thread-safe per-sid evaluation counters"""
+
+    FIELDS = ["sid", "evaluations", "resource_matches", "matches", "condition_failures", "errors",
+              "time_ns", "mean_ns"]
+
+    def __init__(self, sids: Iterable[str] = ()):
+        self._lock = threading.Lock()
+        self._profiles: Dict[str, StatementProfile] = {}
+        self.checks = 0
+        self.reset(sids)
+
+    def reset(self, sids: Iterable[str] = ()):
+        """Clear counters, pre-registering ``sids`` so unused statements show up as dead."""
+        with self._lock:
+            self._profiles = {sid: StatementProfile(sid) for sid in sids}
+            self.checks = 0
+
+    def record(self, trace: DecisionTrace):
+        with self._lock:
+            self.checks += 1
+            for statement in trace.statements:
+                profile = self._profiles.get(statement.sid)
+                if profile is None:
+                    profile = self._profiles[statement.sid] = StatementProfile(statement.sid)
+                profile.evaluations += 1
+                profile.time_ns += statement.elapsed_ns
+                profile.resource_matches += statement.resource_matched
+                profile.matches += statement.applied
+                failed = statement.failed_condition
+                if failed is not None:
+                    profile.condition_failures += 1
+                    profile.errors += failed.error is not None
+
+    def profiles(self) -> List[StatementProfile]:
+        """Per-sid counters, most time spent first."""
+        with self._lock:
+            profiles = [StatementProfile(**asdict(p)) for p in self._profiles.values()]
+        return sorted(profiles, key=lambda p: p.time_ns, reverse=True)
+
+    def hot(self, n: int = 10) -> List[StatementProfile]:
+        return self.profiles()[:n]
+
+    def dead(self) -> List[str]:
+        """Sids that never applied to a check."""
+        return sorted(p.sid for p in self.profiles() if p.matches == 0)
+
+    def rows(self) -> List[Dict[str, Any]]:
+        return [dict(asdict(p), mean_ns=round(p.mean_ns, 1)) for p in self.profiles()]
+
+    def export(self, path: str):
+        """Write the counters as CSV (``.csv``) or JSON (anything else)."""
+        rows = self.rows()
+        with open(path, "w", newline="") as f:
+            if path.endswith(".csv"):
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+                writer.writeheader()
+                writer.writerows(rows)
+            else:
+                json.dump({"checks": self.checks, "statements": rows}, f, indent=2)
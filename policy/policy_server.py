@@ -0,0 +1,190 @@
+"""Local policy decision service.
+
+Serves ``PolicyEnforcer`` decisions to other processes, over either:
+
+* localhost HTTP: ``POST /v1/check`` with ``{"checks": [...]}`` returns
+  ``{"results": [...]}`` (keep-alive connections, HTTP/1.1), or
+* a Unix socket speaking newline-delimited JSON: each request line is
+  ``{"id": n, "checks": [...]}`` and is answered, in order, by a line
+  ``{"id": n, "results": [...]}``.  Clients may pipeline several request
+  lines before reading the replies.
+
+Each check is ``{"action": "browser:FillForm", "resource": "...",
+"context": {...}}`` and each result is ``{"allowed": bool}`` or
+``{"error": "..."}`` when evaluation raised.
+
+    python -m policy.policy_server policies/insurance_agent_policy.json --unix /tmp/policy.sock
+
+Passing a directory of tenant policies serves a ``PolicyStore`` instead.
+"""
+import argparse
+import json
+import logging
+import os
+import socketserver
+import stat
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+from .policy_enforcer import PolicyEnforcer
+from .policy_store import PolicyStore
+from .policy_types import Action
+
+logger = logging.getLogger(__name__)
+
+
+def evaluate_checks(enforcer: PolicyEnforcer, checks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Evaluate a batch of checks, isolating per-check errors."""
+    results = []
+    for check in checks:
+        try:
+            allowed = enforcer.check_permission(
+                Action(check["action"]), check["resource"], check.get("context") or {}
+            )
+            results.append({"allowed": allowed})
+        except Exception as e:
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+class _HttpHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; avoid Nagle/delayed-ACK stalls on keep-alive
+    disable_nagle_algorithm = True
+
+    def _reply(self, status: int, body: Dict[str, Any]):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/v1/check":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            checks = body["checks"]
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": f"Malformed request: {e}"})
+            return
+        self._reply(200, {"results": evaluate_checks(self.server.enforcer, checks)})
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+class _UnixHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                reply = {"id": request.get("id"),
+                         "results": evaluate_checks(self.server.enforcer, request["checks"])}
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                reply = {"id": None, "error": f"Malformed request: {e}"}
+            self.wfile.write(json.dumps(reply).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _ThreadingUnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class PolicyServer:
+    def __init__(self, enforcer: PolicyEnforcer, unix_path: Optional[str] = None,
+                 host: str = "127.0.0.1", port: int = 0):
+        """
+        Create a decision server around an enforcer.
+
+        Args:
+            enforcer: The enforcer answering checks (enable its decision cache for best throughput)
+            unix_path: Listen on this Unix socket; otherwise listen on HTTP
+            host: HTTP bind address (localhost only by default)
+            port: HTTP port (0 picks a free port)
+
+        Raises:
+            FileExistsError: If ``unix_path`` exists and is not a socket
+        """
+        self.enforcer = enforcer
+        if unix_path:
+            try:
+                mode = os.stat(unix_path).st_mode
+            except FileNotFoundError:
+                pass
+            else:
+                # Remove a stale socket from a previous run, never anything else
+                if not stat.S_ISSOCK(mode):
+                    raise FileExistsError(f"Not a socket, refusing to replace: {unix_path}")
+                os.remove(unix_path)
+            self._server = _ThreadingUnixServer(unix_path, _UnixHandler)
+            self.address = f"unix://{unix_path}"
+        else:
+            self._server = ThreadingHTTPServer((host, port), _HttpHandler)
+            self._server.daemon_threads = True
+            self.address = f"http://{host}:{self._server.server_address[1]}"
+        self._server.enforcer = enforcer
+        self._thread = None
+
+    def serve_forever(self, poll_interval: float = 0.1):
+        logger.info(f"Policy server listening on {self.address}")
+        self._server.serve_forever(poll_interval)
+
+    def start(self) -> "PolicyServer":
+        """Serve in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, name="PolicyServer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self.address.startswith("unix://"):
+            path = self.address[len("unix://"):]
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serve policy decisions locally")
+    parser.add_argument("policy", help="Policy file to enforce, or a directory of <tenant id>.json "
+                                       "policies routed by the tenant.id context key")
+    parser.add_argument("--unix", help="Unix socket path (default: HTTP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8181)
+    parser.add_argument("--cache-size", type=int, default=65536)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if os.path.isdir(args.policy):
+        enforcer = PolicyStore.from_directory(args.policy, cache_size=args.cache_size)
+    else:
+        enforcer = PolicyEnforcer(args.policy, cache_size=args.cache_size)
+    server = PolicyServer(enforcer, unix_path=args.unix, host=args.host, port=args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Offline, batch evaluation of policies over recorded permission checks.
+
+Records are ``(action, resource, context)`` triples loaded from JSONL or
+Parquet files.  Every column is factorized once (unique values + integer
+codes) so each statement is evaluated with NumPy masks over the whole log:
+an action bitmask, a resource match lookup and one lookup per condition.
+Resource patterns and conditions are only ever evaluated on *unique* values,
+using the same ``PolicyEnforcer`` code paths, so decisions are identical to
+calling ``check_permission`` record by record.
+"""
+import argparse
+import json
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from .policy_enforcer import PolicyEnforcer
+from .policy_types import Action, Effect, Policy
+
+ACTIONS: List[Action] = list(Action)
+ACTION_CODES: Dict[Action, int] = {action: i for i, action in enumerate(ACTIONS)}
+
+# Outcome codes used in per-unique-value lookup tables
+_FALSE, _TRUE, _RAISED = 0, 1, 2
+
+
+class _Missing:
+    """Marker for a context key that is absent from a record."""
+
+    def __repr__(self):
+        return "<missing>"
+
+
+MISSING = _Missing()
+
+
+class _Factorizer:
+    """Incrementally assign integer codes to (possibly unhashable) values."""
+
+    def __init__(self, with_missing: bool = False):
+        self.uniques: List[Any] = []
+        self._codes: Dict[Any, int] = {}
+        if with_missing:
+            self.uniques.append(MISSING)
+
+    def code(self, value: Any) -> int:
+        try:
+            key = (type(value), value)
+            hash(key)
+        except TypeError:
+            key = (type(value), json.dumps(value, sort_keys=True, default=str))
+        code = self._codes.get(key)
+        if code is None:
+            code = len(self.uniques)
+            self._codes[key] = code
+            self.uniques.append(value)
+        return code
+
+
+@dataclass
+class DecisionLog:
+    """A factorized, columnar set of permission check records."""
+    actions: np.ndarray                     # codes into ACTIONS
+    resources: np.ndarray                   # codes into resource_values
+    resource_values: List[str]
+    context_columns: Dict[str, Tuple[np.ndarray, List[Any]]]  # key -> (codes, uniques); code 0 is MISSING
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> "DecisionLog":
+        """Build a log from dicts with ``action``, ``resource`` and optional ``context``."""
+        actions = array('b')
+        resources = array('l')
+        resource_codes = _Factorizer()
+        columns: Dict[str, Tuple[array, _Factorizer]] = {}
+
+        for row, record in enumerate(records):
+            action = record['action']
+            try:
+                actions.append(ACTION_CODES[action if isinstance(action, Action) else Action(action)])
+            except ValueError:
+                raise ValueError(f"Record {row}: unknown action {action!r}")
+            resources.append(resource_codes.code(record['resource']))
+
+            context = record.get('context') or {}
+            for key, value in context.items():
+                if key not in columns:
+                    # Earlier rows did not have this key
+                    columns[key] = (array('l', [0]) * row, _Factorizer(with_missing=True))
+                codes, factorizer = columns[key]
+                codes.append(factorizer.code(value))
+            for key, (codes, _) in columns.items():
+                if len(codes) <= row:
+                    codes.append(0)
+
+        return cls(
+            actions=np.frombuffer(actions, dtype=np.int8).astype(np.intp),
+            resources=np.frombuffer(resources, dtype=np.dtype(f"i{resources.itemsize}")).astype(np.intp),
+            resource_values=resource_codes.uniques,
+            context_columns={
+                key: (np.frombuffer(codes, dtype=np.dtype(f"i{codes.itemsize}")).astype(np.intp), f.uniques)
+                for key, (codes, f) in columns.items()
+            }
+        )
+
+    @classmethod
+    def from_jsonl(cls, path: str) -> "DecisionLog":
+        """Load records from a JSON-lines file, one record per line."""
+        def records():
+            with open(path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        return cls.from_records(records())
+
+    @classmethod
+    def from_parquet(cls, path: str) -> "DecisionLog":
+        """
+        Load records from a Parquet file (requires ``pyarrow``).
+
+        The file must have ``action`` and ``resource`` columns; every other
+        column is treated as a context key, with nulls meaning "absent".
+        """
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet logs requires pyarrow: pip install pyarrow")
+
+        table = pq.read_table(path)
+        data = table.to_pydict()
+        context_keys = [name for name in table.column_names if name not in ('action', 'resource')]
+
+        def records():
+            for i in range(table.num_rows):
+                yield {
+                    'action': data['action'][i],
+                    'resource': data['resource'][i],
+                    'context': {k: data[k][i] for k in context_keys if data[k][i] is not None}
+                }
+        return cls.from_records(records())
+
+    @classmethod
+    def load(cls, path: str) -> "DecisionLog":
+        """Load a log, choosing the reader from the file extension."""
+        if path.endswith('.parquet'):
+            return cls.from_parquet(path)
+        return cls.from_jsonl(path)
+
+    def column(self, key: str) -> Tuple[np.ndarray, List[Any]]:
+        """Return ``(codes, uniques)`` for a context key, all-missing if never seen."""
+        if key not in self.context_columns:
+            return np.zeros(len(self), dtype=np.intp), [MISSING]
+        return self.context_columns[key]
+
+    def record(self, index: int) -> Dict[str, Any]:
+        """Reconstruct a single record as passed to ``check_permission``."""
+        context = {}
+        for key, (codes, uniques) in self.context_columns.items():
+            if codes[index] != 0:
+                context[key] = uniques[codes[index]]
+        return {
+            'action': ACTIONS[self.actions[index]],
+            'resource': self.resource_values[self.resources[index]],
+            'context': context
+        }
+
+
+@dataclass
+class SimulationResult:
+    """Decisions for every record of a log."""
+    decisions: np.ndarray  # bool, True means allowed
+    errors: np.ndarray     # bool, True where check_permission would have raised
+
+    def __len__(self) -> int:
+        return len(self.decisions)
+
+    def summary(self) -> Dict[str, int]:
+        errors = int(self.errors.sum())
+        allowed = int(self.decisions.sum())
+        return {
+            'total': len(self),
+            'allowed': allowed,
+            'denied': len(self) - allowed - errors,
+            'errors': errors
+        }
+
+    def labels(self) -> np.ndarray:
+        """Per-record label: "Allow", "Deny" or "Error"."""
+        labels = np.where(self.decisions, Effect.ALLOW.value, Effect.DENY.value).astype(object)
+        labels[self.errors] = "Error"
+        return labels
+
+    def to_jsonl(self, path: str):
+        """Write one ``{"index", "decision"}`` line per record."""
+        with open(path, 'w') as f:
+            for i, label in enumerate(self.labels()):
+                f.write(json.dumps({'index': i, 'decision': label}) + "\n")
+
+
+@dataclass
+class PolicyDiff:
+    """Records whose decision differs between a baseline and a candidate policy."""
+    baseline: SimulationResult
+    candidate: SimulationResult
+    changed: np.ndarray  # indices of changed records
+
+    def summary(self) -> Dict[str, int]:
+        base = self.baseline.labels()[self.changed]
+        cand = self.candidate.labels()[self.changed]
+        counts: Dict[str, int] = {'changed': len(self.changed)}
+        for before, after in zip(base, cand):
+            key = f"{before}->{after}"
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def to_jsonl(self, path: str, log: DecisionLog):
+        """Write one line per changed record with both decisions."""
+        base = self.baseline.labels()
+        cand = self.candidate.labels()
+        with open(path, 'w') as f:
+            for i in self.changed:
+                record = log.record(i)
+                f.write(json.dumps({
+                    'index': int(i),
+                    'action': record['action'].value,
+                    'resource': record['resource'],
+                    'baseline': base[i],
+                    'candidate': cand[i]
+                }, default=str) + "\n")
+
+
+class PolicySimulator:
+    def __init__(self, policy: Union[str, Policy, PolicyEnforcer]):
+        """Initialize the simulator with a policy file, Policy or PolicyEnforcer"""
+        self.enforcer = policy if isinstance(policy, PolicyEnforcer) else PolicyEnforcer(policy)
+
+    def simulate(self, log: DecisionLog) -> SimulationResult:
+        """
+        Evaluate every record of the log in batch.
+
+        Statements are applied in order exactly as ``check_permission`` does:
+        an explicit deny ends evaluation for a record, and a condition that
+        would raise marks the record as an error.
+
+        Returns:
+            SimulationResult: decisions and error mask, one entry per record
+        """
+        n = len(log)
+        decisions = np.zeros(n, dtype=bool)
+        done = np.zeros(n, dtype=bool)
+        errors = np.zeros(n, dtype=bool)
+        action_bits = np.left_shift(np.uint32(1), log.actions.astype(np.uint32))
+
+        for statement in self.enforcer.policy.statements:
+            statement_bits = np.uint32(0)
+            for action in statement.actions:
+                statement_bits |= np.uint32(1 << ACTION_CODES[action])
+
+            resource_lut = np.fromiter(
+                (any(self.enforcer._match_resource(r, p) for p in statement.resources)
+                 for r in log.resource_values),
+                dtype=bool, count=len(log.resource_values)
+            )
+            active = ((action_bits & statement_bits) != 0) & resource_lut[log.resources] & ~done & ~errors
+            if not active.any():
+                continue
+
+            if statement.conditions:
+                passed, raised = self._condition_masks(statement.conditions, log, active)
+                errors |= raised
+                active &= passed
+
+            if statement.effect == Effect.ALLOW:
+                decisions |= active
+            else:
+                decisions[active] = False
+                done |= active
+
+        decisions[errors] = False
+        return SimulationResult(decisions=decisions, errors=errors)
+
+    def _condition_masks(self, conditions, log: DecisionLog, active: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Evaluate conditions in order on active rows, returning (passed, raised) masks."""
+        ok = active.copy()
+        raised = np.zeros(len(log), dtype=bool)
+        for condition in conditions:
+            codes, uniques = log.column(condition.key)
+            lut = np.empty(len(uniques), dtype=np.int8)
+            for i, value in enumerate(uniques):
+                context = {} if value is MISSING else {condition.key: value}
+                try:
+                    lut[i] = _TRUE if self.enforcer.evaluate_conditions([condition], context) else _FALSE
+                except Exception:
+                    lut[i] = _RAISED
+            outcome = lut[codes]
+            raised |= ok & (outcome == _RAISED)
+            ok &= outcome == _TRUE
+        return ok, raised
+
+    def diff(self, baseline: "PolicySimulator", log: DecisionLog) -> PolicyDiff:
+        """Compare this (candidate) policy against a baseline policy over the same log."""
+        base = baseline.simulate(log)
+        cand = self.simulate(log)
+        changed = np.flatnonzero((base.decisions != cand.decisions) | (base.errors != cand.errors))
+        return PolicyDiff(baseline=base, candidate=cand, changed=changed)
+
+
+def verify_parity(enforcer: PolicyEnforcer, log: DecisionLog,
+                  indices: Optional[Iterable[int]] = None) -> List[int]:
+    """
+    Check simulator decisions against ``check_permission`` record by record.
+
+    Args:
+        enforcer: The enforcer to compare against
+        log: The records to evaluate
+        indices: Optional subset of record indices (e.g. a random sample)
+
+    Returns:
+        List[int]: indices of records where the two disagree
+    """
+    result = PolicySimulator(enforcer).simulate(log)
+    mismatches = []
+    for i in (range(len(log)) if indices is None else indices):
+        record = log.record(i)
+        try:
+            expected, raised = enforcer.check_permission(record['action'], record['resource'], record['context']), False
+        except Exception:
+            expected, raised = False, True
+        if bool(result.errors[i]) != raised or bool(result.decisions[i]) != expected:
+            mismatches.append(int(i))
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Simulate policy decisions over a recorded access log")
+    parser.add_argument("log", help="JSONL or Parquet file of (action, resource, context) records")
+    parser.add_argument("policy", help="Policy file to simulate")
+    parser.add_argument("--baseline", help="Policy file to diff against")
+    parser.add_argument("--output", help="Write decisions (or changed records when diffing) as JSONL")
+    args = parser.parse_args(argv)
+
+    log = DecisionLog.load(args.log)
+    simulator = PolicySimulator(args.policy)
+    if args.baseline:
+        diff = simulator.diff(PolicySimulator(args.baseline), log)
+        print(json.dumps(diff.summary(), indent=2))
+        if args.output:
+            diff.to_jsonl(args.output, log)
+    else:
+        result = simulator.simulate(log)
+        print(json.dumps(result.summary(), indent=2))
+        if args.output:
+            result.to_jsonl(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Multi-tenant policy sets with shared compiled fragments.
+
+One worker serves many insurer tenants whose policies are mostly identical.
+``PolicyStore`` interns every condition and statement it loads: identical
+ones (same sid, effect, actions, resources and conditions) across tenants
+are stored once, and their ``CompiledStatement`` is shared.  A tenant then
+costs its own statement list and action index (references only), not a
+full copy of the policy.
+
+Checks are routed by the tenant id in the context (``tenant.id`` by
+default) with a dict lookup, so switching tenants is O(1).  The store
+interns copies, so editing a loaded Policy object later affects no tenant;
+replace a tenant's policy with ``add_tenant`` instead.  Fragments are
+reference counted and released when no tenant uses them any more.
+"""
+import copy
+import json
+import os
+import threading
+from typing import Any, Dict, Hashable, List, Tuple, Union
+
+from .compiled_policy import CompiledPolicy, CompiledStatement
+from .policy_enforcer import PolicyEnforcer, load_policy
+from .policy_types import Action, Condition, Policy, Statement
+
+TENANT_KEY = "tenant.id"
+
+
+def _condition_key(condition: Condition) -> Hashable:
+    # Values may be lists or dicts; compare them by their canonical JSON
+    return condition.type, condition.key, json.dumps(condition.value, sort_keys=True, default=str)
+
+
+class PolicyStore:
+    def __init__(self, tenant_key: str = TENANT_KEY, cache_size: int = 0, audit_log=None):
+        """
+        Initialize an empty store.
+
+        Args:
+            tenant_key: Context key holding the tenant id
+            cache_size: Per-tenant decision cache size (0 disables caching)
+            audit_log: Optional DecisionAuditLog shared by all tenants
+        """
+        self.tenant_key = tenant_key
+        self.cache_size = cache_size
+        self.audit_log = audit_log
+        self._lock = threading.Lock()
+        self._conditions: Dict[Hashable, Condition] = {}
+        self._statements: Dict[Hashable, Tuple[Statement, CompiledStatement]] = {}
+        self._refs: Dict[Hashable, int] = {}  # statement key -> tenant references
+        self._condition_refs: Dict[Hashable, int] = {}  # condition key -> interned statements using it
+        self._tenant_keys: Dict[str, List[Hashable]] = {}  # tenant -> its statement keys
+        self._tenants: Dict[str, PolicyEnforcer] = {}
+
+    @classmethod
+    def from_directory(cls, path: str, **kwargs) -> "PolicyStore":
+        """Load every ``<tenant id>.json`` policy file in a directory."""
+        store = cls(**kwargs)
+        for name in sorted(os.listdir(path)):
+            if name.endswith(".json"):
+                store.add_tenant(name[:-len(".json")], os.path.join(path, name))
+        return store
+
+    def _intern_condition(self, key: Hashable, condition: Condition) -> Condition:
+        interned = self._conditions.get(key)
+        if interned is None:
+            interned = self._conditions[key] = Condition(type=condition.type, key=condition.key,
+                                                         value=copy.deepcopy(condition.value))
+        self._condition_refs[key] = self._condition_refs.get(key, 0) + 1
+        return interned
+
+    def _intern_statement(self, statement: Statement) -> Tuple[Hashable, Statement, CompiledStatement]:
+        """Return the shared copy of a statement, adding one reference to it (call with the lock held)."""
+        condition_keys = [_condition_key(c) for c in statement.conditions or ()]
+        key = (
+            statement.sid,
+            statement.effect,
+            tuple(statement.actions),
+            tuple(statement.resources),
+            tuple(condition_keys) or None,
+        )
+        shared = self._statements.get(key)
+        if shared is None:
+            conditions = [self._intern_condition(k, c) for k, c in zip(condition_keys, statement.conditions or ())]
+            interned = Statement(sid=statement.sid, effect=statement.effect, actions=list(statement.actions),
+                                 resources=list(statement.resources), conditions=conditions or None)
+            shared = self._statements[key] = (interned, CompiledStatement.from_statement(interned))
+        self._refs[key] = self._refs.get(key, 0) + 1
+        return (key,) + shared
+
+    def _release(self, keys: List[Hashable]):
+        """Drop one reference to each statement, freeing fragments no tenant uses (call with the lock held)."""
+        for key in keys:
+            self._refs[key] -= 1
+            if self._refs[key]:
+                continue
+            del self._refs[key]
+            statement, _ = self._statements.pop(key)
+            for condition in statement.conditions or ():
+                condition_key = _condition_key(condition)
+                self._condition_refs[condition_key] -= 1
+                if not self._condition_refs[condition_key]:
+                    del self._condition_refs[condition_key]
+                    del self._conditions[condition_key]
+
+    def add_tenant(self, tenant_id: str, policy: Union[str, Policy]):
+        """Add or replace a tenant's policy (a Policy object or a policy file path)."""
+        if isinstance(policy, str):
+            policy = load_policy(policy)
+        with self._lock:
+            shared = [self._intern_statement(s) for s in policy.statements]
+            tenant_policy = Policy(version=policy.version, statements=[s for _, s, _ in shared])
+            compiled = CompiledPolicy(tenant_policy, statements=[c for _, _, c in shared])
+            enforcer = PolicyEnforcer.from_compiled(compiled, audit_log=self.audit_log, cache_size=self.cache_size)
+            # Publishing is a single dict assignment; concurrent checks see the old or the new policy
+            self._tenants[tenant_id] = enforcer
+            # Release the replaced policy only after interning, so fragments it shares are kept
+            self._release(self._tenant_keys.get(tenant_id, []))
+            self._tenant_keys[tenant_id] = [key for key, _, _ in shared]
+
+    def remove_tenant(self, tenant_id: str):
+        """Drop a tenant, releasing fragments no other tenant shares."""
+        with self._lock:
+            if self._tenants.pop(tenant_id, None) is not None:
+                self._release(self._tenant_keys.pop(tenant_id))
+
+    def tenants(self) -> List[str]:
+        return sorted(self._tenants)
+
+    def enforcer(self, tenant_id: str) -> PolicyEnforcer:
+        """The tenant's enforcer, e.g. to pass as an agent's ``policy_enforcer``."""
+        try:
+            return self._tenants[tenant_id]
+        except KeyError:
+            raise KeyError(f"Unknown tenant: {tenant_id}") from None
+
+    def check_permission(self, action: Action, resource: str, context: Dict[str, Any]) -> bool:
+        """
+        Check a permission against the policy of the tenant named in the context.
+
+        Raises:
+            KeyError: If the context has no tenant id or the tenant is unknown
+        """
+        tenant_id = context.get(self.tenant_key)
+        if tenant_id is None:
+            raise KeyError(f"Context has no {self.tenant_key}")
+        return self.enforcer(tenant_id).check_permission(action, resource, context)
+
+    def stats(self) -> Dict[str, Any]:
+        """Tenant count and how many statements/conditions are shared."""
+        statement_refs = sum(len(e.policy.statements) for e in self._tenants.values())
+        return {
+            "tenants": len(self._tenants),
+            "statement_refs": statement_refs,
+            "unique_statements": len(self._statements),
+            "unique_conditions": len(self._conditions),
+            "sharing_ratio": round(statement_refs / len(self._statements), 2) if self._statements else 0.0,
+        }
@@ -0,0 +1,138 @@
+"""Policy-aware pruning and PII redaction of prompts before they are sent.
+
+Fields the policy will refuse to fill (``browser:FillForm`` on
+``form_field:<id>``) and fields the agent cannot address are removed from
+the form outline and from the requested output schema, so the model neither
+reads nor generates them.  Remaining text is scrubbed of common PII
+patterns.  ``PiiVault`` uses numbered placeholders instead, so PII the model
+places in a field (e.g. the claimant's email) can be restored before filling.
+"""
+import json
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from policy.policy_types import Action
+
+# (name, pattern, replacement); card numbers before phones, since phones are a shorter digit run
+PII_PATTERNS: List[Tuple[str, "re.Pattern", str]] = [
+    ("card", re.compile(r"\b(?:\d[ -]?){12,18}\d\b"), "[REDACTED_CARD]"),
+    ("ssn", re.compile(r"\b\d{3}-\d{2}-\d{4}\b"), "[REDACTED_SSN]"),
+    ("email", re.compile(r"\b[\w.+-]+@[\w-]+\.[\w.-]+\b"), "[REDACTED_EMAIL]"),
+    ("phone", re.compile(r"(?<!\w)\+?\d{0,2}[ .-]?\(?\d{3}\)?[ .-]\d{3}[ .-]\d{4}\b"), "[REDACTED_PHONE]"),
+]
+
+# Input types the agent never fills
+IRRELEVANT_TYPES = frozenset({"file", "password", "hidden", "submit", "button", "reset", "image"})
+
+
+def redact_pii(text: str) -> str:
+    """Replace card numbers, SSNs, email addresses and phone numbers with placeholders."""
+    for _, pattern, replacement in PII_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+REDACTED_PREFIX = "[REDACTED_"
+
+
+class PiiVault:
+    """Reversible redaction: numbered placeholders mapped back to the original values"""
+
+    def __init__(self):
+        self.values: Dict[str, str] = {}  # placeholder -> original
+        self._placeholders: Dict[str, str] = {}  # original -> placeholder
+
+    def _placeholder(self, name: str, value: str) -> str:
+        placeholder = self._placeholders.get(value)
+        if placeholder is None:
+            placeholder = f"{REDACTED_PREFIX}{name.upper()}_{len(self.values) + 1}]"
+            self._placeholders[value] = placeholder
+            self.values[placeholder] = value
+        return placeholder
+
+    def redact(self, text: str) -> str:
+        """Like redact_pii, but the same value always gets the same numbered placeholder."""
+        for name, pattern, _ in PII_PATTERNS:
+            text = pattern.sub(lambda m: self._placeholder(name, m.group(0)), text)
+        return text
+
+    def restore(self, value: Any) -> Any:
+        """Replace placeholders in a (string) value with the values they stand for."""
+        if not isinstance(value, str) or REDACTED_PREFIX not in value:
+            return value
+        for placeholder, original in self.values.items():
+            value = value.replace(placeholder, original)
+        return value
+
+
+class PromptRedactor:
+    def __init__(self, policy_enforcer=None):
+        """
+        Initialize the redactor.
+
+        Args:
+            policy_enforcer: Object with check_permission (PolicyEnforcer or PolicyClient);
+                if None, only irrelevant fields are pruned
+        """
+        self.policy_enforcer = policy_enforcer
+
+    def fillable_fields(self, outline: Dict[str, Any], url: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Return the outline fields the agent can and may fill on the page at ``url``.
+
+        Fields without an id, of an irrelevant type, or denied by the policy are dropped.
+        """
+        candidates = [f for f in outline.get("fields", [])
+                      if f.get("id") and f.get("type") not in IRRELEVANT_TYPES]
+        if not self.policy_enforcer or not candidates:
+            return candidates
+
+        context = {"browser.url": url, "time": datetime.now().isoformat()}
+        checks = [(Action.FILL_FORM, f"form_field:{f['id']}", context) for f in candidates]
+        check_many = getattr(self.policy_enforcer, "check_many", None)
+        if check_many is not None:
+            try:
+                allowed = check_many(checks)
+            except Exception:
+                allowed = [False] * len(checks)
+        else:
+            allowed = []
+            for check in checks:
+                try:
+                    allowed.append(self.policy_enforcer.check_permission(*check))
+                except Exception:
+                    allowed.append(False)
+        return [f for f, ok in zip(candidates, allowed) if ok]
+
+    def prune_outline(self, outline: Dict[str, Any], url: Optional[str]) -> Dict[str, Any]:
+        """Return a copy of the outline with only fillable fields and PII redacted from its text."""
+        fields = []
+        for field in self.fillable_fields(outline, url):
+            field = dict(field)
+            for key in ("label", "placeholder"):
+                if field.get(key):
+                    field[key] = redact_pii(field[key])
+            fields.append(field)
+        return dict(
+            outline,
+            title=redact_pii(outline.get("title", "")),
+            headings=[redact_pii(h) for h in outline.get("headings", [])],
+            fields=fields
+        )
+
+    @staticmethod
+    def output_schema(outline: Dict[str, Any]) -> Dict[str, str]:
+        """Describe the expected model output: one key per field, with its type or allowed options."""
+        schema = {}
+        for field in outline.get("fields", []):
+            if field.get("options"):
+                schema[field["id"]] = "one of: " + ", ".join(field["options"])
+            else:
+                schema[field["id"]] = field.get("type", "text")
+        return schema
+
+    @staticmethod
+    def schema_instruction(schema: Dict[str, str]) -> str:
+        return ("Respond only with a JSON object with exactly these keys "
+                f"(value types in the description): {json.dumps(schema)}")
@@ -0,0 +1,143 @@
+"""Resource limits for long-running agents.
+
+Chrome leaks memory per tab and over time, so a worker that keeps one
+browser for days grows without bound.  ``ResourceGovernor`` tracks the age,
+claim count and memory (this process plus the driver's process tree) of the
+current browser, tells the agent when to recycle it between claims, and
+keeps a bounded per-stage memory report.
+
+Memory is read from ``/proc`` on Linux; elsewhere only this process's peak
+RSS is available and browser memory is reported as 0.
+"""
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def process_rss(pid: Optional[int] = None) -> int:
+    """Resident set size of a process in bytes (0 if unavailable)."""
+    try:
+        with open(f"/proc/{pid or 'self'}/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        if pid is None:
+            try:
+                import resource
+                # Peak, not current, RSS; kilobytes on Linux
+                return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            except ImportError:
+                pass
+        return 0
+
+
+def descendant_pids(pid: int) -> List[int]:
+    """All descendants of a process, found by scanning /proc."""
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return []
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The command name may contain spaces; fields resume after the last ')'
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    result, stack = [], [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            result.append(child)
+            stack.append(child)
+    return result
+
+
+def driver_rss(driver: Any) -> int:
+    """Total RSS of a WebDriver's service process and the browser processes it started."""
+    try:
+        pid = driver.service.process.pid
+    except AttributeError:
+        return 0
+    return sum(process_rss(p) for p in [pid] + descendant_pids(pid))
+
+
+@dataclass
+class ResourceLimits:
+    """Thresholds that trigger recycling the browser between claims"""
+    max_rss_bytes: Optional[int] = None        # browser process tree (the agent process is shared by lanes)
+    max_driver_age: Optional[float] = None     # seconds since the browser started
+    max_driver_claims: Optional[int] = None    # claims processed by one browser
+
+
+class ResourceGovernor:
+    def __init__(self, limits: ResourceLimits, report_size: int = 1000):
+        """
+        Initialize the governor.
+
+        Args:
+            limits: Recycling thresholds
+            report_size: Number of per-stage measurements to keep
+        """
+        self.limits = limits
+        self.driver_started_at: Optional[float] = None
+        self.driver_claims = 0
+        self.recycles = 0
+        self._report = deque(maxlen=report_size)
+
+    def driver_started(self):
+        """Record that a fresh browser was started."""
+        self.driver_started_at = time.monotonic()
+        self.driver_claims = 0
+
+    def claim_finished(self):
+        self.driver_claims += 1
+
+    def memory(self, driver: Any = None) -> Dict[str, int]:
+        agent_rss = process_rss()
+        browser_rss = driver_rss(driver) if driver is not None else 0
+        return {"agent_rss": agent_rss, "browser_rss": browser_rss, "total_rss": agent_rss + browser_rss}
+
+    def should_recycle(self, driver: Any) -> Optional[str]:
+        """
+        Check the limits for the current browser.
+
+        Returns:
+            Optional[str]: The reason to recycle, or None if within limits
+        """
+        limits = self.limits
+        if driver is None or self.driver_started_at is None:
+            return None
+        if limits.max_driver_claims is not None and self.driver_claims >= limits.max_driver_claims:
+            return f"driver processed {self.driver_claims} claims"
+        age = time.monotonic() - self.driver_started_at
+        if limits.max_driver_age is not None and age >= limits.max_driver_age:
+            return f"driver age {age:.0f}s"
+        if limits.max_rss_bytes is not None:
+            # Recycling only frees browser memory, so only the browser counts toward the limit
+            browser = driver_rss(driver)
+            if browser >= limits.max_rss_bytes:
+                return f"browser RSS {browser // (1024 * 1024)} MiB"
+        return None
+
+    def measure(self, stage: str, driver: Any = None) -> Dict[str, Any]:
+        """Record memory after a stage, with the change since the previous measurement."""
+        entry = dict(self.memory(driver), stage=stage, ts=time.time())
+        previous = self._report[-1] if self._report else None
+        entry["delta_rss"] = entry["total_rss"] - previous["total_rss"] if previous else 0
+        self._report.append(entry)
+        logger.debug(f"Memory after {stage}: {entry['total_rss'] // 1024} KiB ({entry['delta_rss']:+d} B)")
+        return entry
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Recent per-stage memory measurements, oldest first."""
+        return list(self._report)
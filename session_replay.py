@@ -0,0 +1,594 @@
+"""Record and replay full claim sessions to profile them offline.
+
+``SessionRecorder`` wraps an agent's WebDriver, OpenAI client and policy
+enforcer in recording proxies and captures, per channel and in order:
+
+* every WebDriver command (attribute reads and method calls on the driver
+  and on elements it returned) with its arguments, result and duration,
+  plus an HTML snapshot of each page navigated to;
+* every LLM request (model, messages, parameters) with the response text;
+* every policy check with its context and decision.
+
+The session is saved as one gzip'd JSON archive; long script arguments are
+stored as digests and page snapshots are deduplicated.
+
+``SessionReplayer`` re-runs the recorded entry point (e.g.
+``process_claim_with_ai``) on a fresh agent whose driver, client and
+enforcer are stubs answering from the archive, at full speed or with the
+recorded latencies, optionally under cProfile or pyinstrument.  No browser,
+network or API key is needed::
+
+    python session_replay.py session.json.gz --speed 1 --profile cprofile --output replay.prof
+
+Replays assume one agent driven from one thread, as recorded.  If the agent
+makes a call the recording does not have next (different code path, or a
+time-dependent loop such as a WebDriverWait that timed out), the stub raises
+``ReplayMismatch``; the divergence is also listed in the report, since the
+agent's own error handling may catch it.
+"""
+import argparse
+import gzip
+import hashlib
+import importlib
+import io
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+ARCHIVE_VERSION = 1
+CHANNELS = ("driver", "llm", "policy")
+_PRIMITIVES = (str, int, float, bool, type(None))
+_MAX_ARG_CHARS = 256  # longer string arguments (injected scripts) are stored as digests
+
+
+class ReplayMismatch(RuntimeError):
+    """The agent made a call that does not match the next recorded one"""
+
+
+def _digest(text: str) -> str:
+    return "sha1:" + hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()
+
+
+def _encode_arg(value: Any) -> Any:
+    """JSON form of a call argument, used to check replayed calls against the recording."""
+    if isinstance(value, (_RecordingProxy, _ReplayProxy)):
+        return {"$ref": value._replay_ref}
+    if isinstance(value, str) and len(value) > _MAX_ARG_CHARS:
+        return _digest(value)
+    if isinstance(value, _PRIMITIVES):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_encode_arg(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _encode_arg(v) for k, v in value.items()}
+    if isinstance(value, Enum):
+        return value.value
+    return repr(value)
+
+
+def _jsonable(value: Any) -> Any:
+    """Full JSON form of a value (requests, contexts, entry point arguments)."""
+    return json.loads(json.dumps(value, default=lambda v: v.value if isinstance(v, Enum) else str(v)))
+
+
+def _encode_error(error: BaseException) -> Dict[str, str]:
+    return {"module": type(error).__module__, "type": type(error).__name__, "message": str(error)}
+
+
+def _decode_error(error: Dict[str, str]) -> BaseException:
+    """Recreate a recorded exception, so the agent's error handling runs as it did."""
+    try:
+        cls = getattr(importlib.import_module(error["module"]), error["type"])
+        return cls(error["message"])
+    except Exception:
+        return RuntimeError(f"{error['type']}: {error['message']}")
+
+
+# -- Recording ---------------------------------------------------------------
+
+class _Session:
+    """Events and snapshots collected while recording"""
+
+    def __init__(self):
+        self.events: Dict[str, List[Dict[str, Any]]] = {channel: [] for channel in CHANNELS}
+        self.snapshots: Dict[str, str] = {}
+        self.roots: List[int] = []
+        self._refs = itertools.count(1)
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def add(self, channel: str, event: Dict[str, Any], start: float, end: Optional[float] = None):
+        end = end or time.perf_counter()
+        event["t"] = round(start - self._start, 6)
+        event["elapsed"] = round(end - start, 6)
+        with self._lock:
+            self.events[channel].append(event)
+
+    def new_ref(self) -> int:
+        return next(self._refs)
+
+    def wrap(self, value: Any) -> Tuple[Any, Any]:
+        """Return (JSON form, value for the agent); objects become recording proxies."""
+        if isinstance(value, _PRIMITIVES):
+            return value, value
+        if isinstance(value, (list, tuple)):
+            pairs = [self.wrap(v) for v in value]
+            return [p[0] for p in pairs], type(value)(p[1] for p in pairs)
+        if isinstance(value, dict) and all(isinstance(k, str) for k in value):
+            pairs = {k: self.wrap(v) for k, v in value.items()}
+            return {k: p[0] for k, p in pairs.items()}, {k: p[1] for k, p in pairs.items()}
+        ref = self.new_ref()
+        return {"$ref": ref}, _RecordingProxy(value, self, ref)
+
+    def snapshot(self, driver: Any) -> Optional[str]:
+        try:
+            html = driver.page_source
+        except Exception:
+            return None
+        if not isinstance(html, str):
+            return None
+        key = _digest(html)
+        with self._lock:
+            self.snapshots.setdefault(key, html)
+        return key
+
+
+def _unwrap(value: Any) -> Any:
+    if isinstance(value, _RecordingProxy):
+        return value._target
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+class _RecordingProxy:
+    """Forwards attribute reads and method calls to a driver-side object, recording them"""
+
+    def __init__(self, target: Any, session: _Session, ref: int):
+        self._target = target
+        self._session = session
+        self._replay_ref = ref
+
+    def __getattr__(self, name: str):
+        session, ref = self._session, self._replay_ref
+        start = time.perf_counter()
+        try:
+            value = getattr(self._target, name)
+        except Exception as e:
+            session.add("driver", {"ref": ref, "attr": name, "error": _encode_error(e)}, start)
+            raise
+        if callable(value) and not isinstance(value, type):
+            return self._method(name, value)
+        encoded, wrapped = session.wrap(value)
+        session.add("driver", {"ref": ref, "attr": name, "value": encoded}, start)
+        return wrapped
+
+    def _method(self, name: str, method: Callable):
+        session, ref, target = self._session, self._replay_ref, self._target
+
+        def call(*args, **kwargs):
+            event = {"ref": ref, "call": name, "args": _encode_arg(list(args))}
+            if kwargs:
+                event["kwargs"] = _encode_arg(kwargs)
+            start = time.perf_counter()
+            try:
+                result = method(*_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()})
+            except Exception as e:
+                event["error"] = _encode_error(e)
+                session.add("driver", event, start)
+                raise
+            end = time.perf_counter()
+            event["value"], wrapped = session.wrap(result)
+            if name == "get":
+                event["snapshot"] = session.snapshot(target)
+            session.add("driver", event, start, end)
+            return wrapped
+
+        return call
+
+
+class _RecordingClient:
+    """Stands in for the OpenAI client, recording chat completion requests and responses"""
+
+    def __init__(self, client: Any, session: _Session):
+        self._client = client
+        self._session = session
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        event = {"op": "chat.completions.create", "request": _jsonable(kwargs)}
+        start = time.perf_counter()
+        try:
+            response = self._client.chat.completions.create(**kwargs)
+            event["content"] = response.choices[0].message.content
+        except Exception as e:
+            event["error"] = _encode_error(e)
+            self._session.add("llm", event, start)
+            raise
+        self._session.add("llm", event, start)
+        return response
+
+
+class _RecordingPolicy:
+    """Stands in for a policy enforcer or client, recording checks and decisions"""
+
+    def __init__(self, enforcer: Any, session: _Session):
+        self._enforcer = enforcer
+        self._session = session
+        if hasattr(enforcer, "check_many"):
+            self.check_many = self._check_many
+
+    def check_permission(self, action, resource: str, context: Dict[str, Any]) -> bool:
+        event = {"op": "check_permission", "action": action.value, "resource": resource,
+                 "context": _jsonable(context)}
+        start = time.perf_counter()
+        try:
+            event["value"] = self._enforcer.check_permission(action, resource, context)
+        except Exception as e:
+            event["error"] = _encode_error(e)
+            self._session.add("policy", event, start)
+            raise
+        self._session.add("policy", event, start)
+        return event["value"]
+
+    def _check_many(self, checks):
+        checks = list(checks)
+        event = {"op": "check_many", "checks": [[a.value, r, _jsonable(c)] for a, r, c in checks]}
+        start = time.perf_counter()
+        try:
+            event["value"] = list(self._enforcer.check_many(checks))
+        except Exception as e:
+            event["error"] = _encode_error(e)
+            self._session.add("policy", event, start)
+            raise
+        self._session.add("policy", event, start)
+        return event["value"]
+
+
+def _swap_policy(agent: Any, enforcer: Any):
+    agent.policy_enforcer = enforcer
+    if getattr(agent, "prompt_redactor", None) is not None:
+        agent.prompt_redactor.policy_enforcer = enforcer
+
+
+class SessionRecorder:
+    def __init__(self, agent: Any):
+        """
+        Prepare to record a session of ``agent`` (an InsuranceClaimAgent or AIInsuranceAgent).
+
+        Recording proxies are installed by ``run`` and removed when it returns.
+        """
+        self.agent = agent
+        self.session = _Session()
+        self.meta: Dict[str, Any] = {}
+
+    def _install(self) -> Dict[str, Any]:
+        agent, session = self.agent, self.session
+        saved = {"driver_factory": agent.driver_factory}
+
+        def recording_factory(factory=agent.driver_factory):
+            ref = session.new_ref()
+            session.roots.append(ref)
+            return _RecordingProxy(factory(), session, ref)
+
+        agent.driver_factory = recording_factory
+        if agent.driver is not None:
+            saved["driver"] = agent.driver
+            ref = session.new_ref()
+            session.roots.append(ref)
+            agent.driver = _RecordingProxy(agent.driver, session, ref)
+        if hasattr(type(agent), "client"):
+            saved["client"] = agent.client
+            agent.client = _RecordingClient(agent.client, session)
+        if getattr(agent, "policy_enforcer", None) is not None:
+            saved["policy_enforcer"] = agent.policy_enforcer
+            _swap_policy(agent, _RecordingPolicy(agent.policy_enforcer, session))
+        self.meta["initial_driver"] = "driver" in saved
+        self.meta["policy"] = "policy_enforcer" in saved
+        return saved
+
+    def _uninstall(self, saved: Dict[str, Any]):
+        agent = self.agent
+        agent.driver_factory = saved["driver_factory"]
+        if isinstance(agent.driver, _RecordingProxy):
+            agent.driver = agent.driver._target
+        if "client" in saved:
+            agent.client = saved["client"]
+        if "policy_enforcer" in saved:
+            _swap_policy(agent, saved["policy_enforcer"])
+
+    def run(self, method: str, *args, **kwargs) -> Any:
+        """Call ``agent.<method>(*args, **kwargs)`` while recording, and return its result."""
+        self.meta.update(agent=type(self.agent).__name__, method=method,
+                         args=_jsonable(list(args)), kwargs=_jsonable(kwargs),
+                         recorded_at=datetime.now().isoformat())
+        saved = self._install()
+        start = time.perf_counter()
+        try:
+            result = getattr(self.agent, method)(*args, **kwargs)
+        finally:
+            self.meta["elapsed"] = round(time.perf_counter() - start, 6)
+            self._uninstall(saved)
+        self.meta["result"] = _jsonable(result)
+        return result
+
+    def save(self, path: str):
+        """Write the session archive (gzip'd JSON)."""
+        archive = {
+            "version": ARCHIVE_VERSION,
+            "meta": self.meta,
+            "roots": self.session.roots,
+            "events": self.session.events,
+            "snapshots": self.session.snapshots,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(archive, f, separators=(",", ":"), default=str)
+
+
+# -- Replay ------------------------------------------------------------------
+
+class _ReplayProxy:
+    """Answers driver and element reads and calls from the recording"""
+
+    def __init__(self, replayer: "SessionReplayer", ref: int):
+        self._replayer = replayer
+        self._replay_ref = ref
+
+    def __getattr__(self, name: str):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        replayer, ref = self._replayer, self._replay_ref
+        event = replayer._next("driver", lambda e: e["ref"] == ref and name in (e.get("attr"), e.get("call")),
+                               f"driver ref {ref} .{name}")
+        if "attr" in event:
+            return replayer._answer(event)
+
+        def call(*args, **kwargs):
+            if replayer.strict:
+                recorded = (event.get("args", []), event.get("kwargs", {}))
+                if (_encode_arg(list(args)), _encode_arg(kwargs)) != recorded:
+                    raise replayer._mismatch(f"{name}{args!r} does not match recorded arguments {recorded!r}")
+            return replayer._answer(event)
+
+        return call
+
+
+class _ReplayPolicy:
+    def __init__(self, replayer: "SessionReplayer", batch: bool):
+        self._replayer = replayer
+        if batch:
+            self.check_many = self._check_many
+
+    def check_permission(self, action, resource: str, context: Dict[str, Any]) -> bool:
+        event = self._replayer._next(
+            "policy", lambda e: e["op"] == "check_permission" and (e["action"], e["resource"]) == (action.value, resource),
+            f"check_permission({action.value}, {resource})")
+        return self._replayer._answer(event)
+
+    def _check_many(self, checks):
+        checks = [[a.value, r] for a, r, _ in checks]
+        event = self._replayer._next(
+            "policy", lambda e: e["op"] == "check_many" and [c[:2] for c in e["checks"]] == checks,
+            f"check_many of {len(checks)} checks")
+        return self._replayer._answer(event)
+
+
+@dataclass
+class ReplayReport:
+    """Outcome of one replay"""
+    result: Any
+    recorded_result: Any
+    elapsed: float
+    recorded_elapsed: float
+    calls: Dict[str, int]
+    unused: Dict[str, int]  # recorded events the replay did not reach
+    mismatches: List[str]  # divergences from the recording, even if the agent caught them
+    profile: Optional[str] = None  # profiler text summary
+
+
+class SessionReplayer:
+    def __init__(self, path: str, speed: float = 0.0, strict: bool = True):
+        """
+        Load a session archive.
+
+        Args:
+            path: Archive written by SessionRecorder.save
+            speed: 0 answers instantly; 1.0 reproduces recorded latencies, 2.0 halves them
+            strict: Check call arguments and LLM requests against the recording
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            archive = json.load(f)
+        if archive.get("version") != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported session archive version: {archive.get('version')}")
+        self.meta: Dict[str, Any] = archive["meta"]
+        self.roots: List[int] = archive["roots"]
+        self.events: Dict[str, List[Dict[str, Any]]] = archive["events"]
+        self.snapshots: Dict[str, str] = archive["snapshots"]
+        self.speed = speed
+        self.strict = strict
+        self._queues: Dict[str, deque] = {}
+        self._calls: Dict[str, int] = {}
+        self._mismatches: List[str] = []
+
+    def snapshot(self, url: str) -> Optional[str]:
+        """HTML of the last recorded navigation to ``url``."""
+        html = None
+        for event in self.events["driver"]:
+            if event.get("call") == "get" and event.get("args") == [url] and event.get("snapshot"):
+                html = self.snapshots.get(event["snapshot"])
+        return html
+
+    def _next(self, channel: str, matches: Callable[[Dict[str, Any]], bool], description: str) -> Dict[str, Any]:
+        queue = self._queues[channel]
+        if not queue:
+            raise self._mismatch(f"Unexpected {description}: no more recorded {channel} events")
+        event = queue.popleft()
+        if not matches(event):
+            raise self._mismatch(f"Unexpected {description}; recording has {_describe(event)} next")
+        self._calls[channel] += 1
+        return event
+
+    def _mismatch(self, message: str) -> ReplayMismatch:
+        # Kept for the report: the agent's own error handling may swallow the exception
+        self._mismatches.append(message)
+        return ReplayMismatch(message)
+
+    def _answer(self, event: Dict[str, Any]) -> Any:
+        if self.speed:
+            time.sleep(event.get("elapsed", 0) / self.speed)
+        if "error" in event:
+            raise _decode_error(event["error"])
+        return self._decode(event.get("value"))
+
+    def _decode(self, value: Any) -> Any:
+        if isinstance(value, list):
+            return [self._decode(v) for v in value]
+        if isinstance(value, dict):
+            if set(value) == {"$ref"}:
+                return _ReplayProxy(self, value["$ref"])
+            return {k: self._decode(v) for k, v in value.items()}
+        return value
+
+    def _create(self, **kwargs):
+        event = self._next("llm", lambda e: e["op"] == "chat.completions.create", "LLM request")
+        if self.strict and _jsonable(kwargs) != event["request"]:
+            raise self._mismatch("LLM request differs from the recording")
+        self._answer(event)
+        message = SimpleNamespace(content=event.get("content"), role="assistant")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")])
+
+    def _install(self, agent: Any):
+        self._queues = {channel: deque(self.events[channel]) for channel in CHANNELS}
+        self._calls = {channel: 0 for channel in CHANNELS}
+        self._mismatches = []
+        roots = deque(self.roots)
+
+        def replay_factory():
+            if not roots:
+                raise self._mismatch("Unexpected browser start: no more recorded drivers")
+            return _ReplayProxy(self, roots.popleft())
+
+        agent.driver_factory = replay_factory
+        agent.driver = replay_factory() if self.meta.get("initial_driver") else None
+        if hasattr(type(agent), "client"):
+            agent.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self._create)))
+        if self.meta.get("policy"):
+            batch = any(e["op"] == "check_many" for e in self.events["policy"])
+            _swap_policy(agent, _ReplayPolicy(self, batch))
+
+    def replay(self, agent: Any, profile: Optional[str] = None, output: Optional[str] = None) -> ReplayReport:
+        """
+        Re-run the recorded entry point on ``agent`` against the recording.
+
+        Args:
+            agent: A fresh agent of the recorded type (e.g. ``AIInsuranceAgent(api_key="replay")``);
+                do not give it a checkpoint store that already has this claim
+            profile: "cprofile" or "pyinstrument" to profile the replay
+            output: File for the profile (pstats dump, or pyinstrument HTML)
+        """
+        self._install(agent)
+        method = getattr(agent, self.meta["method"])
+        args, kwargs = self.meta.get("args", []), self.meta.get("kwargs", {})
+
+        def run():
+            try:
+                return method(*args, **kwargs)
+            except ReplayMismatch:
+                return None  # Already listed in the report
+
+        start = time.perf_counter()
+        result, summary = _profiled(run, profile, output)
+        elapsed = time.perf_counter() - start
+        return ReplayReport(
+            result=result,
+            recorded_result=self.meta.get("result"),
+            elapsed=elapsed,
+            recorded_elapsed=self.meta.get("elapsed", 0.0),
+            calls=dict(self._calls),
+            unused={channel: len(queue) for channel, queue in self._queues.items()},
+            mismatches=list(self._mismatches),
+            profile=summary,
+        )
+
+
+def _describe(event: Dict[str, Any]) -> str:
+    if "op" in event:
+        return event["op"]
+    return f"driver ref {event['ref']} .{event.get('call') or event.get('attr')}"
+
+
+def _profiled(fn: Callable[[], Any], profile: Optional[str], output: Optional[str]) -> Tuple[Any, Optional[str]]:
+    """Run ``fn`` under the requested profiler, returning its result and a text summary."""
+    if profile is None:
+        return fn(), None
+    if profile == "cprofile":
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            result = fn()
+        finally:
+            profiler.disable()
+        if output:
+            profiler.dump_stats(output)
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(25)
+        return result, text.getvalue()
+    if profile == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            raise RuntimeError("pyinstrument is not installed (pip install pyinstrument)") from None
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            result = fn()
+        finally:
+            profiler.stop()
+        if output:
+            with open(output, "w") as f:
+                f.write(profiler.output_html())
+        return result, profiler.output_text()
+    raise ValueError(f"Unknown profiler: {profile}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay a recorded claim session offline")
+    parser.add_argument("archive", help="Session archive written by SessionRecorder")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="0 = as fast as possible, 1 = recorded latencies (default: 0)")
+    parser.add_argument("--profile", choices=["cprofile", "pyinstrument"])
+    parser.add_argument("--output", help="Write the profile here")
+    parser.add_argument("--lenient", action="store_true", help="Do not check call arguments")
+    args = parser.parse_args(argv)
+
+    replayer = SessionReplayer(args.archive, speed=args.speed, strict=not args.lenient)
+    if replayer.meta["agent"] == "AIInsuranceAgent":
+        from ai_insurance_agent import AIInsuranceAgent
+        agent = AIInsuranceAgent(api_key="replay")
+    else:
+        from insurance_agent import InsuranceClaimAgent
+        agent = InsuranceClaimAgent()
+
+    report = replayer.replay(agent, profile=args.profile, output=args.output)
+    print(f"result: {report.result!r} (recorded: {report.recorded_result!r})")
+    print(f"elapsed: {report.elapsed:.3f}s (recorded: {report.recorded_elapsed:.3f}s)")
+    print(f"calls: {report.calls}, unused recorded events: {report.unused}")
+    for mismatch in report.mismatches:
+        print(f"mismatch: {mismatch}")
+    if report.profile:
+        print(report.profile)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import io
+import json
+import logging
+import threading
+import pytest
+from unittest.mock import Mock
+from agent_logging import configure_logging, get_logger, claim_context, shutdown_logging
+from insurance_agent import InsuranceClaimAgent
+
+@pytest.fixture
+def log_stream():
+    stream = io.StringIO()
+    configure_logging(stream=stream)
+    yield stream
+    shutdown_logging()
+
+def read_lines(stream):
+    shutdown_logging()  # Drains the queue before returning
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+def test_single_handler_per_process(log_stream):
+    """Test that many agents share one handler and each line is written once"""
+    agents = [InsuranceClaimAgent() for _ in range(5)]
+    assert len(logging.getLogger('InsuranceClaimAgent').handlers) == 1
+
+    agents[0].logger.info("hello")
+    lines = read_lines(log_stream)
+    assert [line["message"] for line in lines] == ["hello"]
+
+def test_records_do_not_reach_root_handlers(log_stream):
+    """Test agent records are written only by the pipeline, not again by root handlers"""
+    root_handler = Mock(level=logging.NOTSET)
+    logging.getLogger().addHandler(root_handler)
+    try:
+        InsuranceClaimAgent().logger.warning("once")
+    finally:
+        logging.getLogger().removeHandler(root_handler)
+    root_handler.handle.assert_not_called()
+    assert [line["message"] for line in read_lines(log_stream)] == ["once"]
+
+def test_json_output_with_correlation_id(log_stream):
+    """Test records carry the claim correlation id of the calling thread"""
+    logger = get_logger('InsuranceClaimAgent')
+
+    def worker(claim_id):
+        with claim_context(claim_id):
+            logger.info(f"processing {claim_id}")
+
+    threads = [threading.Thread(target=worker, args=(f"claim-{i}",)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    logger.warning("outside")
+
+    lines = read_lines(log_stream)
+    assert len(lines) == 5
+    for line in lines[:4]:
+        assert line["message"] == f"processing {line['claim_id']}"
+        assert line["level"] == "INFO"
+    assert lines[4]["claim_id"] is None
+
+def test_sampling_keeps_warnings():
+    """Test INFO lines are sampled while warnings always pass"""
+    stream = io.StringIO()
+    configure_logging(stream=stream, sample_rate=0.0)
+    logger = get_logger('InsuranceClaimAgent')
+    for _ in range(10):
+        logger.info("noisy")
+    logger.warning("important")
+
+    lines = read_lines(stream)
+    assert [line["message"] for line in lines] == ["important"]
+
+def test_fill_form_field_does_not_log_value(log_stream):
+    """Test filled values such as card numbers never reach the logs"""
+    agent = InsuranceClaimAgent()
+    element = Mock(tag_name="input")
+    element.get_attribute.return_value = "text"
+    agent.driver = Mock()
+    agent.driver.find_element.return_value = element
+
+    assert agent.fill_form_field("credit-card", "4111-1111-1111-1111")
+    element.send_keys.assert_called_once_with("4111-1111-1111-1111")
+
+    output = log_stream.getvalue() + "".join(line["message"] for line in read_lines(log_stream))
+    assert "4111" not in output
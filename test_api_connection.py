@@ -1,8 +1,10 @@
+from dotenv import load_dotenv
 from ai_insurance_agent import AIInsuranceAgent
 
 def test_api_connection():
     try:
-        # Initialize the agent (it will use the API key from .env)
+        # Initialize the agent with the API key from .env
+        load_dotenv()
         agent = AIInsuranceAgent()
         
         # Test a simple completion to verify API connection
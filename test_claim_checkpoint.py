@@ -0,0 +1,126 @@
+import json
+import os
+import pytest
+from unittest.mock import Mock, patch
+from ai_insurance_agent import AIInsuranceAgent
+from claim_checkpoint import ClaimCheckpointStore, ClaimStage
+
+ANALYSIS = {"fields": ["policy-number", "claim-amount"]}
+FIELD_VALUES = {"policy-number": "POL123456", "claim-amount": "500"}
+
+def completion(content):
+    response = Mock()
+    response.choices = [Mock()]
+    response.choices[0].message.content = json.dumps(content)
+    return response
+
+class FakeDriver:
+    """Minimal stand-in for a WebDriver session"""
+    def __init__(self, fail_fill=False):
+        self.current_url = None
+        self.fail_fill = fail_fill
+        self.filled = {}
+
+    def get(self, url):
+        self.current_url = url
+
+    def execute_script(self, script, *args):
+        return {"key": self.current_url, "title": "Insurance Claim Form", "headings": [],
+                "fields": [{"id": "policy-number", "type": "text", "label": "Policy Number"}]}
+
+    def find_element(self, by, selector):
+        if self.fail_fill and selector.startswith("#"):
+            raise RuntimeError("browser crashed")
+        element = Mock(tag_name="input")
+        element.get_attribute.return_value = "text"
+        element.is_displayed.return_value = True
+        element.is_enabled.return_value = True
+        element.send_keys.side_effect = lambda value: self.filled.__setitem__(selector[1:], value)
+        return element
+
+    def quit(self):
+        pass
+
+@pytest.fixture
+def store(tmp_path):
+    store = ClaimCheckpointStore(str(tmp_path / "checkpoints.db"))
+    yield store
+    store.close()
+
+def make_agent(store, drivers):
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
+        agent = AIInsuranceAgent(checkpoint_store=store)
+    agent.client = Mock()
+    agent.client.chat.completions.create.side_effect = [completion(ANALYSIS), completion(FIELD_VALUES)]
+    drivers = iter(drivers)
+    def initialize_browser():
+        agent.driver = next(drivers)
+    agent.initialize_browser = initialize_browser
+    return agent
+
+def test_store_roundtrip(store):
+    """Test checkpoints persist stage outputs and report the last stage"""
+    assert store.last_stage("claim-1") is None
+    store.save("claim-1", ClaimStage.PAGE_ANALYZED, ANALYSIS)
+    store.save("claim-1", ClaimStage.VALUES_GENERATED, FIELD_VALUES)
+
+    reopened = ClaimCheckpointStore(store.path)
+    assert reopened.completed_stages("claim-1") == {
+        ClaimStage.PAGE_ANALYZED: ANALYSIS,
+        ClaimStage.VALUES_GENERATED: FIELD_VALUES
+    }
+    assert reopened.last_stage("claim-1") == ClaimStage.VALUES_GENERATED
+    reopened.clear("claim-1")
+    assert store.completed_stages("claim-1") == {}
+    reopened.close()
+
+def test_resume_reuses_llm_outputs(store):
+    """Test a retry after a crash resumes without repeating model calls"""
+    crashed, fresh = FakeDriver(fail_fill=True), FakeDriver()
+    agent = make_agent(store, [crashed, fresh])
+    url, task = "http://localhost:8000/claim-form", "Fill out an auto claim"
+
+    assert not agent.process_claim_with_ai(url, task, claim_id="claim-3")
+    assert store.last_stage("claim-3") == ClaimStage.VALUES_GENERATED
+    assert agent.client.chat.completions.create.call_count == 2
+
+    assert agent.process_claim_with_ai(url, task, claim_id="claim-3")
+    assert agent.client.chat.completions.create.call_count == 2
+    assert fresh.filled == FIELD_VALUES
+    assert store.last_stage("claim-3") == ClaimStage.FIELDS_FILLED
+
+def test_submitted_claim_is_not_repeated(store):
+    """Test a submitted claim is skipped on retry"""
+    agent = make_agent(store, [FakeDriver()])
+    url, task = "http://localhost:8000/claim-form", "Fill out an auto claim"
+
+    assert agent.process_claim_with_ai(url, task, claim_id="claim-7", submit_selector="#submit")
+    assert store.last_stage("claim-7") == ClaimStage.SUBMITTED
+
+    # No browser is available any more: a retry must not need one
+    assert agent.process_claim_with_ai(url, task, claim_id="claim-7", submit_selector="#submit")
+
+def test_claims_without_id_are_not_deduplicated(store):
+    """Test separate claims with the same url and task are each processed"""
+    first, second = FakeDriver(), FakeDriver()
+    agent = make_agent(store, [first, second])
+    agent.client.chat.completions.create.side_effect = [completion(ANALYSIS), completion(FIELD_VALUES)] * 2
+    url, task = "http://localhost:8000/claim-form", "Fill out an auto claim"
+
+    assert agent.process_claim_with_ai(url, task, submit_selector="#submit")
+    assert agent.process_claim_with_ai(url, task, submit_selector="#submit")
+    assert agent.client.chat.completions.create.call_count == 4
+    assert first.filled == second.filled == FIELD_VALUES
+
+def test_non_object_values_are_retried_not_checkpointed(store):
+    """Test model output that is not an object of field values is retried and never checkpointed"""
+    agent = make_agent(store, [FakeDriver()])
+    agent.client.chat.completions.create.side_effect = [
+        completion(ANALYSIS), completion(["POL123456", "500"]), completion({"claim-amount": {"value": 500}}),
+        completion(FIELD_VALUES)
+    ]
+    url, task = "http://localhost:8000/claim-form", "Fill out an auto claim"
+
+    with patch("time.sleep"):
+        assert agent.process_claim_with_ai(url, task, claim_id="claim-9")
+    assert store.completed_stages("claim-9")[ClaimStage.VALUES_GENERATED] == FIELD_VALUES
@@ -0,0 +1,155 @@
+import threading
+import time
+import pytest
+from unittest.mock import Mock
+from claim_scheduler import ClaimScheduler
+
+PREPARE_SECONDS = 0.1
+COMPLETE_SECONDS = 0.05
+
+class FakeAgent:
+    """Agent stand-in whose stages just sleep, recording what ran"""
+    log = []
+    lock = threading.Lock()
+
+    def __init__(self, fail_claims=()):
+        self.driver = None
+        self.fail_claims = fail_claims
+
+    def initialize_browser(self):
+        self.driver = Mock()
+
+    def close_browser(self):
+        self.driver = None
+
+    def finish_claim(self):
+        pass
+
+    def is_submitted(self, claim_id):
+        return claim_id == "already-done"
+
+    def prepare_claim(self, task_description, claim_id=None, claim_data=None):
+        self._record("prepare", claim_id)
+        time.sleep(PREPARE_SECONDS)
+        return None if claim_id in self.fail_claims else {"description": task_description}
+
+    def fill_claim(self, field_values, claim_id=None):
+        self._record("fill", claim_id)
+        time.sleep(COMPLETE_SECONDS)
+        return True
+
+    def submit_claim(self, submit_selector, claim_id=None):
+        self._record("submit", claim_id)
+        return True
+
+    def _record(self, stage, claim_id):
+        with self.lock:
+            self.log.append((stage, claim_id))
+
+@pytest.fixture(autouse=True)
+def reset_log():
+    FakeAgent.log = []
+
+def test_stages_overlap():
+    """Test preparing the next claim overlaps filling the current one"""
+    claims = 6
+    start = time.perf_counter()
+    with ClaimScheduler(FakeAgent, lanes=2) as scheduler:
+        futures = [scheduler.submit("http://localhost:8000/claim-form", f"claim {i}", claim_id=f"c{i}",
+                                    submit_selector="#submit") for i in range(claims)]
+        assert all(f.result(timeout=5) for f in futures)
+    elapsed = time.perf_counter() - start
+
+    serial = claims * (PREPARE_SECONDS + COMPLETE_SECONDS)
+    assert elapsed < 0.75 * serial
+    assert scheduler.stats == {"completed": claims, "failed": 0, "cancelled": 0}
+    fills = [claim for stage, claim in FakeAgent.log if stage == "fill"]
+    assert fills == [f"c{i}" for i in range(claims)]
+
+def test_claims_submitted_while_running_are_prefetched():
+    """Test a claim submitted while another is preparing starts on the free lane right away"""
+    with ClaimScheduler(FakeAgent, lanes=2) as scheduler:
+        futures = []
+        for i in range(3):
+            futures.append(scheduler.submit("u", f"claim {i}", claim_id=f"c{i}"))
+            time.sleep(PREPARE_SECONDS / 5)
+        assert all(f.result(timeout=5) for f in futures)
+
+    log = FakeAgent.log
+    assert log.index(("prepare", "c1")) < log.index(("fill", "c0"))
+
+def test_priority_order():
+    """Test higher-priority claims are processed first"""
+    scheduler = ClaimScheduler(FakeAgent, lanes=1)
+    scheduler.submit("u", "low", claim_id="low", priority=0)
+    scheduler.submit("u", "high", claim_id="high", priority=10)
+    scheduler.submit("u", "mid", claim_id="mid", priority=5)
+    scheduler.start()
+    scheduler.shutdown()
+
+    assert [claim for stage, claim in FakeAgent.log if stage == "prepare"] == ["high", "mid", "low"]
+
+def test_cancellation_and_failures():
+    """Test cancelled claims are never prepared and failures resolve to False"""
+    scheduler = ClaimScheduler(lambda: FakeAgent(fail_claims=("bad",)), lanes=1)
+    ok = scheduler.submit("u", "ok", claim_id="ok")
+    cancelled = scheduler.submit("u", "cancel me", claim_id="cancel-me")
+    bad = scheduler.submit("u", "bad", claim_id="bad")
+    done = scheduler.submit("u", "done", claim_id="already-done")
+    assert scheduler.cancel("cancel-me")
+    scheduler.start()
+    scheduler.shutdown()
+
+    assert ok.result() is True
+    assert cancelled.cancelled()
+    assert bad.result() is False
+    assert done.result() is True
+    assert ("prepare", "cancel-me") not in FakeAgent.log
+    assert ("prepare", "already-done") not in FakeAgent.log
+    assert scheduler.stats == {"completed": 2, "failed": 1, "cancelled": 1}
+
+def test_cancel_while_filling_is_refused():
+    """Test a claim cannot be cancelled once its form is being filled"""
+    scheduler = ClaimScheduler(FakeAgent, lanes=1).start()
+    future = scheduler.submit("u", "fill me", claim_id="filling", submit_selector="#submit")
+    deadline = time.monotonic() + 5
+    while ("fill", "filling") not in FakeAgent.log and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert not scheduler.cancel("filling")
+    scheduler.shutdown()
+
+    assert future.result() is True
+    assert ("submit", "filling") in FakeAgent.log
+    assert scheduler.stats == {"completed": 1, "failed": 0, "cancelled": 0}
+
+def test_duplicate_claim_id_is_rejected():
+    """Test a claim id cannot be queued twice while the first is in flight"""
+    scheduler = ClaimScheduler(FakeAgent, lanes=1)
+    first = scheduler.submit("u", "first", claim_id="dup")
+    with pytest.raises(ValueError):
+        scheduler.submit("u", "second", claim_id="dup")
+    scheduler.start()
+    scheduler.shutdown()
+
+    assert first.result() is True
+    assert [claim for stage, claim in FakeAgent.log if stage == "prepare"] == ["dup"]
+
+def test_lane_that_loses_its_browser_leaves_rotation():
+    """Test a lane whose browser cannot be restarted is dropped, and claims fail once no lane is left"""
+    class BrokenRecycleAgent(FakeAgent):
+        def finish_claim(self):
+            self.driver = None
+            raise RuntimeError("chrome did not start")
+
+    scheduler = ClaimScheduler(BrokenRecycleAgent, lanes=1)
+    first = scheduler.submit("u", "first", claim_id="first")
+    second = scheduler.submit("u", "second", claim_id="second")
+    scheduler.start()
+    with pytest.raises(RuntimeError):
+        second.result(timeout=5)
+    scheduler.shutdown()
+
+    assert first.result() is True
+    assert [claim for stage, claim in FakeAgent.log if stage == "prepare"] == ["first"]
+    with pytest.raises(RuntimeError):
+        scheduler.submit("u", "third", claim_id="third")
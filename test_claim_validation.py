@@ -0,0 +1,87 @@
+import pytest
+from claim_validation import ClaimSchema, ClaimValidator, FieldSpec, DEFAULT_CLAIM_SCHEMA
+
+SCHEMA = ClaimSchema.from_dict({
+    "policy_number": {"type": "pattern", "required": True, "pattern": r"POL\d{6}"},
+    "claim_amount": {"type": "currency", "required": True, "min": 1, "max": 50000},
+    "deductible": {"type": "number", "min": 0},
+    "incident_date": {"type": "date", "required": True},
+    "claim_type": {"type": "choice", "choices": ["auto", "home", "life"]}
+})
+
+VALID_CLAIM = {
+    "policy_number": "POL123456",
+    "claim_amount": "$1,234.56",
+    "deductible": 250,
+    "incident_date": "2023-12-08",
+    "claim_type": "auto"
+}
+
+def codes(errors):
+    return {(e.field, e.code) for e in errors}
+
+def test_valid_claim():
+    """Test a claim satisfying every rule has no errors"""
+    assert ClaimValidator(SCHEMA).validate(VALID_CLAIM) == []
+
+def test_field_errors():
+    """Test each rule type reports a structured error"""
+    validator = ClaimValidator(SCHEMA)
+    claim = {
+        "policy_number": "ABC",
+        "claim_amount": "$1.234.56",
+        "deductible": -5,
+        "incident_date": "12/08/2023",
+        "claim_type": "boat"
+    }
+    assert codes(validator.validate(claim)) == {
+        ("policy_number", "invalid_format"),
+        ("claim_amount", "invalid_format"),
+        ("deductible", "below_min"),
+        ("incident_date", "invalid_format"),
+        ("claim_type", "invalid_choice")
+    }
+    assert codes(validator.validate({"claim_amount": "99,999.00"})) == {
+        ("policy_number", "missing"),
+        ("claim_amount", "above_max"),
+        ("incident_date", "missing")
+    }
+
+def test_unhashable_choice_is_invalid():
+    """Test an unhashable value for a choice field is reported, not raised"""
+    claim = dict(VALID_CLAIM, claim_type=["auto"])
+    assert codes(ClaimValidator(SCHEMA).validate(claim)) == {("claim_type", "invalid_choice")}
+
+def test_non_finite_and_bool_numbers_are_invalid():
+    """Test NaN, infinities and booleans are not accepted as numbers"""
+    validator = ClaimValidator(SCHEMA)
+    for value in ("nan", "inf", "-inf", float("nan"), True, False):
+        assert codes(validator.validate(dict(VALID_CLAIM, deductible=value))) == {("deductible", "invalid_format")}
+
+def test_validate_batch():
+    """Test batch validation reports errors only for invalid claims"""
+    validator = ClaimValidator(SCHEMA)
+    claims = [dict(VALID_CLAIM) for _ in range(1000)]
+    claims[10]["claim_amount"] = "abc"
+    claims[500].pop("policy_number")
+
+    result = validator.validate_batch(claims)
+
+    assert result.total == 1000
+    assert result.valid_count == 998
+    assert sorted(result.errors) == [10, 500]
+    assert not result.is_valid(10) and result.is_valid(11)
+    assert result.error_counts() == {"claim_amount": 1, "policy_number": 1}
+
+def test_unknown_field_type():
+    """Test schemas with unknown field types are rejected at compile time"""
+    with pytest.raises(ValueError):
+        ClaimValidator(ClaimSchema(fields=[FieldSpec(name="x", type="color")]))
+
+def test_default_schema_matches_agent_rules():
+    """Test the default schema requires policy number and a currency amount"""
+    validator = ClaimValidator(DEFAULT_CLAIM_SCHEMA)
+    assert validator.validate({"claim_amount": "1,234.56", "policy_number": "POL123456"}) == []
+    assert codes(validator.validate({"claim_amount": "invalid_amount", "policy_number": "POL1"})) == {
+        ("claim_amount", "invalid_format")
+    }
@@ -0,0 +1,137 @@
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import Mock
+from agent_pool import AgentPool
+from ai_insurance_agent import AIInsuranceAgent
+from policy.policy_enforcer import PolicyEnforcer
+from policy.policy_types import Action, Effect, Statement, Condition, Policy
+
+URL = "http://localhost:8000/*"
+FIELDS = ["policy-number", "incident-date", "claim-amount", "description", "credit-card"]
+
+def make_policy(deny_field):
+    return Policy(version="2023-12-08", statements=[
+        Statement(sid="AllowLocal", effect=Effect.ALLOW, actions=[Action.FILL_FORM, Action.READ_PAGE], resources=["*"],
+                  conditions=[Condition(type="StringEquals", key="browser.url", value=URL)]),
+        Statement(sid="DenyField", effect=Effect.DENY, actions=[Action.FILL_FORM], resources=[f"form_field:{deny_field}"]),
+    ])
+
+def test_concurrent_checks_match_serial():
+    """Test thousands of concurrent checks give the same decisions as serial evaluation"""
+    enforcer = PolicyEnforcer(make_policy("credit-card"), cache_size=64)
+    checks = [(action, f"form_field:{field}", {"browser.url": url, "time": datetime.now().isoformat()})
+              for action, field, url in itertools.product(
+                  [Action.FILL_FORM, Action.READ_PAGE, Action.CLICK_ELEMENT], FIELDS, [URL, "http://evil/*"])] * 200
+    expected = [PolicyEnforcer(make_policy("credit-card")).check_permission(*c) for c in checks]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda c: enforcer.check_permission(*c), checks))
+    assert results == expected
+    assert enforcer.cache.hits + enforcer.cache.misses == len(checks)
+
+def test_policy_swap_under_load():
+    """Test a check started after a policy swap never sees the old policy or its cached decisions"""
+    enforcer = PolicyEnforcer(make_policy("credit-card"), cache_size=64)
+    context = {"browser.url": URL}
+    stop = threading.Event()
+
+    def hammer():
+        while not stop.is_set():
+            for field in FIELDS:
+                enforcer.check_permission(Action.FILL_FORM, f"form_field:{field}", context)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        workers = [executor.submit(hammer) for _ in range(8)]
+        try:
+            for i in range(300):
+                denied = FIELDS[i % len(FIELDS)]
+                enforcer.policy = make_policy(denied)
+                for field in FIELDS:
+                    assert enforcer.check_permission(Action.FILL_FORM, f"form_field:{field}", context) == (field != denied)
+        finally:
+            stop.set()
+        for worker in workers:
+            worker.result()
+
+class ExclusiveDriver:
+    """Fake browser that fails if two threads use it at once"""
+    def __init__(self, latency=0.0):
+        self.current_url = URL
+        self.latency = latency
+        self.in_use = threading.Lock()
+        self.fills = 0
+        self.overlaps = 0
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def find_element(self, by, selector):
+        if not self.in_use.acquire(blocking=False):
+            self.overlaps += 1
+            raise RuntimeError("driver used by two threads at once")
+        try:
+            time.sleep(self.latency)
+            self.fills += 1
+        finally:
+            self.in_use.release()
+        return Mock(tag_name="input", get_attribute=Mock(return_value="text"))
+
+    def quit(self):
+        pass
+
+def make_pool(size, latency=0.0):
+    shared_enforcer = PolicyEnforcer(make_policy("credit-card"), cache_size=64)
+    shared_client = Mock()
+
+    def factory():
+        agent = AIInsuranceAgent(api_key="test", policy_enforcer=shared_enforcer)
+        agent.client = shared_client
+        agent.driver_factory = lambda: ExclusiveDriver(latency)
+        return agent
+
+    return AgentPool(factory, size=size)
+
+def fill(agent, field):
+    try:
+        return agent.fill_form_field(field, "value")
+    except PermissionError:
+        return None
+
+def test_concurrent_fills_use_agents_exclusively():
+    """Test thousands of fills from many threads never share an agent's driver"""
+    calls = [FIELDS[i % len(FIELDS)] for i in range(2000)]
+    with make_pool(size=4) as pool:
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            results = list(executor.map(lambda field: pool.run(fill, field), calls))
+        drivers = [agent.driver for agent in pool.agents]
+
+    assert results == [None if field == "credit-card" else True for field in calls]
+    assert len(drivers) <= 4
+    assert sum(d.overlaps for d in drivers) == 0
+    assert sum(d.fills for d in drivers) == sum(r is True for r in results)
+    assert all(agent.driver is None for agent in pool.agents)  # Browsers closed with the pool
+
+def test_fills_scale_with_pool_size():
+    """Test browser-bound work scales with the number of pooled agents"""
+    def run(size, fills=40):
+        with make_pool(size, latency=0.005) as pool:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=size) as executor:
+                list(executor.map(lambda _: pool.run(fill, "policy-number"), range(fills)))
+            return time.perf_counter() - start
+
+    assert run(4) < 0.6 * run(1)
+
+def test_pool_restarts_lost_browser():
+    """Test an agent whose browser was lost (e.g. a failed recycle) gets a new one before reuse"""
+    pool = make_pool(size=1)
+    with pool.session() as agent:
+        first = agent.driver
+    agent.close_browser()
+    with pool.session() as again:
+        assert again is agent
+        assert again.driver is not None and again.driver is not first
+    pool.close()
@@ -0,0 +1,116 @@
+import gzip
+import json
+import os
+import time
+import pytest
+from policy.policy_types import Action, Effect, Statement, Condition, Policy
+from policy.policy_enforcer import PolicyEnforcer
+from policy.decision_audit import DecisionAuditLog, context_hash
+
+def make_policy():
+    return Policy(
+        version="2023-12-08",
+        statements=[
+            Statement(
+                sid="AllowFill",
+                effect=Effect.ALLOW,
+                actions=[Action.FILL_FORM],
+                resources=["*"],
+                conditions=[Condition(type="StringEquals", key="browser.url", value="https://insurance.example.com")]
+            ),
+            Statement(
+                sid="DenyCard",
+                effect=Effect.DENY,
+                actions=[Action.FILL_FORM],
+                resources=["form_field:credit-card"]
+            ),
+            Statement(
+                sid="AllowAI",
+                effect=Effect.ALLOW,
+                actions=[Action.ANALYZE_CONTENT],
+                resources=["*"],
+                conditions=[Condition(type="DateGreaterThan", key="time", value="2023-12-01T00:00:00")]
+            )
+        ]
+    )
+
+def read_records(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+def test_records_decisions(tmp_path):
+    """Test each check produces a structured audit record"""
+    audit = DecisionAuditLog(str(tmp_path / "decisions.jsonl"))
+    enforcer = PolicyEnforcer(make_policy(), audit_log=audit)
+    context = {"browser.url": "https://insurance.example.com"}
+
+    assert enforcer.check_permission(Action.FILL_FORM, "form_field:policy-number", context)
+    assert not enforcer.check_permission(Action.FILL_FORM, "form_field:credit-card", context)
+    assert not enforcer.check_permission(Action.NAVIGATE, "*", context)
+    with pytest.raises(ValueError):
+        enforcer.check_permission(Action.ANALYZE_CONTENT, "*", {})
+    audit.close()
+
+    records = read_records(audit.path)
+    assert [r["effect"] for r in records] == ["Allow", "Deny", "Deny", "Error"]
+    assert records[0]["matched_sids"] == ["AllowFill"]
+    assert records[1]["matched_sids"] == ["AllowFill", "DenyCard"]
+    assert records[2]["matched_sids"] == []
+    assert records[0]["action"] == "browser:FillForm"
+    assert records[0]["context_hash"] == context_hash(context)
+    assert all(r["latency_us"] >= 0 for r in records)
+
+def test_background_flush(tmp_path):
+    """Test the writer thread flushes without an explicit close"""
+    audit = DecisionAuditLog(str(tmp_path / "decisions.jsonl"), batch_size=10, flush_interval=0.05)
+    enforcer = PolicyEnforcer(make_policy(), audit_log=audit)
+    for _ in range(25):
+        enforcer.check_permission(Action.NAVIGATE, "*", {})
+
+    deadline = time.time() + 2
+    while audit.written < 25 and time.time() < deadline:
+        time.sleep(0.01)
+    assert audit.written == 25
+    audit.close()
+
+def test_unserializable_record_does_not_stop_writer(tmp_path):
+    """Test a record that fails to serialize is dropped and the writer keeps running"""
+    audit = DecisionAuditLog(str(tmp_path / "decisions.jsonl"), batch_size=10, flush_interval=0.05)
+    audit.record(Action.NAVIGATE, "*", "Deny", [], 1000, {1: "int key", "b": "str key"})  # keys json cannot sort
+    audit.record(Action.NAVIGATE, "*", "Deny", [], 1000, {})
+    time.sleep(0.2)
+    audit.record(Action.NAVIGATE, "*", "Deny", [], 1000, {})
+
+    deadline = time.time() + 2
+    while audit.written < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert audit.written == 2
+    assert audit.dropped == 1
+    assert audit._thread.is_alive()
+    audit.close()
+
+def test_rotation_and_compression(tmp_path):
+    """Test files rotate by size and are gzip-compressed when requested"""
+    audit = DecisionAuditLog(str(tmp_path / "decisions.jsonl"), batch_size=10,
+                             max_bytes=2000, backup_count=2, compress=True)
+    for i in range(200):
+        audit.record(Action.NAVIGATE, f"page-{i}", "Deny", (), 1000, None)
+        if i % 10 == 9:
+            audit.flush()
+    audit.close()
+
+    assert audit.path.endswith(".gz")
+    files = sorted(os.listdir(tmp_path))
+    assert files == ["decisions.jsonl.gz", "decisions.jsonl.gz.1", "decisions.jsonl.gz.2"]
+    assert read_records(audit.path)[-1]["resource"] == "page-199"
+
+def test_ring_buffer_drops_oldest(tmp_path):
+    """Test a full buffer drops the oldest records instead of blocking"""
+    audit = DecisionAuditLog(str(tmp_path / "decisions.jsonl"), capacity=5, flush_interval=60)
+    for i in range(8):
+        audit.record(Action.NAVIGATE, f"page-{i}", "Deny", (), 0, None)
+    audit.close()
+
+    assert audit.dropped == 3
+    assert [r["resource"] for r in read_records(audit.path)] == [f"page-{i}" for i in range(3, 8)]
@@ -0,0 +1,101 @@
+import json
+import os
+from unittest.mock import Mock, patch
+from ai_insurance_agent import AIInsuranceAgent
+from claim_checkpoint import ClaimCheckpointStore, ClaimStage
+from form_value_mapper import FormValueMapper
+
+POLICY_FILE = "policies/insurance_agent_policy.json"
+
+# Outline of test_files/claim_form.html
+OUTLINE = {
+    "title": "Insurance Claim Form",
+    "headings": ["Insurance Claim Form"],
+    "fields": [
+        {"id": "policy-number", "name": "policy-number", "type": "text", "label": "Policy Number:", "required": True},
+        {"id": "incident-date", "name": "incident-date", "type": "date", "label": "Incident Date:", "required": True},
+        {"id": "claim-type", "name": "claim-type", "type": "select-one", "label": "Claim Type:",
+         "required": True, "options": ["auto", "home", "life"]},
+        {"id": "claim-amount", "name": "claim-amount", "type": "number", "label": "Claim Amount:", "required": True},
+        {"id": "description", "name": "description", "type": "textarea", "label": "Description:", "required": True},
+        {"id": "credit-card", "name": "credit-card", "type": "text", "label": "Credit Card (for processing fee):"},
+    ]
+}
+
+CLAIM = {"policy_number": "POL123456", "claim_amount": "$1,234.56", "incident_date": "2023-12-08", "claim_type": "auto"}
+
+def test_map_routine_claim():
+    """Test structured claim data is mapped, converted and templated onto the form"""
+    mapper = FormValueMapper()
+    mapping = mapper.map(dict(CLAIM, credit_card="4111111111111111"), {"fields": OUTLINE["fields"][:5]},
+                         "Rear-ended at a stop light")
+
+    assert mapping.values == {
+        "policy-number": "POL123456",
+        "incident-date": "2023-12-08",
+        "claim-type": "auto",
+        "claim-amount": "1234.56",
+        "description": "Auto claim for a vehicle incident on 2023-12-08, amount $1,234.56: Rear-ended at a stop light",
+    }
+    assert mapping.confidence == 0.8
+    assert mapper.is_confident(mapping)
+
+def test_low_confidence_mappings():
+    """Test missing, unconvertible and loosely matched fields lower the confidence"""
+    mapper = FormValueMapper()
+    fields = {"fields": OUTLINE["fields"][:5]}
+
+    missing = mapper.map({k: v for k, v in CLAIM.items() if k != "incident_date"}, fields, "Rear-ended")
+    # The description template needs the date too
+    assert missing.missing == ["incident-date", "description"]
+    assert missing.confidence == 0.0
+    # Without the task, the description is left to the LLM rather than filled with boilerplate
+    assert mapper.map(CLAIM, fields).missing == ["description"]
+
+    assert mapper.map(dict(CLAIM, claim_type="Home"), fields).values["claim-type"] == "home"
+    # No option and no description template for an unknown type
+    assert mapper.map(dict(CLAIM, claim_type="boat"), fields, "Rear-ended").missing == ["claim-type", "description"]
+
+    loose = mapper.map({"number": "POL1"}, {"fields": [{"id": "x1", "type": "text", "label": "Policy number"}]})
+    assert loose.values == {"x1": "POL1"}
+    assert not mapper.is_confident(loose)
+
+def make_agent(checkpoint_store=None):
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
+        agent = AIInsuranceAgent(policy_file=POLICY_FILE, checkpoint_store=checkpoint_store)
+    agent.driver = Mock(current_url="http://localhost:8000/*")
+    agent.driver.execute_script.return_value = dict(OUTLINE, key="page")
+    agent.analyze_page = Mock(return_value={"fields": ["policy-number"]})
+    agent.client = Mock()
+    agent.client.chat.completions.create.return_value.choices = [
+        Mock(message=Mock(content=json.dumps({"policy-number": "POL999"})))
+    ]
+    return agent
+
+def test_routine_claims_skip_the_llm():
+    """Test confident mappings fill the form without a model call; others fall back"""
+    agent = make_agent()
+
+    values = agent.prepare_claim("Auto claim", claim_data=CLAIM)
+    assert values["claim-amount"] == "1234.56"
+    assert "credit-card" not in values
+    agent.client.chat.completions.create.assert_not_called()
+
+    assert agent.prepare_claim("Auto claim", claim_data=dict(CLAIM, claim_amount="lots")) == {"policy-number": "POL999"}
+    assert agent.client.chat.completions.create.called
+    assert agent.value_mapper.stats() == {"mapped": 1, "fallbacks": 1, "fallback_rate": 0.5}
+
+def test_resumed_mapped_claim_skips_analysis():
+    """Test a retry reuses checkpointed mapped values without analyzing the page or calling the model"""
+    store = ClaimCheckpointStore(":memory:")
+    agent = make_agent(store)
+    values = agent.prepare_claim("Rear-ended", claim_id="claim-5", claim_data=CLAIM)
+    assert set(store.completed_stages("claim-5")) == {ClaimStage.VALUES_GENERATED}
+
+    retry = make_agent(store)
+    retry.analyze_page.return_value = None
+    assert retry.prepare_claim("Rear-ended", claim_id="claim-5", claim_data=CLAIM) == values
+    retry.analyze_page.assert_not_called()
+    retry.client.chat.completions.create.assert_not_called()
+    assert retry.value_mapper.stats()["mapped"] == 0
+    store.close()
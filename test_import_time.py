@@ -0,0 +1,27 @@
+import os
+import pytest
+from unittest.mock import patch
+from ai_insurance_agent import AIInsuranceAgent
+from bench_import_time import measure
+
+@pytest.mark.parametrize("module", [
+    "policy.policy_enforcer",
+    "claim_validation",
+    "insurance_agent",
+    "ai_insurance_agent",
+])
+def test_no_heavy_imports(module):
+    """Test importing project modules does not load selenium, openai, requests or dotenv"""
+    result = measure(module, runs=1)
+    assert result["heavy_modules_loaded"] == []
+
+def test_openai_client_created_on_first_use():
+    """Test constructing an agent defers creating the OpenAI client"""
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
+        agent = AIInsuranceAgent()
+    assert agent._client is None
+
+    with patch("openai.OpenAI") as openai_cls:
+        client = agent.client
+        assert agent.client is client
+    openai_cls.assert_called_once_with(api_key="test_key")
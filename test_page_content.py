@@ -0,0 +1,117 @@
+import json
+import os
+import pytest
+from unittest.mock import Mock, patch
+from ai_insurance_agent import AIInsuranceAgent
+from page_content import PageContentExtractor
+from policy.policy_types import Action
+
+OUTLINE = {
+    "title": "Insurance Claim Form",
+    "headings": ["Insurance Claim Form"],
+    "fields": [
+        {"id": "policy-number", "name": "policy-number", "type": "text", "label": "Policy Number:", "required": True},
+        {"id": "claim-type", "name": "claim-type", "type": "select-one", "label": "Claim Type:",
+         "required": True, "options": ["auto", "home", "life"]},
+    ],
+    "truncated": False
+}
+
+class FakeDriver:
+    """Answers the extraction scripts like a browser would, counting full payloads"""
+    def __init__(self, outline=OUTLINE, text="Insurance Claim Form\nPolicy Number:\nSubmit Claim"):
+        self.current_url = "http://localhost:8000/claim-form"
+        self.navigations = 0
+        self.outline = outline
+        self.body_text = text
+        self.full_payloads = 0
+
+    def get(self, url):
+        self.current_url = url
+        self.navigations += 1
+
+    def execute_script(self, script, known, *args):
+        key = f"{self.current_url}|{self.navigations}"
+        if known == key:
+            return {"key": key, "unchanged": True}
+        self.full_payloads += 1
+        if "innerText" in script:
+            max_chars = args[0]
+            return {"key": key, "text": self.body_text[:max_chars], "truncated": len(self.body_text) > max_chars}
+        return dict(self.outline, key=key)
+
+def test_outline_memoized_per_navigation():
+    """Test the same page is fetched once and refetched after navigating"""
+    driver = FakeDriver()
+    extractor = PageContentExtractor()
+
+    first = extractor.outline(driver)
+    assert extractor.outline(driver) is first
+    assert driver.full_payloads == 1
+
+    driver.get("http://localhost:8000/claim-form")
+    extractor.outline(driver)
+    assert driver.full_payloads == 2
+
+    extractor.reset()
+    extractor.outline(driver)
+    assert driver.full_payloads == 3
+
+def test_render_outline():
+    """Test the rendered outline lists ids, types, labels and options"""
+    text = PageContentExtractor().render(OUTLINE)
+    assert text.splitlines() == [
+        "Page: Insurance Claim Form",
+        "Headings: Insurance Claim Form",
+        "Fields:",
+        "- policy-number (text, required): Policy Number:",
+        "- claim-type (select-one, required): Claim Type: [auto, home, life]",
+    ]
+
+def test_form_content_falls_back_to_capped_text():
+    """Test pages without form fields fall back to page text, capped in size"""
+    driver = FakeDriver(outline={"title": "Portal", "headings": [], "fields": []}, text="x" * 50000)
+    extractor = PageContentExtractor(max_chars=1000)
+    assert extractor.form_content(driver) == "x" * 1000
+
+def test_script_without_result_falls_back_to_body_text():
+    """Test a page that returns no script result (still loading) is read from the body, uncached"""
+    driver = Mock()
+    driver.execute_script.return_value = None
+    driver.find_element.return_value.text = "Loading claim form..."
+    extractor = PageContentExtractor()
+
+    assert extractor.outline(driver)["fields"] == []
+    assert extractor.form_content(driver) == "Loading claim form..."
+    driver.find_element.assert_called_with("tag name", "body")
+
+    driver.execute_script.return_value = dict(OUTLINE, key="ready")
+    assert extractor.outline(driver)["fields"] == OUTLINE["fields"]
+
+def test_analyze_page_reads_page_once():
+    """Test analyze_page sends the outline and checks read permission only once"""
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
+        agent = AIInsuranceAgent(policy_enforcer=Mock(spec=["check_permission"]))
+    agent.policy_enforcer.check_permission.return_value = True
+    agent.client = Mock()
+    agent.client.chat.completions.create.return_value.choices = [Mock(message=Mock(content=json.dumps({"ok": True})))]
+    agent.driver = FakeDriver()
+
+    assert agent.analyze_page() == {"ok": True}
+    actions = [c.args[0] for c in agent.policy_enforcer.check_permission.call_args_list]
+    assert actions.count(Action.READ_PAGE) == 1
+    assert actions.count(Action.ANALYZE_CONTENT) == 1
+    assert agent.driver.full_payloads == 1
+    prompt = agent.client.chat.completions.create.call_args[1]["messages"][1]["content"]
+    assert "claim-type (select-one, required): Claim Type: [auto, home, life]" in prompt
+
+def test_get_form_outline_requires_permission():
+    """Test the outline is not extracted from pages the policy forbids reading"""
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
+        agent = AIInsuranceAgent(policy_file="policies/insurance_agent_policy.json")
+    agent.driver = FakeDriver()
+    agent.driver.current_url = "http://localhost:8001/claim-form"
+
+    with pytest.raises(PermissionError):
+        agent.get_form_outline()
+    assert agent.driver.full_payloads == 0
@@ -112,3 +112,40 @@ def test_resource_matching():
     
     assert enforcer.check_permission(Action.FILL_FORM, "form_field:policy-number", context)
     assert not enforcer.check_permission(Action.FILL_FORM, "form_field:credit-card", context)
+
+def test_decision_cache():
+    """Test cached decisions match uncached ones and are invalidated on policy change"""
+    enforcer = PolicyEnforcer("policies/insurance_agent_policy.json", cache_size=16)
+    context = {"browser.url": "http://localhost:8000/*", "time": datetime.now().isoformat()}
+    
+    for _ in range(3):
+        assert enforcer.check_permission(Action.FILL_FORM, "form_field:policy-number", context)
+        assert not enforcer.check_permission(Action.FILL_FORM, "form_field:credit-card", context)
+    assert enforcer.cache.hits == 4
+    
+    # Changing an unrelated context key still hits the cache
+    context["user"] = "someone-else"
+    assert enforcer.check_permission(Action.FILL_FORM, "form_field:policy-number", context)
+    assert enforcer.cache.hits == 5
+    
+    enforcer.policy = Policy(version="2023-12-08", statements=[])
+    assert len(enforcer.cache) == 0
+    assert not enforcer.check_permission(Action.FILL_FORM, "form_field:policy-number", context)
+
+def test_decision_cache_keys_date_conditions_on_outcome():
+    """Test a changing timestamp hits the cache while its date conditions give the same result"""
+    policy = Policy(version="2023-12-08", statements=[
+        Statement(sid="AllowAfterLaunch", effect=Effect.ALLOW, actions=[Action.FILL_FORM], resources=["*"],
+                  conditions=[Condition(type="DateGreaterThan", key="time", value="2023-12-01T00:00:00")])
+    ])
+    enforcer = PolicyEnforcer(policy, cache_size=16)
+
+    for second in range(5):
+        assert enforcer.check_permission(Action.FILL_FORM, "form_field:policy-number",
+                                         {"time": f"2024-01-01T00:00:0{second}"})
+    assert enforcer.cache.hits == 4
+    assert not enforcer.check_permission(Action.FILL_FORM, "form_field:policy-number",
+                                         {"time": "2023-11-30T00:00:00"})
+    assert enforcer.cache.hits == 4
+    with pytest.raises(ValueError):
+        enforcer.check_permission(Action.FILL_FORM, "form_field:policy-number", {"time": "not a date"})
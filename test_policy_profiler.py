@@ -0,0 +1,80 @@
+import csv
+import json
+import pytest
+from policy.policy_types import Action, Effect, Statement, Condition, Policy
+from policy.policy_enforcer import PolicyEnforcer
+
+POLICY = Policy(
+    version="2023-12-08",
+    statements=[
+        Statement(sid="AllowLocalForms", effect=Effect.ALLOW, actions=[Action.FILL_FORM], resources=["*"],
+                  conditions=[Condition(type="StringEquals", key="browser.url", value="http://localhost:8000/*")]),
+        Statement(sid="DenyCards", effect=Effect.DENY, actions=[Action.FILL_FORM],
+                  resources=["form_field:credit-card"]),
+        Statement(sid="AllowAfterLaunch", effect=Effect.ALLOW, actions=[Action.FILL_FORM], resources=["*"],
+                  conditions=[Condition(type="DateGreaterThan", key="time", value="2023-12-01T00:00:00")]),
+        Statement(sid="AllowClicks", effect=Effect.ALLOW, actions=[Action.CLICK_ELEMENT], resources=["*"]),
+    ]
+)
+LOCAL = {"browser.url": "http://localhost:8000/*"}
+
+def test_explain_deny():
+    """Test the trace shows every statement visited and why the check was denied"""
+    trace = PolicyEnforcer(POLICY).explain(Action.FILL_FORM, "form_field:credit-card", LOCAL)
+
+    assert trace.decision is False
+    assert trace.matched_sids == ["AllowLocalForms", "DenyCards"]
+    assert [s.sid for s in trace.statements] == ["AllowLocalForms", "DenyCards"]
+    assert trace.not_evaluated == ["AllowAfterLaunch"]
+    assert "DenyCards: applied (Deny)" in trace.summary()
+
+def test_explain_failed_condition():
+    """Test failed conditions report the context value they saw, and errors are traced, not raised"""
+    enforcer = PolicyEnforcer(POLICY)
+    trace = enforcer.explain(Action.FILL_FORM, "form_field:name", {"browser.url": "http://evil", "time": "2023-01-01T00:00:00"})
+
+    assert trace.decision is False
+    first = trace.statements[0]
+    assert not first.applied
+    assert (first.failed_condition.key, first.failed_condition.actual) == ("browser.url", "http://evil")
+    assert trace.statements[1].resource_matched is False
+    assert trace.statements[2].failed_condition.actual == "2023-01-01T00:00:00"
+
+    # A missing time makes check_permission raise; explain shows where
+    trace = enforcer.explain(Action.FILL_FORM, "form_field:name", {"browser.url": "http://evil"})
+    assert trace.decision is None
+    assert trace.error.startswith("ValueError")
+    assert trace.statements[2].failed_condition.actual == "<missing>"
+    assert json.dumps(trace.to_dict())
+
+def test_explain_matches_check_permission():
+    """Test explain reaches the same decision as check_permission"""
+    enforcer = PolicyEnforcer(POLICY)
+    context = dict(LOCAL, time="2024-01-01T00:00:00")
+    for action, resource in [(Action.FILL_FORM, "form_field:name"), (Action.FILL_FORM, "form_field:credit-card"),
+                             (Action.CLICK_ELEMENT, "#submit"), (Action.NAVIGATE, "*")]:
+        assert enforcer.explain(action, resource, context).decision == enforcer.check_permission(action, resource, context)
+
+def test_profiler_counters_and_export(tmp_path):
+    """Test per-sid counters aggregate over checks and export as JSON and CSV"""
+    enforcer = PolicyEnforcer(POLICY, profile=True)
+    context = dict(LOCAL, time="2024-01-01T00:00:00")
+    for _ in range(3):
+        enforcer.check_permission(Action.FILL_FORM, "form_field:name", context)
+    enforcer.check_permission(Action.FILL_FORM, "form_field:name", {"browser.url": "http://evil", "time": "2024-01-01T00:00:00"})
+    with pytest.raises(TypeError):
+        enforcer.check_permission(Action.FILL_FORM, "form_field:name", {"browser.url": "http://evil", "time": "2024-01-01T00:00:00Z"})
+
+    profiles = {p.sid: p for p in enforcer.profiler.profiles()}
+    assert enforcer.profiler.checks == 5
+    assert (profiles["AllowLocalForms"].evaluations, profiles["AllowLocalForms"].matches,
+            profiles["AllowLocalForms"].condition_failures) == (5, 3, 2)
+    assert (profiles["AllowAfterLaunch"].matches, profiles["AllowAfterLaunch"].errors) == (4, 1)
+    assert enforcer.profiler.dead() == ["AllowClicks", "DenyCards"]
+
+    enforcer.profiler.export(str(tmp_path / "profile.json"))
+    exported = json.loads((tmp_path / "profile.json").read_text())
+    assert exported["checks"] == 5
+    enforcer.profiler.export(str(tmp_path / "profile.csv"))
+    with open(tmp_path / "profile.csv") as f:
+        assert {row["sid"] for row in csv.DictReader(f)} == {s.sid for s in POLICY.statements}
@@ -0,0 +1,104 @@
+import socket
+import time
+import pytest
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from policy.policy_types import Action
+from policy.policy_enforcer import PolicyEnforcer
+from policy.policy_server import PolicyServer
+from policy.policy_client import PolicyClient, PolicyServerError
+
+POLICY_FILE = "policies/insurance_agent_policy.json"
+ALLOWED_URL = "http://localhost:8000/*"
+
+CHECKS = [
+    (Action.FILL_FORM, "form_field:policy-number", {"browser.url": ALLOWED_URL}),
+    (Action.FILL_FORM, "form_field:credit-card", {"browser.url": ALLOWED_URL}),
+    (Action.READ_PAGE, "*", {"browser.url": "http://evil.example.com"}),
+    (Action.EXECUTE_SCRIPT, "*", {}),
+]
+
+@pytest.fixture(params=["unix", "http"])
+def server(request, tmp_path):
+    enforcer = PolicyEnforcer(POLICY_FILE, cache_size=1024)
+    unix_path = str(tmp_path / "policy.sock") if request.param == "unix" else None
+    with PolicyServer(enforcer, unix_path=unix_path) as server:
+        yield server
+
+def test_decisions_match_enforcer(server):
+    """Test remote decisions are identical to the in-process enforcer"""
+    local = PolicyEnforcer(POLICY_FILE)
+    expected = [local.check_permission(*check) for check in CHECKS]
+    with PolicyClient(server.address) as client:
+        assert [client.check_permission(*check) for check in CHECKS] == expected
+        assert client.check_many(CHECKS * 300) == expected * 300
+
+def test_evaluation_errors_propagate(server):
+    """Test a check that raises on the server raises PolicyServerError on the client"""
+    with PolicyClient(server.address) as client:
+        with pytest.raises(PolicyServerError):
+            client.check_permission(Action.ANALYZE_CONTENT, "*", {"time": "not-a-date"})
+        # The connection is still usable afterwards
+        assert client.check_permission(*CHECKS[0])
+
+def test_concurrent_calls_are_batched(server):
+    """Test checks from many threads share round trips"""
+    batches = []
+    with PolicyClient(server.address, batch_window=0.005) as client:
+        send = client._send
+
+        def counting_send(chunks):
+            batches.append(sum(len(c) for c in chunks))
+            return send(chunks)
+        client._send = counting_send
+
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            results = list(pool.map(lambda i: client.check_permission(*CHECKS[i % 4]), range(400)))
+
+    assert results == [[True, False, False, False][i % 4] for i in range(400)]
+    assert sum(batches) == 400
+    assert len(batches) < 400
+
+def test_unserializable_context_fails_alone(server):
+    """Test a check whose context is not JSON serializable fails without failing its batch"""
+    bad = (Action.FILL_FORM, "form_field:policy-number", {"browser.url": ALLOWED_URL, "time": datetime.now()})
+    with PolicyClient(server.address, batch_window=0.005) as client:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(client.check_permission, *(bad if i == 3 else CHECKS[0])) for i in range(8)]
+        with pytest.raises(TypeError):
+            futures[3].result()
+        assert all(f.result() for i, f in enumerate(futures) if i != 3)
+
+def test_check_times_out(server):
+    """Test check_permission gives up when no decision arrives in time"""
+    with PolicyClient(server.address, timeout=0.1) as client:
+        send = client._send
+
+        def slow_send(chunks):
+            time.sleep(0.3)
+            return send(chunks)
+        client._send = slow_send
+        with pytest.raises(TimeoutError):
+            client.check_permission(*CHECKS[0])
+
+def test_unsupported_address():
+    """Test unknown address schemes are rejected"""
+    with pytest.raises(ValueError):
+        PolicyClient("tcp://127.0.0.1:9000")
+
+def test_unix_path_must_be_a_socket(tmp_path):
+    """Test a stale socket is replaced but another file at the socket path is left alone"""
+    enforcer = PolicyEnforcer(POLICY_FILE)
+    path = tmp_path / "policy.sock"
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(path))  # Left behind like a crashed server's socket
+    stale.close()
+    with PolicyServer(enforcer, unix_path=str(path)) as server:
+        with PolicyClient(server.address) as client:
+            assert client.check_permission(*CHECKS[0])
+
+    regular = tmp_path / "policy.json"
+    regular.write_text("{}")
+    with pytest.raises(FileExistsError):
+        PolicyServer(enforcer, unix_path=str(regular))
+    assert regular.read_text() == "{}"
@@ -0,0 +1,123 @@
+import json
+import random
+import pytest
+from policy.policy_types import Action, Effect, Statement, Condition, Policy
+from policy.policy_enforcer import PolicyEnforcer
+from policy.policy_simulator import DecisionLog, PolicySimulator, verify_parity, main
+
+POLICY_FILE = "policies/insurance_agent_policy.json"
+
+def make_policy():
+    return Policy(
+        version="2023-12-08",
+        statements=[
+            Statement(
+                sid="AllowForms",
+                effect=Effect.ALLOW,
+                actions=[Action.FILL_FORM, Action.READ_PAGE],
+                resources=["*"],
+                conditions=[Condition(type="StringEquals", key="browser.url", value="https://insurance.example.com")]
+            ),
+            Statement(
+                sid="AllowRecentAI",
+                effect=Effect.ALLOW,
+                actions=[Action.ANALYZE_CONTENT],
+                resources=["*"],
+                conditions=[Condition(type="DateGreaterThan", key="time", value="2023-12-01T00:00:00")]
+            ),
+            Statement(
+                sid="DenyCard",
+                effect=Effect.DENY,
+                actions=[Action.FILL_FORM],
+                resources=["form_field:credit-*"]
+            )
+        ]
+    )
+
+def random_records(n, seed=0):
+    rng = random.Random(seed)
+    actions = [Action.FILL_FORM, Action.READ_PAGE, Action.ANALYZE_CONTENT, Action.NAVIGATE]
+    resources = ["*", "form_field:policy-number", "form_field:credit-card", "form_field:description"]
+    urls = ["https://insurance.example.com", "https://malicious.com", None]
+    times = ["2023-11-01T00:00:00", "2024-01-01T00:00:00", "not-a-date", None]
+    records = []
+    for _ in range(n):
+        context = {}
+        url, time = rng.choice(urls), rng.choice(times)
+        if url is not None:
+            context["browser.url"] = url
+        if time is not None:
+            context["time"] = time
+        records.append({
+            "action": rng.choice(actions).value,
+            "resource": rng.choice(resources),
+            "context": context
+        })
+    return records
+
+def test_simulate_basic_decisions():
+    """Test batch decisions for allow, deny and missing condition keys"""
+    log = DecisionLog.from_records([
+        {"action": "browser:FillForm", "resource": "form_field:policy-number",
+         "context": {"browser.url": "https://insurance.example.com"}},
+        {"action": "browser:FillForm", "resource": "form_field:credit-card",
+         "context": {"browser.url": "https://insurance.example.com"}},
+        {"action": "browser:FillForm", "resource": "form_field:policy-number", "context": {}},
+        {"action": "browser:Navigate", "resource": "*", "context": {}},
+    ])
+    result = PolicySimulator(make_policy()).simulate(log)
+
+    assert result.decisions.tolist() == [True, False, False, False]
+    assert not result.errors.any()
+    assert result.summary() == {"total": 4, "allowed": 1, "denied": 3, "errors": 0}
+
+def test_simulate_marks_errors():
+    """Test that records on which check_permission raises are flagged as errors"""
+    log = DecisionLog.from_records([
+        {"action": "ai:AnalyzeContent", "resource": "*", "context": {"time": "2024-01-01T00:00:00"}},
+        {"action": "ai:AnalyzeContent", "resource": "*", "context": {"time": "not-a-date"}},
+        {"action": "ai:AnalyzeContent", "resource": "*", "context": {}},
+    ])
+    result = PolicySimulator(make_policy()).simulate(log)
+
+    assert result.decisions.tolist() == [True, False, False]
+    assert result.errors.tolist() == [False, True, True]
+
+def test_parity_with_enforcer():
+    """Test simulator decisions match check_permission on a random log"""
+    log = DecisionLog.from_records(random_records(2000))
+    for policy in (make_policy(), PolicyEnforcer(POLICY_FILE).policy):
+        assert verify_parity(PolicyEnforcer(policy), log) == []
+
+def test_diff_against_baseline():
+    """Test diffing a candidate policy against a baseline"""
+    candidate = make_policy()
+    candidate.statements[2].resources = ["form_field:credit-*", "form_field:description"]
+    log = DecisionLog.from_records(random_records(500))
+
+    diff = PolicySimulator(candidate).diff(PolicySimulator(make_policy()), log)
+
+    assert len(diff.changed) > 0
+    assert diff.summary() == {"changed": len(diff.changed), "Allow->Deny": len(diff.changed)}
+    for i in diff.changed:
+        assert log.record(i)["resource"] == "form_field:description"
+
+def test_unknown_action_rejected():
+    """Test that records with unknown actions fail to load"""
+    with pytest.raises(ValueError):
+        DecisionLog.from_records([{"action": "browser:Teleport", "resource": "*"}])
+
+def test_cli_jsonl_roundtrip(tmp_path, capsys):
+    """Test the command line entry point on a JSONL log"""
+    log_path = tmp_path / "log.jsonl"
+    with open(log_path, "w") as f:
+        for record in random_records(100):
+            f.write(json.dumps(record) + "\n")
+    output = tmp_path / "decisions.jsonl"
+
+    main([str(log_path), POLICY_FILE, "--output", str(output)])
+
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["total"] == 100
+    with open(output) as f:
+        assert len(f.readlines()) == 100
@@ -0,0 +1,90 @@
+import json
+import pytest
+from policy.policy_types import Action, Effect, Statement, Policy
+from policy.policy_enforcer import PolicyEnforcer
+from policy.policy_store import PolicyStore
+
+POLICY_FILE = "policies/insurance_agent_policy.json"
+LOCAL = {"browser.url": "http://localhost:8000/*"}
+
+def tenant_policy(i):
+    """A shared base plus one tenant-specific statement"""
+    base = PolicyEnforcer(POLICY_FILE).policy
+    return Policy(version=base.version, statements=base.statements + [
+        Statement(sid=f"DenyTenantField{i}", effect=Effect.DENY, actions=[Action.FILL_FORM],
+                  resources=[f"form_field:secret-{i}"])
+    ])
+
+def test_fragments_are_shared():
+    """Test identical statements and conditions are stored once across tenants"""
+    store = PolicyStore()
+    for i in range(200):
+        store.add_tenant(f"t{i}", tenant_policy(i))
+
+    stats = store.stats()
+    assert stats["tenants"] == 200
+    assert stats["statement_refs"] == 800
+    assert stats["unique_statements"] == 3 + 200
+    assert stats["unique_conditions"] == 2
+    a, b = store.enforcer("t1"), store.enforcer("t2")
+    assert a.policy.statements[0] is b.policy.statements[0]
+    assert a.snapshot.compiled.statements[0] is b.snapshot.compiled.statements[0]
+
+def test_checks_routed_by_tenant():
+    """Test each tenant's own statements apply, and unknown tenants are rejected"""
+    store = PolicyStore()
+    store.add_tenant("acme", tenant_policy(1))
+    store.add_tenant("globex", tenant_policy(2))
+
+    assert not store.check_permission(Action.FILL_FORM, "form_field:secret-1", dict(LOCAL, **{"tenant.id": "acme"}))
+    assert store.check_permission(Action.FILL_FORM, "form_field:secret-1", dict(LOCAL, **{"tenant.id": "globex"}))
+    assert not store.check_permission(Action.FILL_FORM, "form_field:credit-card", dict(LOCAL, **{"tenant.id": "globex"}))
+    with pytest.raises(KeyError):
+        store.check_permission(Action.FILL_FORM, "form_field:name", dict(LOCAL, **{"tenant.id": "initech"}))
+    with pytest.raises(KeyError):
+        store.check_permission(Action.FILL_FORM, "form_field:name", LOCAL)
+
+def test_replace_and_load_directory(tmp_path):
+    """Test tenants load from a directory and can be replaced without affecting others"""
+    with open(POLICY_FILE) as f:
+        data = json.load(f)
+    (tmp_path / "acme.json").write_text(json.dumps(data))
+    data["statements"][0]["conditions"][0]["value"] = "http://localhost:9000/*"
+    (tmp_path / "globex.json").write_text(json.dumps(data))
+
+    store = PolicyStore.from_directory(str(tmp_path))
+    assert store.tenants() == ["acme", "globex"]
+    assert store.stats()["unique_conditions"] == 3
+    assert store.enforcer("acme").check_permission(Action.FILL_FORM, "form_field:name", LOCAL)
+    assert not store.enforcer("globex").check_permission(Action.FILL_FORM, "form_field:name", LOCAL)
+
+    store.add_tenant("globex", POLICY_FILE)
+    assert store.enforcer("globex").check_permission(Action.FILL_FORM, "form_field:name", LOCAL)
+    store.remove_tenant("acme")
+    assert store.tenants() == ["globex"]
+
+def test_loaded_policies_are_copied():
+    """Test editing a policy object after loading it does not change any tenant"""
+    store = PolicyStore()
+    policy = tenant_policy(1)
+    store.add_tenant("acme", policy)
+    store.add_tenant("globex", tenant_policy(2))
+
+    condition = next(s for s in policy.statements if s.conditions).conditions[0]
+    condition.value = "http://evil.example.com"
+    for tenant in ("acme", "globex"):
+        assert store.check_permission(Action.FILL_FORM, "form_field:policy-number", dict(LOCAL, **{"tenant.id": tenant}))
+
+def test_fragments_are_released():
+    """Test removing or replacing tenants frees fragments no tenant uses"""
+    store = PolicyStore()
+    for i in range(3):
+        store.add_tenant(f"t{i}", tenant_policy(i))
+    store.remove_tenant("t0")
+    store.add_tenant("t1", tenant_policy(9))
+    assert store.stats()["unique_statements"] == 3 + 2  # shared base plus t2 and t1's replacement
+
+    store.remove_tenant("t1")
+    store.remove_tenant("t2")
+    assert store.stats() == {"tenants": 0, "statement_refs": 0, "unique_statements": 0,
+                             "unique_conditions": 0, "sharing_ratio": 0.0}
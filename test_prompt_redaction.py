@@ -0,0 +1,109 @@
+import json
+import os
+from unittest.mock import Mock, patch
+from ai_insurance_agent import AIInsuranceAgent
+from policy.policy_enforcer import PolicyEnforcer
+from prompt_redaction import PiiVault, PromptRedactor, redact_pii
+
+POLICY_FILE = "policies/insurance_agent_policy.json"
+ALLOWED_URL = "http://localhost:8000/*"
+
+OUTLINE = {
+    "title": "Insurance Claim Form",
+    "headings": ["Insurance Claim Form"],
+    "fields": [
+        {"id": "policy-number", "type": "text", "label": "Policy Number:", "required": True},
+        {"id": "claim-type", "type": "select-one", "label": "Claim Type:", "options": ["auto", "home", "life"]},
+        {"id": "credit-card", "type": "text", "label": "Credit Card (for processing fee):",
+         "placeholder": "XXXX-XXXX-XXXX-XXXX"},
+        {"id": None, "name": "anonymous", "type": "text", "label": "No id"},
+        {"id": "attachment", "type": "file", "label": "Upload photos"},
+    ]
+}
+
+def test_redact_pii():
+    """Test common PII patterns are replaced"""
+    text = ("Card 4111 1111 1111 1111, SSN 123-45-6789, mail jane.doe@example.com, "
+            "call 555-123-4567. Policy POL123456 on 2023-12-08 for $1,234.56")
+    assert redact_pii(text) == (
+        "Card [REDACTED_CARD], SSN [REDACTED_SSN], mail [REDACTED_EMAIL], "
+        "call [REDACTED_PHONE]. Policy POL123456 on 2023-12-08 for $1,234.56"
+    )
+
+def test_prune_outline_drops_denied_and_irrelevant_fields():
+    """Test only fields the policy allows filling remain"""
+    redactor = PromptRedactor(PolicyEnforcer(POLICY_FILE))
+    pruned = redactor.prune_outline(OUTLINE, ALLOWED_URL)
+
+    assert [f["id"] for f in pruned["fields"]] == ["policy-number", "claim-type"]
+    assert redactor.output_schema(pruned) == {
+        "policy-number": "text",
+        "claim-type": "one of: auto, home, life"
+    }
+    # The input outline is not modified
+    assert len(OUTLINE["fields"]) == 5
+
+def test_prune_outline_on_unauthorized_page():
+    """Test no fields are offered on pages the policy does not cover"""
+    redactor = PromptRedactor(PolicyEnforcer(POLICY_FILE))
+    assert redactor.prune_outline(OUTLINE, "http://evil.example.com")["fields"] == []
+
+def test_prune_outline_uses_batch_checks():
+    """Test enforcers with check_many (e.g. PolicyClient) are queried in one call"""
+    client = Mock()
+    client.check_many.return_value = [True, False]
+    pruned = PromptRedactor(client).prune_outline(OUTLINE, ALLOWED_URL)
+
+    assert [f["id"] for f in pruned["fields"]] == ["policy-number"]
+    client.check_many.assert_called_once()
+    client.check_permission.assert_not_called()
+
+def test_pii_vault_round_trip():
+    """Test numbered placeholders are stable per value and restore the original text"""
+    vault = PiiVault()
+    text = vault.redact("Mail a@example.com or b@example.com, again a@example.com, call 555-123-4567")
+    assert text == ("Mail [REDACTED_EMAIL_1] or [REDACTED_EMAIL_2], again [REDACTED_EMAIL_1], "
+                    "call [REDACTED_PHONE_3]")
+    assert vault.restore(text) == "Mail a@example.com or b@example.com, again a@example.com, call 555-123-4567"
+    assert vault.restore(42) == 42
+
+def test_agent_prompts_are_pruned_and_redacted():
+    """Test the generation prompt omits denied fields and redacts PII from the task"""
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
+        agent = AIInsuranceAgent(policy_file=POLICY_FILE)
+    agent.driver = Mock(current_url=ALLOWED_URL)
+    agent.driver.execute_script.return_value = dict(OUTLINE, key="page")
+    agent.client = Mock()
+    agent.client.chat.completions.create.return_value.choices = [
+        Mock(message=Mock(content=json.dumps({"policy-number": "POL123456"})))
+    ]
+
+    values = agent.generate_field_values({"fields": ["policy-number"]},
+                                         "Auto claim, pay fee with card 4111-1111-1111-1111")
+
+    assert values == {"policy-number": "POL123456"}
+    prompt = agent.client.chat.completions.create.call_args[1]["messages"][1]["content"]
+    assert "4111" not in prompt
+    assert "credit-card" not in prompt
+    assert '"claim-type": "one of: auto, home, life"' in prompt
+
+def test_redacted_pii_is_restored_into_fields():
+    """Test PII hidden from the model is filled with its real value, and unknown placeholders are retried"""
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
+        agent = AIInsuranceAgent(policy_file=POLICY_FILE)
+    agent.driver = Mock(current_url=ALLOWED_URL)
+    agent.driver.execute_script.return_value = dict(OUTLINE, key="page")
+    agent.client = Mock()
+    agent.client.chat.completions.create.side_effect = [
+        Mock(choices=[Mock(message=Mock(content=json.dumps({"contact-email": "[REDACTED_PHONE_7]"})))]),
+        Mock(choices=[Mock(message=Mock(content=json.dumps({"contact-email": "[REDACTED_EMAIL_1]"})))]),
+    ]
+
+    with patch("time.sleep"):
+        values = agent.generate_field_values({"fields": ["contact-email"]},
+                                             "Auto claim, reach me at jane.doe@example.com")
+
+    assert values == {"contact-email": "jane.doe@example.com"}
+    assert agent.client.chat.completions.create.call_count == 2
+    prompt = agent.client.chat.completions.create.call_args[1]["messages"][1]["content"]
+    assert "jane.doe" not in prompt
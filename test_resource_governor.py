@@ -0,0 +1,104 @@
+import os
+import time
+import pytest
+from unittest.mock import Mock, patch
+from ai_insurance_agent import AIInsuranceAgent
+from resource_governor import ResourceGovernor, ResourceLimits, descendant_pids, driver_rss, process_rss
+
+def fake_driver(pid=None):
+    driver = Mock()
+    driver.service.process.pid = pid or os.getpid()
+    return driver
+
+def make_agent(limits):
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test_key"}):
+        agent = AIInsuranceAgent(resource_governor=ResourceGovernor(limits))
+    drivers = []
+
+    def initialize_browser():
+        agent.driver = fake_driver()
+        drivers.append(agent.driver)
+    # Stand in for Chrome while keeping the governor hook in AIInsuranceAgent.initialize_browser
+    with patch("insurance_agent.InsuranceClaimAgent.initialize_browser", side_effect=initialize_browser):
+        agent.initialize_browser()
+    return agent, drivers, initialize_browser
+
+def test_process_rss():
+    """Test memory of this process and a driver's process tree is measured"""
+    if not os.path.exists("/proc/self/statm"):
+        pytest.skip("requires /proc")
+    assert process_rss() > 0
+    assert driver_rss(fake_driver()) >= process_rss(os.getpid())
+    assert driver_rss(object()) == 0
+    assert os.getpid() not in descendant_pids(os.getpid())
+
+def test_should_recycle_limits():
+    """Test each limit triggers recycling once reached"""
+    governor = ResourceGovernor(ResourceLimits(max_driver_claims=2))
+    governor.driver_started()
+    governor.claim_finished()
+    assert governor.should_recycle(fake_driver()) is None
+    governor.claim_finished()
+    assert governor.should_recycle(fake_driver()) == "driver processed 2 claims"
+    governor.driver_started()
+    assert governor.should_recycle(fake_driver()) is None
+
+    governor = ResourceGovernor(ResourceLimits(max_driver_age=0.01))
+    governor.driver_started()
+    time.sleep(0.02)
+    assert governor.should_recycle(fake_driver()).startswith("driver age")
+
+    governor = ResourceGovernor(ResourceLimits(max_rss_bytes=1))
+    governor.driver_started()
+    assert governor.should_recycle(fake_driver()).startswith("browser RSS")
+    assert governor.should_recycle(None) is None
+    # The agent process's own memory does not count: recycling the browser would not free it
+    assert governor.should_recycle(object()) is None
+
+def test_report_is_bounded():
+    """Test the per-stage report keeps only the latest measurements with deltas"""
+    governor = ResourceGovernor(ResourceLimits(), report_size=3)
+    for i in range(5):
+        governor.measure(f"stage-{i}")
+    report = governor.report()
+    assert [entry["stage"] for entry in report] == ["stage-2", "stage-3", "stage-4"]
+    assert report[-1]["delta_rss"] == report[-1]["total_rss"] - report[-2]["total_rss"]
+
+def test_agent_recycles_browser_between_claims():
+    """Test finish_claim releases buffers and restarts the browser after the claim limit"""
+    agent, drivers, initialize_browser = make_agent(ResourceLimits(max_driver_claims=2))
+    agent.page_content.reset = Mock()
+
+    with patch("insurance_agent.InsuranceClaimAgent.initialize_browser", side_effect=initialize_browser):
+        assert agent.finish_claim() is None
+        assert agent.finish_claim() == "driver processed 2 claims"
+
+    assert agent.page_content.reset.call_count == 2
+    assert len(drivers) == 2
+    drivers[0].quit.assert_called_once()
+    assert agent.driver is drivers[1]
+    assert agent.resource_governor.recycles == 1
+    assert agent.resource_governor.driver_claims == 0
+    assert [entry["stage"] for entry in agent.resource_governor.report()] == ["claim_finished"] * 2
+
+def test_failed_restart_is_retried():
+    """Test a browser that fails to restart is retried, and the error is raised once retries run out"""
+    agent, drivers, initialize_browser = make_agent(ResourceLimits(max_driver_claims=1))
+    flaky = [RuntimeError("chrome did not start"), None]
+
+    def restart():
+        error = flaky.pop(0) if flaky else RuntimeError("chrome did not start")
+        if error:
+            raise error
+        initialize_browser()
+
+    with patch("insurance_agent.InsuranceClaimAgent.initialize_browser", side_effect=restart), \
+            patch("time.sleep"):
+        assert agent.finish_claim() == "driver processed 1 claims"
+        assert agent.driver is drivers[1]
+        assert agent.resource_governor.recycles == 1
+
+        with pytest.raises(RuntimeError):
+            agent.finish_claim()
+    assert agent.driver is None
+    assert agent.resource_governor.recycles == 1
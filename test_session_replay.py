@@ -0,0 +1,134 @@
+import gzip
+import json
+import time
+from unittest.mock import Mock
+from ai_insurance_agent import AIInsuranceAgent
+from policy.policy_enforcer import PolicyEnforcer
+from policy.policy_types import Action, Effect, Policy, Statement, Condition
+from session_replay import SessionRecorder, SessionReplayer
+
+URL = "http://localhost:8000/*"
+OUTLINE = {
+    "title": "Insurance Claim Form",
+    "headings": ["Insurance Claim Form"],
+    "fields": [
+        {"id": "policy-number", "type": "text", "label": "Policy Number:", "required": True},
+        {"id": "incident-date", "type": "date", "label": "Incident Date:"},
+        {"id": "credit-card", "type": "text", "label": "Credit Card (for processing fee):"},
+    ]
+}
+POLICY = Policy(version="2023-12-08", statements=[
+    Statement(sid="AllowLocal", effect=Effect.ALLOW,
+              actions=[Action.READ_PAGE, Action.FILL_FORM, Action.ANALYZE_CONTENT], resources=["*"],
+              conditions=[Condition(type="StringEquals", key="browser.url", value=URL)]),
+    Statement(sid="DenyCards", effect=Effect.DENY, actions=[Action.FILL_FORM], resources=["form_field:credit-card"]),
+])
+LLM_LATENCY = 0.05
+
+class FakeElement:
+    def __init__(self, field_id, field_type):
+        self.tag_name = "input"
+        self.field_id = field_id
+        self.field_type = field_type
+        self.value = ""
+
+    def get_attribute(self, name):
+        return self.field_type if name == "type" else None
+
+    def clear(self):
+        self.value = ""
+
+    def send_keys(self, value):
+        self.value += value
+
+class FakeDriver:
+    """A browser showing the claim form"""
+    def __init__(self):
+        self.current_url = None
+        self.page_source = None
+        self.elements = {f["id"]: FakeElement(f["id"], f["type"]) for f in OUTLINE["fields"]}
+        self.navigations = 0
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def get(self, url):
+        self.current_url = url
+        self.navigations += 1
+        self.page_source = f"<html><body>form {self.navigations}</body></html>"
+
+    def find_element(self, by, selector):
+        return self.elements[selector.lstrip("#")]
+
+    def execute_script(self, script, *args):
+        if script.startswith("arguments[0].value"):
+            args[0].value = args[1]
+            return None
+        return dict(OUTLINE, key=f"{self.current_url}|{self.navigations}")
+
+    def quit(self):
+        pass
+
+def slow_llm(**kwargs):
+    time.sleep(LLM_LATENCY)
+    content = {"policy-number": "POL123456", "incident-date": "2023-12-08"}
+    if "Analyze" in kwargs["messages"][1]["content"]:
+        content = {"fields": ["policy-number", "incident-date"]}
+    return Mock(choices=[Mock(message=Mock(content=json.dumps(content)))])
+
+def record(tmp_path):
+    agent = AIInsuranceAgent(api_key="test", policy_enforcer=PolicyEnforcer(POLICY))
+    drivers = []
+    agent.driver_factory = lambda: drivers.append(FakeDriver()) or drivers[-1]
+    agent.client = Mock()
+    agent.client.chat.completions.create.side_effect = slow_llm
+
+    recorder = SessionRecorder(agent)
+    assert recorder.run("process_claim_with_ai", URL, "Auto claim for POL123456", claim_id="c1")
+    assert drivers[0].elements["incident-date"].value == "2023-12-08"
+    path = str(tmp_path / "session.json.gz")
+    recorder.save(path)
+    return path, agent
+
+def test_record_session(tmp_path):
+    """Test driver commands, LLM calls and policy checks are captured and the agent is restored"""
+    path, agent = record(tmp_path)
+    with gzip.open(path, "rt") as f:
+        archive = json.load(f)
+
+    calls = [e.get("call") or e.get("attr") for e in archive["events"]["driver"]]
+    assert calls[:2] == ["implicitly_wait", "get"]
+    assert "send_keys" in calls and calls[-1] == "quit"
+    assert len(archive["events"]["llm"]) == 2
+    assert {e["resource"] for e in archive["events"]["policy"]} >= {"*", "form_field:policy-number"}
+    assert list(archive["snapshots"].values()) == ["<html><body>form 1</body></html>"]
+    assert archive["meta"]["result"] is True
+    assert isinstance(agent.policy_enforcer, PolicyEnforcer)
+    assert agent.prompt_redactor.policy_enforcer is agent.policy_enforcer
+
+def test_replay_offline(tmp_path):
+    """Test the session replays without browser, network or policy, fast or with recorded timings"""
+    path, _ = record(tmp_path)
+
+    replayer = SessionReplayer(path)
+    report = replayer.replay(AIInsuranceAgent(api_key="replay"), profile="cprofile", output=str(tmp_path / "replay.prof"))
+    assert report.result is True and report.recorded_result is True
+    assert report.unused == {"driver": 0, "llm": 0, "policy": 0}
+    assert report.elapsed < report.recorded_elapsed
+    assert "process_claim_with_ai" in report.profile
+    assert (tmp_path / "replay.prof").exists()
+    assert replayer.snapshot(URL) == "<html><body>form 1</body></html>"
+
+    timed = SessionReplayer(path, speed=1.0).replay(AIInsuranceAgent(api_key="replay"))
+    assert timed.result is True
+    assert timed.elapsed >= 2 * LLM_LATENCY
+
+def test_replay_detects_divergence(tmp_path):
+    """Test a replay that takes a different path than the recording is reported"""
+    path, _ = record(tmp_path)
+    replayer = SessionReplayer(path)
+    replayer.meta["args"][0] = "http://localhost:8000/other-form"
+
+    report = replayer.replay(AIInsuranceAgent(api_key="replay"))
+    assert report.result is None
+    assert report.mismatches and "get" in report.mismatches[0]